@@ -0,0 +1,203 @@
+"""
+Smoke tests for a collection of model files.
+
+validateModels checks every Antimony and SBML file in a directory in a
+pool of processes. The steps for each model are
+  lint: mass balance check with SBMLLint (cached by src.lintCache)
+  load: create a RoadRunner
+  simulate: short simulation whose values must be finite
+  steadyState: steady state calculation from the end of the simulation
+The report has the status and the time in seconds of every step.
+A step whose prerequisite fails is skipped.
+
+    df = validateModels("models", reportPath="validation.csv")
+"""
+
+from src import lintCache
+from src.simulator import isSBML, loadModel
+
+import collections
+import glob
+import multiprocessing
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+# Constants
+MODEL = "model"
+PATH = "path"
+MESSAGE = "message"
+LINT = "lint"
+LOAD = "load"
+SIMULATE = "simulate"
+STEADY_STATE = "steadyState"
+STEPS = [LINT, LOAD, SIMULATE, STEADY_STATE]
+STATUS_SUFFIX = "Status"
+SECONDS_SUFFIX = "Seconds"
+# Status of a step
+PASS = "pass"
+FAIL = "fail"  # Step ran and found a problem
+ERROR = "error"  # Step raised an exception
+SKIP = "skip"
+ANTIMONY_EXTENSIONS = [".ant"]
+SBML_EXTENSIONS = [".xml", ".sbml"]
+STEADY_STATE_TOLERANCE = 1e-6
+
+# LintCache of the current process. key: mass balance check
+_LINT_CACHE_DCT = {}
+
+
+def getModelPaths(directory, isRecursive=True):
+    """
+    Finds the Antimony and SBML files in a directory. XML files that
+    are not SBML (e.g., SED-ML) are excluded.
+
+    Parameters
+    ----------
+    directory: str
+    isRecursive: bool
+
+    Returns
+    -------
+    list-str
+    """
+    pattern = os.path.join(directory, "**", "*") if isRecursive  \
+          else os.path.join(directory, "*")
+    paths = []
+    for path in sorted(glob.glob(pattern, recursive=isRecursive)):
+        extension = os.path.splitext(path)[1].lower()
+        if extension in ANTIMONY_EXTENSIONS:
+            paths.append(path)
+        elif extension in SBML_EXTENSIONS:
+            with open(path, "r") as fd:
+                if isSBML(fd.read()):
+                    paths.append(path)
+    return paths
+
+def _getLintCache(massBalanceCheck):
+    if not massBalanceCheck in _LINT_CACHE_DCT:
+        _LINT_CACHE_DCT[massBalanceCheck] = lintCache.LintCache(
+              massBalanceCheck=massBalanceCheck)
+    return _LINT_CACHE_DCT[massBalanceCheck]
+
+def validateModel(path, endTime=10, numPoint=100,
+      massBalanceCheck=lintCache.GAMES):
+    """
+    Runs the smoke tests for one model file.
+
+    Parameters
+    ----------
+    path: str
+    endTime: float
+        end of the simulation
+    numPoint: int
+    massBalanceCheck: str
+        games, moiety_analysis
+
+    Returns
+    -------
+    dict
+        keys: model, path, message, <step>Status, <step>Seconds
+    """
+    resultDct = collections.OrderedDict()
+    resultDct[MODEL] = os.path.basename(path)
+    resultDct[PATH] = path
+    messages = []
+    stateDct = {}
+    def runStep(step, function, isPrerequisite=True):
+        # function returns (isPass, message)
+        statusKey = step + STATUS_SUFFIX
+        secondsKey = step + SECONDS_SUFFIX
+        if not isPrerequisite:
+            resultDct[statusKey] = SKIP
+            resultDct[secondsKey] = np.nan
+            return False
+        startTime = time.time()
+        try:
+            isPass, message = function()
+            status = PASS if isPass else FAIL
+        except Exception as exp:
+            status = ERROR
+            message = "%s: %s" % (type(exp).__name__, str(exp))
+        resultDct[statusKey] = status
+        resultDct[secondsKey] = time.time() - startTime
+        if (message is not None) and (len(message) > 0) and (status != PASS):
+            messages.append("%s: %s" % (step, message.strip()))
+        return status == PASS
+    #
+    def readFile():
+        with open(path, "r") as fd:
+            stateDct[MODEL] = fd.read()
+    def lint():
+        readFile()
+        result = _getLintCache(massBalanceCheck).lint(stateDct[MODEL])
+        return not result.isError, result.report
+    def load():
+        if not MODEL in stateDct:
+            readFile()
+        stateDct[LOAD] = loadModel(stateDct[MODEL])
+        return True, None
+    def simulate():
+        data = stateDct[LOAD].simulate(0, endTime, numPoint)
+        isFinite = bool(np.all(np.isfinite(np.array(data))))
+        return isFinite, None if isFinite else "simulation has values that are not finite"
+    def steadyState():
+        residual = stateDct[LOAD].steadyState()
+        isPass = bool(np.isfinite(residual)) and (residual < STEADY_STATE_TOLERANCE)
+        return isPass, "residual is %s" % str(residual)
+    # Lint does not prevent the other steps
+    runStep(LINT, lint)
+    isLoaded = runStep(LOAD, load)
+    isSimulated = runStep(SIMULATE, simulate, isPrerequisite=isLoaded)
+    runStep(STEADY_STATE, steadyState, isPrerequisite=isSimulated)
+    resultDct[MESSAGE] = "\n".join(messages)
+    return resultDct
+
+def _validateModel(args):
+    path, kwargs = args
+    return validateModel(path, **kwargs)
+
+def validateModels(directory, numProcess=None, reportPath=None, **kwargs):
+    """
+    Runs the smoke tests for all models in a directory in parallel.
+
+    Parameters
+    ----------
+    directory: str/list-str
+        directory or list of model files
+    numProcess: int
+        default is the number of CPUs
+    reportPath: str
+        CSV file in which the report is written
+    kwargs: dict
+        optional arguments for validateModel
+
+    Returns
+    -------
+    pd.DataFrame
+        index: path
+        columns: model, <step>Status, <step>Seconds, message
+    """
+    if isinstance(directory, str):
+        paths = getModelPaths(directory)
+    else:
+        paths = list(directory)
+    if numProcess is None:
+        numProcess = multiprocessing.cpu_count()
+    numProcess = max(1, min(numProcess, len(paths)))
+    argss = [(p, kwargs) for p in paths]
+    if numProcess == 1:
+        resultDcts = [_validateModel(a) for a in argss]
+    else:
+        with multiprocessing.Pool(numProcess) as pool:
+            resultDcts = pool.map(_validateModel, argss)
+    columns = [MODEL, PATH]
+    for step in STEPS:
+        columns.extend([step + STATUS_SUFFIX, step + SECONDS_SUFFIX])
+    columns.append(MESSAGE)
+    df = pd.DataFrame(resultDcts, columns=columns).set_index(PATH)
+    if reportPath is not None:
+        df.to_csv(reportPath)
+    return df
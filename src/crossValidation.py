@@ -0,0 +1,316 @@
+"""
+Cross validation for simulation models.
+
+The codes follow the Cross-Validation notebook. In addition, fold results
+can be streamed to a ResultStore so that an interrupted cross validation
+resumes by skipping the folds that already have results.
+Models that are linear networks (e.g., a linear pathway) are simulated
+with the matrix exponential solution in src.linearSolver.
+"""
+
+from src import linearSolver
+from src.resultStore import ResultStore
+from src.simulator import getModelString
+
+import hashlib
+import json
+import numpy as np
+import pandas as pd
+import tellurium as te
+import time
+from SBstoat import ModelFitter, NamedTimeseries
+
+# Constants
+FOLD_TRAINING = 0 # Training data in a fold
+FOLD_TEST = 1 # Test data in a fold
+RSQ = "rsq" # R-squared value in a dataframe
+FIT_TIME = "fitTime" # Seconds used to estimate parameters
+EVALUATION_TIME = "evaluationTime" # Seconds used to calculate rsq for the fold
+NUM_EVALUATION = "numEvaluation" # Number of objective function evaluations
+FOLD = "fold"
+
+
+def findCloseMatchingValues(longArr, shortArr):
+    """
+    Finds the indices in longArr that are closest to the values in shortArr.
+
+    Parameters
+    ----------
+    longArr: np.array
+    shortArr: np.arry
+
+    Returns
+    -------
+    array-int
+    """
+    longArr = np.array(longArr)
+    shortArr = np.array(shortArr)
+    distances = (longArr[np.newaxis, :] - shortArr[:, np.newaxis])**2
+    return np.argmin(distances, axis=1)
+
+def runSimulation(model, simTime, numPoint, parameterDct=None):
+    """
+    Runs the simulation model for the parameters.
+
+    Parameters
+    ----------
+    model: str/ExtendedRoadRunner
+    simTime: float
+        End time for the simulation
+    numPoint: int
+        Number of points in the simulation
+    parameterDct: dict
+        key: parameter name
+        value: parameter value
+
+    Returns
+    -------
+    NamedArray
+        results of simulation
+    """
+    if isinstance(model, str):
+        network = linearSolver.getLinearNetwork(model)
+        if network is not None:
+            return network.simulateNamedArray(0, simTime, numPoint,
+                  parameterDct=parameterDct)
+        roadRunner = te.loada(model)
+    else:
+        roadRunner = model
+        roadRunner.reset()
+    if parameterDct is not None:
+        # Set the simulation constants for all parameters
+        for name in parameterDct.keys():
+            roadRunner[name] = parameterDct[name]
+    return roadRunner.simulate(0, simTime, numPoint)
+
+def generateFolds(observedData, numFold):
+    """
+    Generates indices of training and test data
+    by alternating between folds
+
+    Parameters:
+    ----------
+    observedData: np.array(N, M) or NamedTimeseries
+    numFold: int
+        number of pairs of testIndices and trainIndices
+
+    Returns:
+    --------
+    array-tuple(array, array)
+    """
+    if isinstance(observedData, NamedTimeseries):
+        df = observedData.to_dataframe()
+        df = df.reset_index()
+        observedData = df.to_numpy()
+    result = []
+    numPoint, _ = np.shape(observedData)
+    indices = np.array(range(numPoint))
+    for remainder in range(numFold):
+        isTest = indices % numFold == remainder
+        entry = (observedData[~isTest, :], observedData[isTest, :])
+        result.append(entry)
+    return result
+
+def fitFold(model, colnames, parametersToFit, fold, **fittingArgs):
+    """
+    Estimates parameters from the training data of the fold.
+
+    Parameters
+    ----------
+    model: antimony/ExtendedRoadRunner
+    colnames: list-str
+        names of data columns
+    fold: tuple(np.array, np.array)
+        train data, test data
+    fittingArgs: dict
+        optional arguments for ModelFitter
+
+    Returns
+    -------
+    ModelFitter
+    """
+    observedTS = NamedTimeseries(colnames=colnames, array=fold[FOLD_TRAINING])
+    fitter = ModelFitter(modelSpecification=model,
+                                    parametersToFit=parametersToFit,
+                                    observedData=observedTS,
+                                    **fittingArgs,
+                                    )
+    fitter.fitModel()
+    return fitter
+
+def scoreFold(model, fitter, fold, endTime=None):
+    """
+    Calculates the R-squared value for the fit of the predicted test data
+    using the parameters estimated by the fitter.
+
+    Parameters
+    ----------
+    model: antimony/ExtendedRoadRunner
+    fitter: ModelFitter
+    fold: tuple(np.array, np.array)
+        train data, test data
+    endTime: float
+        end time of the simulation (default: last observed time)
+
+    Returns
+    -------
+    float: R squared
+    """
+    parameterDct = dict(fitter.params.valuesdict())
+    # Obtain the fitted values for the estimated parameters
+    if endTime is None:
+        endTime = max(max(fold[FOLD_TRAINING][:, 0]), max(fold[FOLD_TEST][:, 0]))
+    numPoint = int(10*endTime)
+    fittedData = runSimulation(model, endTime, numPoint,
+                                parameterDct=parameterDct)
+    # Find the time indices that correspond to the test data
+    testData = fold[FOLD_TEST]
+    testTimes = testData[:, 0]
+    fittedTimes = fittedData[:, 0]
+    indices = findCloseMatchingValues(fittedTimes, testTimes)
+    # Calculate residuals for the corresponding times
+    fittedTestData = fittedData[indices, 1:]
+    flatFittedTestData = fittedTestData.flatten()
+    flatTestData = (testData[:, 1:]).flatten()
+    residualsArr = flatTestData - flatFittedTestData
+    return float(1 - np.var(residualsArr)/np.var(flatTestData))
+
+def evaluateFold(model, colnames, parametersToFit, fold,
+                 **fittingArgs):
+    """
+    Calculates the R-squared value for the fit of the predicted test data,
+    whose parameters are estimated from the training data, with the observed
+    tests data.
+
+    Parameters
+    ----------
+    model: antimony/ExtendedRoadRunner
+    colnames: list-str
+        names of data columns
+    fold: tuple(np.array, np.array)
+        train data, test data
+    fittingArgs: dict
+        optional arguments for ModelFitter
+
+    Returns
+    -------
+    float: R squared
+    ModelFitter
+    """
+    fitter = fitFold(model, colnames, parametersToFit, fold, **fittingArgs)
+    endTime = fittingArgs.get("endTime", None)
+    rsq = scoreFold(model, fitter, fold, endTime=endTime)
+    return rsq, fitter
+
+def makeSettingKey(model, observedData, parametersToFit, **fittingArgs):
+    """
+    Identifies the inputs of a cross validation so that stored fold
+    results are only reused for the same model, data and fit.
+
+    Parameters
+    ----------
+    model: antimony/ExtendedRoadRunner
+    observedData: np.array(N, M) or NamedTimeseries
+    parametersToFit: list-SBstoat.Parameter
+    fittingArgs: dict
+        optional arguments for ModelFitter; values must be serializable
+        as JSON
+
+    Returns
+    -------
+    str
+    """
+    try:
+        argsStr = json.dumps(fittingArgs, sort_keys=True)
+    except TypeError:
+        raise ValueError("Fitting arguments must be serializable as JSON.")
+    hasher = hashlib.md5()
+    hasher.update(getModelString(model).encode())
+    for trainData, testData in generateFolds(observedData, 1):
+        hasher.update(np.ascontiguousarray(trainData, dtype=float).tobytes())
+        hasher.update(np.ascontiguousarray(testData, dtype=float).tobytes())
+    parameters = [(p.name, p.lower, p.value, p.upper) for p in parametersToFit]
+    hasher.update(str(parameters).encode())
+    hasher.update(argsStr.encode())
+    return hasher.hexdigest()
+
+def makeFoldKey(numFold, foldIdx, settingKey):
+    """
+    Constructs the key used for a fold in a ResultStore.
+
+    Parameters
+    ----------
+    numFold: int
+    foldIdx: int
+    settingKey: str
+        identifies the model, data and fit (makeSettingKey)
+
+    Returns
+    -------
+    str
+    """
+    return "%s,numFold=%d,fold=%d" % (settingKey, numFold, foldIdx)
+
+def crossValidate(model, observedData, parametersToFit, colnames, numFold,
+                  store=None, **fitterArgs):
+    """
+    Performs cross validation on the model.
+    If a store is provided, the result for each fold is appended to the
+    store as soon as the fold is evaluated, and folds that already have
+    results in the store for the same model, data, parameters and
+    fitter arguments are not re-evaluated.
+
+    Parameters
+    ----------
+    model: ExtendedRoadrunner
+    observedData: NamedTimeseries
+    parametersToFit: list-SBstoat.Parameter
+    colnames: list-str
+    numFold: int
+    store: ResultStore/str
+        store (or path to the SQLite file of a store) for fold results
+
+    Results
+    -------
+    pd.DataFrame
+        Index: fold
+        Columns
+            rsq: R squared value
+            values of parameters
+            fitTime: seconds to estimate parameters
+            evaluationTime: seconds to calculate rsq
+            numEvaluation: number of function evaluations in the fit
+    """
+    if isinstance(store, str):
+        store = ResultStore(store)
+    folds = generateFolds(observedData, numFold)
+    settingKey = None
+    if store is not None:
+        settingKey = makeSettingKey(model, observedData, parametersToFit,
+              **fitterArgs)
+    resultDcts = []
+    for foldIdx, fold in enumerate(folds):
+        key = makeFoldKey(numFold, foldIdx, settingKey)
+        if (store is not None) and store.has(key):
+            resultDcts.append(store.get(key))
+            continue
+        startTime = time.time()
+        fitter = fitFold(model, colnames, parametersToFit, fold, **fitterArgs)
+        fitTime = time.time() - startTime
+        startTime = time.time()
+        foldQuality = scoreFold(model, fitter, fold,
+              endTime=fitterArgs.get("endTime", None))
+        resultDct = {FOLD: foldIdx, RSQ: foldQuality}
+        valueDct = fitter.params.valuesdict()
+        for parameter in parametersToFit:
+            resultDct[parameter.name] = valueDct[parameter.name]
+        resultDct[FIT_TIME] = fitTime
+        resultDct[EVALUATION_TIME] = time.time() - startTime
+        resultDct[NUM_EVALUATION] = np.nan
+        if fitter.minimizerResult is not None:
+            resultDct[NUM_EVALUATION] = fitter.minimizerResult.nfev
+        if store is not None:
+            store.append(key, resultDct)
+        resultDcts.append(resultDct)
+    df = pd.DataFrame(resultDcts).set_index(FOLD)
+    return df
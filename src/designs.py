@@ -0,0 +1,349 @@
+"""
+Multi-factor designs of experiments.
+
+Generalizes the one-way design (src.doe) to designs in which several
+factors change at the same time. A design is a dataframe with a column
+for each factor (kinetic constant) and a row for each run. Values are
+percent changes from the baseline value of the factor, as with the
+levels of a 1WD.
+
+Designs
+  full factorial: all combinations of levels
+  fractional factorial: 2-level designs with generated factors
+  Latin hypercube, Sobol: space-filling designs in [-maxPercent, maxPercent]
+
+Effects
+  calculateEffects generalizes calculateMuAlpha to an n-way ANOVA.
+  mu is the grand mean, main effects are alpha_{i,k_i} and interactions
+  are (alpha beta)_{i,k_i,j,k_j}. estimateLinearEffects provides
+  regression estimates for space-filling designs.
+"""
+
+from src import doe
+from src import spectral
+from src.simulator import BatchSimulator
+
+import itertools
+import numpy as np
+import pandas as pd
+from scipy.stats import qmc
+
+# Constants
+RUN = "run"
+TERM = "term"
+DOF = "dof"
+INTERCEPT = "intercept"
+TERM_SEPARATOR = ":"
+
+
+############### DESIGNS ###################
+def makeFullFactorial(factors, percents):
+    """
+    Creates a design with all combinations of levels.
+
+    Parameters
+    ----------
+    factors: list-str
+    percents: list-float/dict
+        levels for all factors or key: factor, value: list-float
+
+    Returns
+    -------
+    pd.DataFrame
+        index: run
+        columns: factors
+        values: percent change
+    """
+    if not isinstance(percents, dict):
+        percents = {f: percents for f in factors}
+    levelss = [list(percents[f]) for f in factors]
+    arr = np.array(list(itertools.product(*levelss)), dtype=float)
+    return _makeDesignDF(arr, factors)
+
+def _makeDesignDF(arr, factors):
+    df = pd.DataFrame(arr, columns=factors)
+    df.index.name = RUN
+    return df
+
+def _getDefaultGenerators(factors, numBase):
+    baseFactors = factors[:numBase]
+    generatedFactors = factors[numBase:]
+    # Use the highest order interactions first
+    interactions = []
+    for order in range(numBase, 1, -1):
+        interactions.extend(itertools.combinations(baseFactors, order))
+    if len(interactions) < len(generatedFactors):
+        raise ValueError("%d base factors cannot generate %d factors."
+              % (numBase, len(generatedFactors)))
+    return {f: list(i) for f, i in zip(generatedFactors, interactions)}
+
+def makeFractionalFactorial(factors, percent=10, numBase=None,
+      generatorDct=None):
+    """
+    Creates a 2-level fractional factorial design. The levels of base
+    factors are a full factorial; the level of a generated factor is the
+    product of the coded levels (-1, +1) of its generators.
+
+    Parameters
+    ----------
+    factors: list-str
+    percent: float
+        levels are -percent, +percent
+    numBase: int
+        number of base factors (default: smallest number that can
+        generate the other factors)
+    generatorDct: dict
+        key: generated factor
+        value: list of base factors whose product is the generated factor
+
+    Returns
+    -------
+    pd.DataFrame
+        index: run
+        columns: factors
+        values: percent change
+    """
+    factors = list(factors)
+    if generatorDct is None:
+        if numBase is None:
+            numBase = 1
+            while 2**numBase - numBase - 1 < len(factors) - numBase:
+                numBase += 1
+        generatorDct = _getDefaultGenerators(factors, numBase)
+    baseFactors = [f for f in factors if not f in generatorDct]
+    for factor, generators in generatorDct.items():
+        if len(set(generators).difference(baseFactors)) > 0:
+            raise ValueError("Generators of %s must be base factors." % factor)
+    codeArr = np.array(list(itertools.product([-1, 1],
+          repeat=len(baseFactors))), dtype=float)
+    codeDct = {f: codeArr[:, n] for n, f in enumerate(baseFactors)}
+    for factor, generators in generatorDct.items():
+        codeDct[factor] = np.prod([codeDct[g] for g in generators], axis=0)
+    arr = np.transpose(np.array([codeDct[f] for f in factors]))
+    return _makeDesignDF(percent*arr, factors)
+
+def _scaleSample(sampleArr, factors, maxPercent):
+    return _makeDesignDF(maxPercent*(2*sampleArr - 1), factors)
+
+def makeLatinHypercube(factors, numRun, maxPercent=20, seed=None):
+    """
+    Creates a Latin hypercube design in [-maxPercent, maxPercent].
+
+    Parameters
+    ----------
+    factors: list-str
+    numRun: int
+    maxPercent: float
+    seed: int
+
+    Returns
+    -------
+    pd.DataFrame
+    """
+    sampler = qmc.LatinHypercube(d=len(factors), seed=seed)
+    return _scaleSample(sampler.random(numRun), factors, maxPercent)
+
+def makeSobol(factors, numRun, maxPercent=20, seed=None):
+    """
+    Creates a scrambled Sobol design in [-maxPercent, maxPercent].
+    numRun should be a power of 2.
+
+    Parameters
+    ----------
+    factors: list-str
+    numRun: int
+    maxPercent: float
+    seed: int
+
+    Returns
+    -------
+    pd.DataFrame
+    """
+    sampler = qmc.Sobol(d=len(factors), seed=seed)
+    return _scaleSample(sampler.random(numRun), factors, maxPercent)
+
+
+############### SIMULATIONS ###################
+def toParameterValues(designDF, baseValues):
+    """
+    Converts percent changes to parameter values.
+
+    Parameters
+    ----------
+    designDF: pd.DataFrame
+    baseValues: np.array
+        baseline values of the factors
+
+    Returns
+    -------
+    np.array (runs, factors)
+    """
+    percentArr = np.maximum(designDF.to_numpy(dtype=float), doe.SMALLEST_PCT)
+    return np.asarray(baseValues)[np.newaxis, :]*(1 + 0.01*percentArr)
+
+def runDesign(model, designDF, molecule="Glucose", numProcess=1,
+      startTime=doe.START, endTime=doe.END, numPoint=doe.NUMPT):
+    """
+    Calculates the frequency responses for the runs of a design.
+
+    Parameters
+    ----------
+    model: str/ExtendedRoadRunner
+    designDF: pd.DataFrame
+    molecule: str/list-str/None
+        None is all floating species
+    numProcess: int
+        number of processes used for simulations
+    startTime: float
+    endTime: float
+    numPoint: int
+
+    Returns
+    -------
+    pd.DataFrame
+        index: run
+        columns: molecule
+        values: peak frequency
+    """
+    factors = list(designDF.columns)
+    molecules = doe.getMolecules(model, molecule)
+    with BatchSimulator(model, startTime=startTime, endTime=endTime,
+          numPoint=numPoint, molecules=molecules,
+          numProcess=numProcess) as simulator:
+        valueArr = toParameterValues(designDF,
+              simulator.getParameterValues(factors))
+        arr = simulator.simulate(factors, valueArr)
+    frequencyArr = spectral.calculatePeakFrequencies(arr, endTime)
+    return pd.DataFrame(frequencyArr, index=designDF.index, columns=molecules)
+
+
+############### EFFECTS ###################
+def _makeTermName(factors):
+    return TERM_SEPARATOR.join(factors)
+
+def calculateEffects(designDF, responseDF, maxOrder=2):
+    """
+    Calculates the effects of an n-way ANOVA with interactions up to maxOrder.
+    Levels are the distinct values of a factor. Effects are defined
+    recursively: the effect of a term for a cell is the mean response of
+    the cell minus mu and the effects of all lower order terms contained
+    in the term. For balanced designs (e.g., full factorial), these are
+    the usual ANOVA estimates.
+
+    Parameters
+    ----------
+    designDF: pd.DataFrame
+        index: run
+        columns: factors
+    responseDF: pd.DataFrame/pd.Series
+        index: run
+        columns: responses
+    maxOrder: int
+        largest number of factors in an interaction
+
+    Returns
+    -------
+    pd.Series: mu
+        index: response
+    dict: effects
+        key: term (factor or factors separated by ":")
+        value: pd.DataFrame
+            index: levels of the factors in the term
+            columns: responses
+    pd.DataFrame: ANOVA table
+        index: term
+        columns: dof, sum of squares for each response
+    """
+    if isinstance(responseDF, pd.Series):
+        responseDF = responseDF.to_frame()
+    factors = list(designDF.columns)
+    yArr = responseDF.loc[designDF.index].to_numpy(dtype=float)
+    if len(yArr) == 0:
+        raise ValueError("No runs in the design.")
+    mu = np.mean(yArr, axis=0)
+    # Code the levels of each factor
+    levelDct = {}
+    codeDct = {}
+    for factor in factors:
+        levelDct[factor], codeDct[factor] = np.unique(
+              designDF[factor].to_numpy(), return_inverse=True)
+    # Effects for each run. key: tuple of factors, value: np.array (runs, responses)
+    runEffectDct = {}
+    effectDct = {}
+    anovaDct = {}
+    for order in range(1, maxOrder + 1):
+        for term in itertools.combinations(factors, order):
+            dims = [len(levelDct[f]) for f in term]
+            cellArr = np.ravel_multi_index([codeDct[f] for f in term], dims)
+            numCell = int(np.prod(dims))
+            counts = np.bincount(cellArr, minlength=numCell)
+            sums = np.zeros((numCell, yArr.shape[1]))
+            np.add.at(sums, cellArr, yArr)
+            runEffectArr = sums[cellArr]/counts[cellArr, np.newaxis] - mu
+            for subOrder in range(1, order):
+                for subTerm in itertools.combinations(term, subOrder):
+                    runEffectArr = runEffectArr - runEffectDct[subTerm]
+            runEffectDct[term] = runEffectArr
+            # Effects for the cells that are present
+            cellEffects = np.zeros((numCell, yArr.shape[1]))
+            np.add.at(cellEffects, cellArr, runEffectArr)
+            presentCells = np.nonzero(counts)[0]
+            cellEffects = cellEffects[presentCells]/counts[presentCells, np.newaxis]
+            levelIdxs = np.unravel_index(presentCells, dims)
+            levelLists = [levelDct[f][i] for f, i in zip(term, levelIdxs)]
+            if order == 1:
+                index = pd.Index(levelLists[0], name=term[0])
+            else:
+                index = pd.MultiIndex.from_arrays(levelLists, names=list(term))
+            termName = _makeTermName(term)
+            effectDct[termName] = pd.DataFrame(cellEffects, index=index,
+                  columns=responseDF.columns)
+            dof = int(np.prod([d - 1 for d in dims]))
+            anovaDct[termName] = [dof] + list(np.sum(runEffectArr**2, axis=0))
+    anovaDF = pd.DataFrame.from_dict(anovaDct, orient="index",
+          columns=[DOF] + list(responseDF.columns))
+    anovaDF.index.name = TERM
+    muSer = pd.Series(mu, index=responseDF.columns)
+    return muSer, effectDct, anovaDF
+
+def estimateLinearEffects(designDF, responseDF, isInteraction=True):
+    """
+    Estimates effects by least squares regression on coded factor values
+    in [-1, 1]. Suited to space-filling designs in which levels are not
+    repeated.
+
+    Parameters
+    ----------
+    designDF: pd.DataFrame
+    responseDF: pd.DataFrame/pd.Series
+    isInteraction: bool
+        include two-way interactions
+
+    Returns
+    -------
+    pd.DataFrame
+        index: term (intercept, factor, factor:factor)
+        columns: responses
+        values: change in response from the center to the edge of the design
+    """
+    if isinstance(responseDF, pd.Series):
+        responseDF = responseDF.to_frame()
+    factors = list(designDF.columns)
+    arr = designDF.to_numpy(dtype=float)
+    centers = (arr.max(axis=0) + arr.min(axis=0))/2
+    halfRanges = (arr.max(axis=0) - arr.min(axis=0))/2
+    halfRanges[halfRanges == 0] = 1
+    codedArr = (arr - centers)/halfRanges
+    columns = [np.ones(len(arr))] + [codedArr[:, n] for n in range(len(factors))]
+    terms = [INTERCEPT] + factors
+    if isInteraction:
+        for idx1, idx2 in itertools.combinations(range(len(factors)), 2):
+            columns.append(codedArr[:, idx1]*codedArr[:, idx2])
+            terms.append(_makeTermName([factors[idx1], factors[idx2]]))
+    xArr = np.transpose(np.array(columns))
+    yArr = responseDF.loc[designDF.index].to_numpy(dtype=float)
+    isValid = np.all(np.isfinite(yArr), axis=1)
+    coefArr, _, _, _ = np.linalg.lstsq(xArr[isValid], yArr[isValid], rcond=None)
+    df = pd.DataFrame(coefArr, index=terms, columns=responseDF.columns)
+    df.index.name = TERM
+    return df
@@ -0,0 +1,153 @@
+"""
+Differential evolution with an extension point for evaluating trials.
+
+scipy.optimize.differential_evolution evaluates every trial vector with
+the objective function. minimize implements the same algorithm
+(best1bin strategy, dithered mutation, binomial crossover, deferred
+updating of the population), but the trials of a generation are
+evaluated together by a function that also receives the energy of the
+parent of each trial:
+
+    evaluateFunction(trialArr, parentEnergies) -> energies
+
+A trial replaces its parent only if its energy is smaller, so an
+evaluation function can skip trials that are not promising (e.g., by
+screening them with a surrogate model) or stop a simulation once it is
+worse than the parent, returning np.inf for those trials.
+
+    result = minimize(bounds, function=objective, seed=0)
+    result = minimize(bounds, evaluateFunction=surrogate.evaluate)
+"""
+
+import collections
+
+import numpy as np
+from scipy.stats import qmc
+
+# Result of minimize
+#   x: np.array (best parameter values)
+#   fun: float (energy of x)
+#   population: np.array (members, parameters)
+#   populationEnergies: np.array (members)
+#   numGeneration: int
+#   numEvaluation: int (trials passed to the evaluation function)
+#   isConverged: bool
+DEResult = collections.namedtuple("DEResult",
+      "x fun population populationEnergies numGeneration numEvaluation isConverged")
+
+
+def makeEvaluateFunction(function):
+    """
+    Evaluation function that calls an objective for every trial.
+
+    Parameters
+    ----------
+    function: Function
+        parameters: np.array (parameters)
+        returns: float
+
+    Returns
+    -------
+    Function
+        parameters: np.array (trials, parameters), np.array (trials)
+        returns: np.array (trials)
+    """
+    def evaluate(trialArr, parentEnergies):
+        return np.array([function(v) for v in trialArr], dtype=float)
+    return evaluate
+
+def minimize(bounds, function=None, evaluateFunction=None, popsize=15,
+      mutation=(0.5, 1.0), recombination=0.7, maxGeneration=1000, tol=0.01,
+      atol=0.0, init=None, seed=None, callback=None):
+    """
+    Minimizes a function with differential evolution.
+
+    Parameters
+    ----------
+    bounds: list-(float, float)
+    function: Function
+        objective of one parameter vector (if evaluateFunction is None)
+    evaluateFunction: Function
+        parameters: np.array (trials, parameters),
+            np.array (trials) energies of the parents (np.inf for the
+            initial population)
+        returns: np.array (trials) energies; np.inf rejects a trial
+    popsize: int
+        members per parameter
+    mutation: float/(float, float)
+        differential weight; a range is dithered in each generation
+    recombination: float
+        crossover probability
+    maxGeneration: int
+    tol: float
+        relative tolerance of the standard deviation of the energies
+    atol: float
+        absolute tolerance of the standard deviation of the energies
+    init: np.array (members, parameters)
+        initial population (default: Latin hypercube sample)
+    seed: int/np.random.Generator
+    callback: Function
+        parameters: generation, population, energies
+        returns: True to stop
+
+    Returns
+    -------
+    DEResult
+    """
+    if evaluateFunction is None:
+        if function is None:
+            raise ValueError("Must provide function or evaluateFunction.")
+        evaluateFunction = makeEvaluateFunction(function)
+    rng = np.random.default_rng(seed)
+    bounds = np.array(bounds, dtype=float)
+    lowers, uppers = bounds[:, 0], bounds[:, 1]
+    numParameter = len(bounds)
+    # Members are represented in the unit cube
+    def unscale(arr):
+        return lowers + arr*(uppers - lowers)
+    if init is None:
+        numMember = max(5, popsize*numParameter)
+        sampler = qmc.LatinHypercube(d=numParameter, seed=rng)
+        population = sampler.random(numMember)
+    else:
+        population = np.clip((np.asarray(init, dtype=float) - lowers)
+              /(uppers - lowers), 0, 1)
+        numMember = len(population)
+    energies = np.asarray(evaluateFunction(unscale(population),
+          np.repeat(np.inf, numMember)), dtype=float)
+    numEvaluation = numMember
+    isConverged = False
+    generation = 0
+    for generation in range(1, maxGeneration + 1):
+        # best1bin trials
+        bestIdx = np.argmin(energies)
+        weight = mutation if np.isscalar(mutation) else rng.uniform(*mutation)
+        idxArr = np.array([rng.choice(np.delete(np.arange(numMember), i), 2,
+              replace=False) for i in range(numMember)])
+        mutantArr = population[bestIdx] + weight*(population[idxArr[:, 0]]
+              - population[idxArr[:, 1]])
+        isCrossover = rng.random((numMember, numParameter)) < recombination
+        isCrossover[np.arange(numMember), rng.integers(0, numParameter,
+              numMember)] = True
+        trialArr = np.where(isCrossover, mutantArr, population)
+        # Replace values outside of the bounds with random values
+        isOutside = (trialArr < 0) | (trialArr > 1)
+        trialArr[isOutside] = rng.random(np.sum(isOutside))
+        trialEnergies = np.asarray(evaluateFunction(unscale(trialArr),
+              energies.copy()), dtype=float)
+        numEvaluation += numMember
+        isBetter = trialEnergies < energies
+        population[isBetter] = trialArr[isBetter]
+        energies[isBetter] = trialEnergies[isBetter]
+        if (callback is not None) and callback(generation, unscale(population),
+              energies):
+            break
+        if np.all(np.isfinite(energies)) and (np.std(energies)
+              <= atol + tol*np.abs(np.mean(energies))):
+            isConverged = True
+            break
+    bestIdx = np.argmin(energies)
+    return DEResult(x=unscale(population[bestIdx]), fun=float(energies[bestIdx]),
+          population=unscale(population), populationEnergies=energies,
+          numGeneration=generation, numEvaluation=numEvaluation,
+          isConverged=isConverged)
@@ -0,0 +1,177 @@
+"""
+One-way design of experiments (1WD) for oscillating models.
+
+The codes follow the Design-of-Experiments notebook. Frequency responses
+for any number of molecules are calculated from the same simulations so
+that each factor and level is simulated only once.
+"""
+
+from src import spectral
+
+import numpy as np
+import pandas as pd
+import tellurium as te
+
+# Constants
+SMALLEST_PCT = -100  # Smallest percent change in a parameter value
+START = 0
+END = 5
+NUMPT = 300  # number of points to simulate
+WOLF_FACTORS = [
+  "J0_inputFlux", "J1_k1", "J1_Ki", "J1_n", "J2_k", "J3_k", "J4_kg", "J4_kp",
+ "J4_ka", "J4_kk", "J5_k", "J6_k", "J7_k", "J8_k1", "J8_k2", "J9_k", "J10_k",
+]
+MOLECULE = "molecule"
+FACTOR = "factor"
+
+
+def _getRoadrunner(model):
+    if isinstance(model, str):
+        return te.loada(model)
+    return model
+
+def getMolecules(model, molecule):
+    """
+    Determines the molecules for which responses are calculated.
+
+    Parameters
+    ----------
+    model: str/ExtendedRoadRunner
+    molecule: str/list-str/None
+        None is all floating species
+
+    Returns
+    -------
+    list-str
+    """
+    if molecule is None:
+        return list(_getRoadrunner(model).getFloatingSpeciesIds())
+    if isinstance(molecule, str):
+        return [molecule]
+    return list(molecule)
+
+def runSimulations(model, parameter, percents):
+    """
+    Runs experiments for the fractional changes in parameter values.
+
+    Parameters
+    ----------
+    model: str/ExtendedRoadRunner
+    parameter: str
+    percents: list-float
+        list of percent change in values
+          (smallest value is -100)
+
+    Returns
+    -------
+    dict: key=pct, value=data
+    """
+    roadrunner = _getRoadrunner(model)
+    if not parameter in roadrunner.keys():
+        raise ValueError("Unknown parameter name: %s" % parameter)
+    roadrunner.resetAll()
+    baseValue = roadrunner[parameter]
+    resultDct = {}
+    for percent in percents:
+        roadrunner.resetAll()
+        percent = max(percent, SMALLEST_PCT)
+        frac = 0.01*percent
+        roadrunner[parameter] = baseValue*(1 + frac)
+        resultDct[percent] = roadrunner.simulate(START, END, NUMPT)
+    roadrunner.resetAll()
+    return resultDct
+
+def calculateFrequencyResponses(model, factors=WOLF_FACTORS, percents=[0],
+      molecule="Glucose"):
+    """
+    Calculates the frequency responses for a 1WD for the factors and
+    levels expressed as percents.
+
+    Parameters
+    ----------
+    model: str/ExtendedRoadRunner
+    factors: list-str (kinetic constants)
+    percents: list-float
+    molecule: str/list-str/None
+        molecules for which responses are calculated; None is all
+        floating species
+
+    Returns
+    -------
+    pd.DataFrame
+       rows: factor (index is (molecule, factor) if molecule is not a str)
+       columns: percents
+       values: frequency
+    """
+    roadrunner = _getRoadrunner(model)
+    molecules = getMolecules(roadrunner, molecule)
+    levels = [max(p, SMALLEST_PCT) for p in percents]
+    # Responses indexed by factor, level, molecule
+    responseArr = np.zeros((len(factors), len(levels), len(molecules)))
+    for idx, factor in enumerate(factors):
+        dataDct = runSimulations(roadrunner, factor, levels)
+        arr, times, _ = spectral.stackSimulations(
+              [dataDct[p] for p in levels], molecules=molecules)
+        responseArr[idx, :, :] = spectral.calculatePeakFrequencies(arr, times[-1])
+    if isinstance(molecule, str):
+        return pd.DataFrame(responseArr[:, :, 0], index=factors, columns=percents)
+    # Rows are ordered by molecule and then factor
+    values = np.transpose(responseArr, (2, 0, 1)).reshape(
+          len(molecules)*len(factors), len(levels))
+    index = pd.MultiIndex.from_product([molecules, factors],
+          names=[MOLECULE, FACTOR])
+    return pd.DataFrame(values, index=index, columns=percents)
+
+def calculateMuAlpha(responseDF):
+    """
+    Calculates the design of experiment parameters for a 1-Way Design.
+    Assumes that there is a level of 0.
+
+    Parameters
+    ----------
+    responseDF: pd.DataFrame
+        column: levels
+        index: factors (or (molecule, factor))
+        values: y_i,k_i
+
+    Returns
+    -------
+    float: Mu (pd.Series indexed by molecule if there are molecules)
+    pd.DataFrame
+        columns: levels (k_i)
+        index: factors (i) (or (molecule, factor))
+        values: \\alpha_i,k_i
+    """
+    if isinstance(responseDF.index, pd.MultiIndex):
+        # All factors are at baseline for the level 0
+        mu = responseDF[0].groupby(level=MOLECULE, sort=False).first()
+        muArr = mu.loc[responseDF.index.get_level_values(MOLECULE)].to_numpy()
+        resultDF = responseDF.sub(muArr, axis=0)
+        return mu, resultDF
+    mu = responseDF[0].iloc[0]
+    resultDF = responseDF - mu
+    return mu, resultDF
+
+def runStudy(model, factors=WOLF_FACTORS, percents=[0], molecule="Glucose"):
+    """
+    Runs a 1WD for the factors and levels expressed as percents.
+
+    Parameters
+    ----------
+    model: str/ExtendedRoadRunner
+    factors: list-str (kinetic constants)
+    percents: list-float
+    molecule: str/list-str/None
+        None is all floating species
+
+    Returns
+    -------
+    float: mu (pd.Series indexed by molecule if molecule is not a str)
+    pd.DataFrame: alpha_i, k_i
+       rows: factor (or (molecule, factor))
+       columns: percents
+       values: frequency
+    """
+    df = calculateFrequencyResponses(model, factors=factors, percents=percents,
+                                     molecule=molecule)
+    return calculateMuAlpha(df)
@@ -0,0 +1,324 @@
+"""
+Objective evaluation that stops simulations of hopeless trials.
+
+In differential evolution a trial replaces its parent only if its SSR is
+smaller than the SSR of the parent. The SSR only increases as more
+observation times are compared, so a trial can be rejected as soon as
+the SSR of a prefix of the observations exceeds the SSR of its parent.
+
+ChunkedSSRObjective advances the simulation from one observation time
+to the next with RoadRunner.oneStep, which continues the integration
+without reinitializing CVODE. Every checkInterval observation times it
+adds the squared residuals to the partial SSR and stops if the partial
+SSR exceeds the threshold. The partial SSR (a lower bound of the SSR)
+is returned for a stopped simulation, so the trial is rejected as it
+would be with the full simulation. Without a threshold the observation
+times are simulated in one call of RoadRunner.simulate, which is faster.
+
+The threshold is passed by the optimizer or taken from the attribute
+threshold:
+  fitEarlyAbort runs differential evolution (differentialEvolution.minimize)
+    with the energy of the parent of each trial as the threshold.
+  minimizeScipy runs scipy.optimize.differential_evolution with the
+    objective as the function to minimize (as functionToMinimize in the
+    Parameter-Fitting notebook). After each generation, the threshold is
+    set to the largest energy of the population, which no trial of the
+    next generation can replace if its SSR is larger.
+Fits by least squares (e.g., SBstoat.ModelFitter with lmfit) need all
+residuals of every evaluation and so cannot stop simulations.
+compareEarlyAbort fits with and without stopping simulations.
+
+Stopping simulations is only faster if trials are rejected after few
+observation times, since stepping through the observation times from
+Python costs more than a single simulation of all of them. It does not
+pay for Wolf, whose trials are rejected late: fitting J1_k1 and J9_k
+(popsize=10, 560 simulations) compared 88% of the observation times and
+took 5.6 s of integration vs 4.6 s with complete simulations, and
+minimizeScipy took 6.2 s vs 5.7 s. The fits are the same.
+
+    result = fitEarlyAbort(WOLF_MODEL, WOLF_DF, ["J1_k1", "J9_k"],
+          bounds=[(100, 1000), (10, 50)])
+    result.numAborted, result.integrationSeconds
+    objective = ChunkedSSRObjective(WOLF_MODEL, WOLF_DF, ["J1_k1", "J9_k"])
+    scipyResult = minimizeScipy(objective, [(100, 1000), (10, 50)])
+"""
+
+from src import differentialEvolution
+from src.multiFidelity import SSRObjective, FAILED_SSR
+
+import collections
+import time
+
+import numpy as np
+import pandas as pd
+from scipy import optimize
+
+# Constants
+CHECK_INTERVAL = 10  # Observation times between checks of the threshold
+NUM_SIMULATION = "numSimulation"
+NUM_ABORTED = "numAborted"
+SIMULATED_FRACTION = "simulatedFraction"
+INTEGRATION_SECONDS = "integrationSeconds"
+SSR = "ssr"
+SECONDS = "seconds"
+METHOD = "method"
+EARLY_ABORT = "earlyAbort"
+FULL_SIMULATION = "fullSimulation"
+
+# Result of a fit
+#   valueDct: dict (key: parameter name, value: fitted value)
+#   ssr: float
+#   numGeneration: int
+#   numSimulation: int
+#   numAborted: int (simulations stopped before the last observation)
+#   simulatedFraction: float (fraction of observation times simulated)
+#   integrationSeconds: float
+EarlyAbortResult = collections.namedtuple("EarlyAbortResult",
+      "valueDct ssr numGeneration numSimulation numAborted simulatedFraction "
+      "integrationSeconds")
+
+
+class ChunkedSSRObjective(SSRObjective):
+    """
+    Sum of squared residuals accumulated over the time chunks between
+    observations with a threshold at which the simulation stops.
+    """
+
+    def __init__(self, model, observedDF, parameterNames, columns=None,
+          checkInterval=CHECK_INTERVAL):
+        """
+        Parameters
+        ----------
+        model: str/ExtendedRoadRunner
+        observedDF: pd.DataFrame
+            columns: time, floating species
+        parameterNames: list-str
+        columns: list-str
+            observed columns that are fitted (default: all but time)
+        checkInterval: int
+            observation times between checks of the threshold
+        """
+        self.checkInterval = checkInterval
+        self.threshold = np.inf  # Used if no threshold is passed
+        self.numAborted = 0
+        self.numTime = 0  # observation times compared
+        super().__init__(model, observedDF, parameterNames, columns=columns)
+
+    @property
+    def simulatedFraction(self):
+        """Fraction of the observation times of all simulations compared."""
+        if self.numSimulation == 0:
+            return 0.0
+        return self.numTime/(self.numSimulation*len(self._idxs))
+
+    def __call__(self, values, threshold=None):
+        """
+        Parameters
+        ----------
+        values: list-float
+        threshold: float
+            the simulation stops when the partial SSR exceeds this value
+            (default: self.threshold)
+
+        Returns
+        -------
+        float
+            SSR or partial SSR that exceeds threshold
+        """
+        if threshold is None:
+            threshold = self.threshold
+        if np.isinf(threshold) or (len(self._idxs) < 2):
+            self.numTime += len(self._idxs)
+            return super().__call__(values)
+        roadrunner = self.roadrunner
+        roadrunner.resetAll()
+        for name, value in zip(self.parameterNames, values):
+            roadrunner[name] = float(value)
+        roadrunner.timeCourseSelections = self.selections[1:]
+        # Scale to the number of observation times
+        scale = len(self.times)/len(self._idxs)
+        times = self.times[self._idxs]
+        numTime = len(times)
+        arr = np.zeros((numTime, len(self.columns)))
+        ssr = 0.0
+        startSeconds = time.time()
+        self.numSimulation += 1
+        try:
+            arr[0] = roadrunner.getSelectedValues()
+            start = 0  # First time whose residuals are not in ssr
+            for num in range(1, numTime):
+                # Only the first step initializes the integrator
+                roadrunner.oneStep(times[num - 1], times[num] - times[num - 1],
+                      reset=(num == 1))
+                arr[num] = roadrunner.getSelectedValues()
+                if (num - start + 1 < self.checkInterval)  \
+                      and (num < numTime - 1):
+                    continue
+                end = num + 1
+                ssr += scale*np.sum((self.observedArr[self._idxs[start:end]]
+                      - arr[start:end])**2)
+                self.numTime += end - start
+                start = end
+                if not np.isfinite(ssr):
+                    ssr = FAILED_SSR
+                    break
+                if (ssr > threshold) and (end < numTime):
+                    self.numAborted += 1
+                    break
+        except RuntimeError:
+            ssr = FAILED_SSR
+        self.integrationSeconds += time.time() - startSeconds
+        return float(ssr)
+
+    def makeEvaluateFunction(self):
+        """
+        Evaluation function for differentialEvolution.minimize that uses
+        the energy of the parent of a trial as its threshold.
+
+        Returns
+        -------
+        Function
+            parameters: np.array (trials, parameters), np.array (trials)
+            returns: np.array (trials)
+        """
+        def evaluate(trialArr, parentEnergies):
+            return np.array([self(v, threshold=e)
+                  for v, e in zip(trialArr, parentEnergies)])
+        return evaluate
+
+    def makeScipyCallback(self):
+        """
+        Callback for scipy.optimize.differential_evolution that sets the
+        threshold to the largest energy of the population. Energies of
+        the population do not increase, so a trial with a larger SSR is
+        rejected.
+
+        Returns
+        -------
+        Function
+            parameters: intermediate_result (OptimizeResult)
+        """
+        def callback(intermediate_result):
+            self.threshold = float(np.max(
+                  intermediate_result.population_energies))
+        return callback
+
+
+def minimizeScipy(objective, bounds, **kwargs):
+    """
+    Minimizes the SSR with scipy.optimize.differential_evolution, which
+    stops the simulations of trials that cannot replace a member of the
+    population. The objective must be evaluated in the current process
+    (workers=1).
+
+    Parameters
+    ----------
+    objective: ChunkedSSRObjective
+    bounds: list-(float, float)
+    kwargs: dict
+        optional arguments for scipy.optimize.differential_evolution
+        other than callback; polish is done with complete simulations
+
+    Returns
+    -------
+    OptimizeResult
+    """
+    polish = kwargs.pop("polish", True)
+    objective.threshold = np.inf
+    try:
+        result = optimize.differential_evolution(objective, bounds,
+              callback=objective.makeScipyCallback(), polish=False, **kwargs)
+    finally:
+        objective.threshold = np.inf
+    if polish:
+        polishResult = optimize.minimize(objective, result.x,
+              method="L-BFGS-B", bounds=bounds)
+        if polishResult.fun < result.fun:
+            result.x = polishResult.x
+            result.fun = polishResult.fun
+        result.nfev += polishResult.nfev
+    return result
+
+
+def fitEarlyAbort(model, observedDF, parameterNames, bounds,
+      isEarlyAbort=True, popsize=15, maxGeneration=1000,
+      tol=0.01, seed=None, columns=None):
+    """
+    Fits parameters with differential evolution that stops the
+    simulations of trials that are worse than their parents.
+
+    Parameters
+    ----------
+    model: str/ExtendedRoadRunner
+    observedDF: pd.DataFrame
+        columns: time, floating species
+    parameterNames: list-str
+    bounds: list-(float, float)
+    isEarlyAbort: bool
+        stop simulations (otherwise, all simulations are complete)
+    popsize: int
+    maxGeneration: int
+    tol: float
+    seed: int
+    columns: list-str
+        observed columns that are fitted
+
+    Returns
+    -------
+    EarlyAbortResult
+    """
+    objective = ChunkedSSRObjective(model, observedDF, parameterNames,
+          columns=columns)
+    if isEarlyAbort:
+        evaluateFunction = objective.makeEvaluateFunction()
+    else:
+        evaluateFunction = differentialEvolution.makeEvaluateFunction(objective)
+    result = differentialEvolution.minimize(bounds,
+          evaluateFunction=evaluateFunction, popsize=popsize,
+          maxGeneration=maxGeneration, tol=tol, seed=seed)
+    return EarlyAbortResult(
+          valueDct=dict(zip(parameterNames, result.x)),
+          ssr=result.fun,
+          numGeneration=result.numGeneration,
+          numSimulation=objective.numSimulation,
+          numAborted=objective.numAborted,
+          simulatedFraction=objective.simulatedFraction,
+          integrationSeconds=objective.integrationSeconds)
+
+
+def compareEarlyAbort(model, observedDF, parameterNames, bounds, **kwargs):
+    """
+    Fits parameters with and without stopping simulations.
+
+    Parameters
+    ----------
+    model: str/ExtendedRoadRunner
+    observedDF: pd.DataFrame
+    parameterNames: list-str
+    bounds: list-(float, float)
+    kwargs: dict
+        optional arguments for fitEarlyAbort
+
+    Returns
+    -------
+    pd.DataFrame
+        index: method (earlyAbort, fullSimulation)
+        columns: integrationSeconds, numSimulation, numAborted,
+            simulatedFraction, seconds, ssr, parameter names
+    """
+    resultDcts = []
+    for method, isEarlyAbort in [(EARLY_ABORT, True),
+          (FULL_SIMULATION, False)]:
+        startSeconds = time.time()
+        result = fitEarlyAbort(model, observedDF, parameterNames, bounds,
+              isEarlyAbort=isEarlyAbort, **kwargs)
+        resultDct = {METHOD: method,
+              INTEGRATION_SECONDS: result.integrationSeconds,
+              NUM_SIMULATION: result.numSimulation,
+              NUM_ABORTED: result.numAborted,
+              SIMULATED_FRACTION: result.simulatedFraction,
+              SECONDS: time.time() - startSeconds,
+              SSR: result.ssr}
+        resultDct.update(result.valueDct)
+        resultDcts.append(resultDct)
+    return pd.DataFrame(resultDcts).set_index(METHOD)
@@ -0,0 +1,465 @@
+"""
+Affine-invariant ensemble MCMC for the posterior of parameters.
+
+EnsembleSampler implements the stretch move of Goodman and Weare (the
+algorithm of emcee). The walkers are split into two halves, and the
+walkers of one half propose moves along lines through walkers of the
+other half. The proposals of a half are independent, and so their
+log posteriors are evaluated together in a pool of worker processes.
+Each worker keeps a loaded objective (landscape.getObjective).
+
+Parameters are sampled in the coordinates of reparameterization.
+ParameterSpace, so parameters with positive bounds have log-uniform
+priors within their bounds. The likelihood assumes normally distributed
+errors. If the standard deviation sigma is not given, it is integrated
+out with a Jeffreys prior, and the log likelihood is -n/2*log(SSR) for
+n observations.
+
+Each iteration is appended to a ResultStore as soon as it is done. A
+sampler constructed with the path of an existing store resumes from the
+last stored iteration. Random numbers of an iteration depend only on
+the seed and the iteration, and the seed is kept in the store, so a
+resumed run gives the same chain as an uninterrupted run. The store also
+keeps a hash of the model, data, search space and sampler settings, and
+a sampler with different settings does not resume from it.
+
+    with EnsembleSampler(LINEAR_PATHWAY_MODEL, LINEAR_PATHWAY_DF,
+          {"k1": 1, "k2": 2}, path="chain.db", numProcess=4) as sampler:
+        sampler.run(1000)
+        sampler.getDiagnosticDF(discard=200)  # autocorrelation, rhat
+        sampleDF = sampler.getSampleDF(discard=200)
+"""
+
+from src.landscape import getObjective
+from src.multiFidelity import SSRObjective, FAILED_SSR, TIME, getObservedDF
+from src.reparameterization import ParameterSpace
+from src.resultStore import ResultStore
+from src.sharedData import SharedDataPool
+from src.simulator import getModelString
+
+import hashlib
+import time
+
+import numpy as np
+import pandas as pd
+
+# Constants
+STRETCH_SCALE = 2.0  # Parameter a of the stretch move
+INITIAL_SCALE = 0.01  # Spread of initial walkers in search coordinates
+AUTOCORRELATION_WINDOW = 5  # Window of autocorrelation times (Sokal)
+MIN_ITERATION_PER_TIME = 50  # Iterations per autocorrelation time
+MAX_RHAT = 1.1
+ITERATION_FORMAT = "%08d"
+SETTING = "setting"  # Key of the seed and the setting hash in the store
+SEED = "seed"
+SETTING_KEY = "settingKey"
+POSITIONS = "positions"
+LOG_PROBABILITIES = "logProbabilities"
+NUM_ACCEPTED = "numAccepted"
+SECONDS = "seconds"
+PARAMETER = "parameter"
+MEAN = "mean"
+STD = "std"
+AUTOCORRELATION_TIME = "autocorrelationTime"
+EFFECTIVE_SAMPLE_SIZE = "effectiveSampleSize"
+RHAT = "rhat"
+IS_CONVERGED = "isConverged"
+LOG_PROBABILITY = "logProbability"
+
+
+def _calculateLogProbabilities(objective, space, sigma, searchArr):
+    """
+    Calculates log posteriors in the current process.
+
+    Parameters
+    ----------
+    objective: SSRObjective
+    space: ParameterSpace
+    sigma: float
+        standard deviation of errors (None to integrate it out)
+    searchArr: np.array (walkers, parameters)
+
+    Returns
+    -------
+    np.array (walkers)
+    """
+    numObservation = objective.observedArr.size
+    logProbabilities = np.repeat(-np.inf, len(searchArr))
+    isInside = np.all((searchArr >= space.searchBounds[:, 0])
+          & (searchArr <= space.searchBounds[:, 1]), axis=1)
+    for idx in np.nonzero(isInside)[0]:
+        ssr = objective(space.toValues(searchArr[idx]))
+        if ssr >= FAILED_SSR:
+            continue
+        if sigma is None:
+            logProbabilities[idx] = -numObservation/2*np.log(ssr)
+        else:
+            logProbabilities[idx] = -ssr/(2*sigma**2)
+    return logProbabilities
+
+def _calculateLogProbabilitiesTask(args):
+    """
+    Calculates log posteriors in a worker process.
+
+    Parameters
+    ----------
+    args: tuple
+        modelStr, descriptor, columns, space, sigma, searchArr
+
+    Returns
+    -------
+    np.array (walkers)
+    """
+    modelStr, descriptor, columns, space, sigma, searchArr = args
+    objective = getObjective(modelStr, descriptor, space.names, columns)
+    return _calculateLogProbabilities(objective, space, sigma, searchArr)
+
+def calculateAutocorrelationTime(arr, window=AUTOCORRELATION_WINDOW):
+    """
+    Estimates the integrated autocorrelation time of chains from the mean
+    of the autocorrelation functions of the walkers with the automatic
+    window of Sokal.
+
+    Parameters
+    ----------
+    arr: np.array (iterations, walkers)
+    window: float
+
+    Returns
+    -------
+    float
+    """
+    numIteration = arr.shape[0]
+    centeredArr = arr - np.mean(arr, axis=0)
+    size = 2**int(np.ceil(np.log2(2*numIteration)))
+    fftArr = np.fft.rfft(centeredArr, n=size, axis=0)
+    autocovarianceArr = np.fft.irfft(fftArr*np.conjugate(fftArr), axis=0)
+    autocovarianceArr = autocovarianceArr[:numIteration]
+    autocovariances = np.mean(autocovarianceArr, axis=1)
+    if autocovariances[0] <= 0:
+        return np.nan
+    autocorrelations = autocovariances/autocovariances[0]
+    times = 2*np.cumsum(autocorrelations) - 1
+    isInWindow = np.arange(len(times)) < window*times
+    lag = np.argmin(isInWindow) if not np.all(isInWindow) else len(times) - 1
+    return float(times[lag])
+
+def calculateRhat(arr):
+    """
+    Calculates the potential scale reduction factor of Gelman and Rubin
+    with the walkers as chains.
+
+    Parameters
+    ----------
+    arr: np.array (iterations, walkers)
+
+    Returns
+    -------
+    float
+    """
+    numIteration = arr.shape[0]
+    withinVariance = np.mean(np.var(arr, axis=0, ddof=1))
+    betweenVariance = numIteration*np.var(np.mean(arr, axis=0), ddof=1)
+    if withinVariance == 0:
+        return np.nan
+    variance = (numIteration - 1)/numIteration*withinVariance  \
+          + betweenVariance/numIteration
+    return float(np.sqrt(variance/withinVariance))
+
+
+class EnsembleSampler(SharedDataPool):
+    """
+    Samples the posterior of parameters with an ensemble of walkers.
+    """
+
+    def __init__(self, model, observedData, valueDct, boundsDct=None,
+          columns=None, numWalker=None, sigma=None, path=None, numProcess=1,
+          seed=None, initialScale=INITIAL_SCALE):
+        """
+        Parameters
+        ----------
+        model: str/ExtendedRoadRunner
+        observedData: pd.DataFrame/NamedTimeseries/str
+            str: path to CSV file
+        valueDct: dict
+            key: parameter name, value: initial value (e.g., fitted value)
+        boundsDct: dict
+            key: parameter name, value: (lower, upper) of its prior
+            default: value/100, value*100 (reparameterization.BOUND_FACTOR)
+        columns: list-str
+            observed columns that are fitted (default: all but time)
+        numWalker: int
+            even number of walkers (default: 4 per parameter)
+        sigma: float
+            standard deviation of errors (default: integrated out)
+        path: str
+            path to the SQLite file of the ResultStore of the chain;
+            the chain resumes from an existing store
+        numProcess: int
+            number of worker processes; 1 runs in the current process
+        seed: int
+            default: the seed of the store or a random seed
+        initialScale: float
+            standard deviation of the initial walkers around valueDct in
+            search coordinates (decades for parameters in log space)
+        """
+        self.modelStr = getModelString(model)
+        self.observedDF = getObservedDF(observedData).astype(float)
+        if columns is None:
+            columns = [c for c in self.observedDF.columns if c != TIME]
+        self.columns = list(columns)
+        self.space = ParameterSpace.fromValues(valueDct, boundsDct=boundsDct)
+        numParameter = len(self.space.names)
+        if numWalker is None:
+            numWalker = 4*numParameter
+        if (numWalker % 2 != 0) or (numWalker < 2*numParameter):
+            raise ValueError(
+                  "numWalker must be even and at least twice the parameters.")
+        self.numWalker = numWalker
+        self.sigma = sigma
+        self.numProcess = numProcess
+        self.seed = seed
+        self.initialScale = initialScale
+        self.initialArr = self.space.toSearch(list(valueDct.values()))
+        self.settingKey = self._makeSettingKey()
+        self.store = None if path is None else ResultStore(path)
+        self.objective = None
+        # Chain in search coordinates
+        self.positionArrs = []  # np.array (walkers, parameters)
+        self.logProbabilityArrs = []  # np.array (walkers)
+        self.numAccepted = 0
+        self.seconds = 0.0
+        if self.store is not None:
+            self._load()
+        if self.seed is None:
+            self.seed = np.random.SeedSequence().entropy
+        if (self.store is not None) and (not self.store.has(SETTING)):
+            self.store.append(SETTING,
+                  {SEED: self.seed, SETTING_KEY: self.settingKey})
+
+    def _makeSettingKey(self):
+        """
+        Identifies the model, data, search space and settings of the
+        sampler so that a stored chain is only resumed for the same ones.
+
+        Returns
+        -------
+        str
+        """
+        hasher = hashlib.md5()
+        hasher.update(self.modelStr.encode())
+        hasher.update(str(list(self.observedDF.columns)).encode())
+        hasher.update(np.ascontiguousarray(self.observedDF.to_numpy(),
+              dtype=float).tobytes())
+        hasher.update(str(self.columns).encode())
+        hasher.update(str(self.space.names).encode())
+        hasher.update(np.ascontiguousarray(self.space.bounds,
+              dtype=float).tobytes())
+        hasher.update(np.ascontiguousarray(self.space.isLogs,
+              dtype=bool).tobytes())
+        hasher.update(np.ascontiguousarray(self.initialArr,
+              dtype=float).tobytes())
+        hasher.update(str((self.numWalker, self.sigma,
+              self.initialScale)).encode())
+        return hasher.hexdigest()
+
+    def _load(self):
+        """Reads the seed and the chain of the store."""
+        if self.store.has(SETTING):
+            dct = self.store.get(SETTING)
+            if dct[SETTING_KEY] != self.settingKey:
+                raise ValueError(
+                      "Stored chain has a different model, data or settings.")
+            if (self.seed is not None) and (self.seed != dct[SEED]):
+                raise ValueError("Stored chain has a different seed.")
+            self.seed = dct[SEED]
+        for key in self.store.getKeys():
+            if key == SETTING:
+                continue
+            dct = self.store.get(key)
+            positionArr = np.array(dct[POSITIONS], dtype=float)
+            if positionArr.shape != (self.numWalker, len(self.space.names)):
+                raise ValueError(
+                      "Stored chain has different walkers or parameters.")
+            self.positionArrs.append(positionArr)
+            self.logProbabilityArrs.append(np.array(dct[LOG_PROBABILITIES],
+                  dtype=float))
+            self.numAccepted += dct[NUM_ACCEPTED]
+            self.seconds += dct[SECONDS]
+
+    @property
+    def numIteration(self):
+        """Iterations after the initial positions."""
+        return max(len(self.positionArrs) - 1, 0)
+
+    @property
+    def acceptanceFraction(self):
+        if self.numIteration == 0:
+            return np.nan
+        return self.numAccepted/(self.numIteration*self.numWalker)
+
+    def calculateLogProbabilities(self, searchArr):
+        """
+        Calculates log posteriors (up to a constant).
+
+        Parameters
+        ----------
+        searchArr: np.array (walkers, parameters)
+            search coordinates
+
+        Returns
+        -------
+        np.array (walkers)
+        """
+        searchArr = np.atleast_2d(searchArr)
+        if self.numProcess == 1:
+            if self.objective is None:
+                self.objective = SSRObjective(self.modelStr, self.observedDF,
+                      self.space.names, columns=self.columns)
+            return _calculateLogProbabilities(self.objective, self.space,
+                  self.sigma, searchArr)
+        pool = self._getPool()
+        numChunk = min(len(searchArr), self.numProcess)
+        argss = [(self.modelStr, self._descriptor, self.columns, self.space,
+              self.sigma, c) for c in np.array_split(searchArr, numChunk)]
+        return np.concatenate(pool.map(_calculateLogProbabilitiesTask, argss))
+
+    def _append(self, positionArr, logProbabilityArr, numAccepted, seconds):
+        if self.store is not None:
+            self.store.append(ITERATION_FORMAT % len(self.positionArrs),
+                  {POSITIONS: positionArr, LOG_PROBABILITIES: logProbabilityArr,
+                  NUM_ACCEPTED: numAccepted, SECONDS: seconds})
+        self.positionArrs.append(positionArr)
+        self.logProbabilityArrs.append(logProbabilityArr)
+        self.numAccepted += numAccepted
+        self.seconds += seconds
+
+    def _initialize(self):
+        """Places the walkers around the initial values."""
+        startSeconds = time.time()
+        rng = np.random.default_rng([self.seed, 0])
+        lowers, uppers = self.space.searchBounds.T
+        positionArr = np.clip(self.initialArr + self.initialScale
+              *rng.normal(size=(self.numWalker, len(self.initialArr))),
+              lowers, uppers)
+        logProbabilityArr = self.calculateLogProbabilities(positionArr)
+        if not np.any(np.isfinite(logProbabilityArr)):
+            raise ValueError("No initial walker has a finite posterior.")
+        self._append(positionArr, logProbabilityArr, 0,
+              time.time() - startSeconds)
+
+    def run(self, numIteration):
+        """
+        Advances the chain. Each iteration is stored when it is done.
+
+        Parameters
+        ----------
+        numIteration: int
+        """
+        if len(self.positionArrs) == 0:
+            self._initialize()
+        numParameter = len(self.space.names)
+        halves = [np.arange(0, self.numWalker//2),
+              np.arange(self.numWalker//2, self.numWalker)]
+        for _ in range(numIteration):
+            startSeconds = time.time()
+            rng = np.random.default_rng([self.seed, len(self.positionArrs)])
+            positionArr = self.positionArrs[-1].copy()
+            logProbabilityArr = self.logProbabilityArrs[-1].copy()
+            numAccepted = 0
+            for num, idxs in enumerate(halves):
+                otherIdxs = halves[1 - num]
+                partnerArr = positionArr[rng.choice(otherIdxs, len(idxs))]
+                # z has density proportional to 1/sqrt(z) on [1/a, a]
+                zs = ((STRETCH_SCALE - 1)*rng.random(len(idxs)) + 1)**2  \
+                      /STRETCH_SCALE
+                proposalArr = partnerArr + zs[:, np.newaxis]  \
+                      *(positionArr[idxs] - partnerArr)
+                proposalLogProbabilities = self.calculateLogProbabilities(
+                      proposalArr)
+                with np.errstate(invalid="ignore"):
+                    logAcceptances = (numParameter - 1)*np.log(zs)  \
+                          + proposalLogProbabilities - logProbabilityArr[idxs]
+                isAccepted = np.log(rng.random(len(idxs))) < logAcceptances
+                positionArr[idxs[isAccepted]] = proposalArr[isAccepted]
+                logProbabilityArr[idxs[isAccepted]] =  \
+                      proposalLogProbabilities[isAccepted]
+                numAccepted += int(np.sum(isAccepted))
+            self._append(positionArr, logProbabilityArr, numAccepted,
+                  time.time() - startSeconds)
+
+    def getChain(self, discard=0):
+        """
+        Provides the values of the parameters of the walkers.
+
+        Parameters
+        ----------
+        discard: int
+            number of initial iterations that are dropped
+
+        Returns
+        -------
+        np.array (iterations, walkers, parameters)
+        """
+        return self.space.toValues(np.array(self.positionArrs[discard:]))
+
+    def getSampleDF(self, discard=0, thin=1):
+        """
+        Provides samples of the posterior.
+
+        Parameters
+        ----------
+        discard: int
+            number of initial iterations that are dropped
+        thin: int
+            every thin-th iteration is used
+
+        Returns
+        -------
+        pd.DataFrame
+            columns: parameter names, logProbability
+        """
+        chainArr = self.getChain(discard=discard)[::thin]
+        df = pd.DataFrame(chainArr.reshape(-1, chainArr.shape[2]),
+              columns=self.space.names)
+        df[LOG_PROBABILITY] = np.array(
+              self.logProbabilityArrs[discard:])[::thin].flatten()
+        return df
+
+    def getDiagnosticDF(self, discard=0):
+        """
+        Calculates convergence diagnostics of the parameters in search
+        coordinates. A parameter is converged if the chain has at least
+        MIN_ITERATION_PER_TIME autocorrelation times and rhat is below
+        MAX_RHAT.
+
+        Parameters
+        ----------
+        discard: int
+            number of initial iterations that are dropped
+
+        Returns
+        -------
+        pd.DataFrame
+            index: parameter
+            columns: mean, std, autocorrelationTime, effectiveSampleSize,
+                rhat, isConverged
+        """
+        searchArr = np.array(self.positionArrs[discard:])
+        if len(searchArr) < 2:
+            raise ValueError("Diagnostics require at least two iterations.")
+        valueArr = self.space.toValues(searchArr)
+        dcts = []
+        for idx, name in enumerate(self.space.names):
+            autocorrelationTime = calculateAutocorrelationTime(searchArr[:, :, idx])
+            rhat = calculateRhat(searchArr[:, :, idx])
+            dcts.append({PARAMETER: name,
+                  MEAN: np.mean(valueArr[:, :, idx]),
+                  STD: np.std(valueArr[:, :, idx]),
+                  AUTOCORRELATION_TIME: autocorrelationTime,
+                  EFFECTIVE_SAMPLE_SIZE: searchArr.shape[0]*searchArr.shape[1]
+                        /autocorrelationTime,
+                  RHAT: rhat,
+                  IS_CONVERGED: bool((len(searchArr) >= MIN_ITERATION_PER_TIME
+                        *autocorrelationTime) and (rhat < MAX_RHAT))})
+        return pd.DataFrame(dcts).set_index(PARAMETER)
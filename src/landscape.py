@@ -0,0 +1,328 @@
+"""
+Parallel scans of the landscape of the SSR of a fit.
+
+The exercises of the parameter fitting notebooks scan k1 with a loop
+that loads the model and calculates residuals for each value.
+LandscapeScanner evaluates the SSR (multiFidelity.SSRObjective) for grids
+of values of parameters in a pool of worker processes. Each worker keeps
+a loaded model for the scans, and the observed data are published once
+in shared memory (src.sharedData).
+
+  scanGrid: all combinations of values of 1 to 3 parameters
+  scanSlices: random two-parameter slices through a point for models
+      with more parameters
+
+A scan is a Landscape, an array of SSRs labelled by the names and values
+of the parameters that provides dataframes for heatmaps and the region
+of small SSRs for choosing bounds of fits.
+
+    with LandscapeScanner(LINEAR_PATHWAY_MODEL, LINEAR_PATHWAY_DF,
+          numProcess=4) as scanner:
+        landscape = scanner.scanGrid({"k1": np.linspace(0, 4, 21),
+              "k2": np.linspace(0, 4, 21)})
+    seaborn.heatmap(landscape.toHeatmapDF())
+    landscape.getBounds()  # {"k1": (0.6, 1.4), ...}
+"""
+
+from src.multiFidelity import SSRObjective, FAILED_SSR, TIME, getObservedDF
+from src.sharedData import SharedDataPool, attachDataframe
+from src.simulator import getModelString
+
+import itertools
+
+import numpy as np
+import pandas as pd
+
+# Constants
+SSR = "ssr"
+MAX_GRID_DIMENSION = 3
+SSR_FACTOR = 2.0  # Region of getBounds relative to the smallest SSR
+
+# Objectives used by the current process. key: (model string, shared
+# memory name, parameter names, columns), value: SSRObjective
+_OBJECTIVE_DCT = {}
+
+
+def getObjective(modelStr, descriptor, parameterNames, columns):
+    """
+    Obtains the objective for observed data in shared memory in this
+    process. The objective is created once per process.
+
+    Parameters
+    ----------
+    modelStr: str
+    descriptor: SharedArrayDescriptor
+        observed data
+    parameterNames: list-str
+    columns: list-str
+
+    Returns
+    -------
+    SSRObjective
+    """
+    key = (modelStr, descriptor.shmName, tuple(parameterNames), tuple(columns))
+    if not key in _OBJECTIVE_DCT:
+        _OBJECTIVE_DCT[key] = SSRObjective(modelStr,
+              attachDataframe(descriptor), parameterNames, columns=columns)
+    return _OBJECTIVE_DCT[key]
+
+def _calculateChunk(args):
+    """
+    Calculates SSRs for a chunk of parameter values in the current process.
+
+    Parameters
+    ----------
+    args: tuple
+        modelStr, descriptor (SharedArrayDescriptor), parameterNames,
+        columns, valueArr
+
+    Returns
+    -------
+    np.array (points)
+    """
+    modelStr, descriptor, parameterNames, columns, valueArr = args
+    objective = getObjective(modelStr, descriptor, parameterNames, columns)
+    return np.array([objective(v) for v in valueArr])
+
+
+class Landscape(object):
+    """
+    SSRs on a grid of values of parameters.
+    """
+
+    def __init__(self, names, coordinates, ssrArr, fixedDct=None):
+        """
+        Parameters
+        ----------
+        names: list-str
+            parameters of the axes of ssrArr
+        coordinates: list-np.array
+            values of the parameters along the axes
+        ssrArr: np.array
+            dimension for each parameter; np.nan for failed simulations
+        fixedDct: dict
+            key: name of a parameter that is not scanned, value: its value
+        """
+        self.names = list(names)
+        self.coordinates = [np.asarray(c, dtype=float) for c in coordinates]
+        self.ssrArr = np.asarray(ssrArr, dtype=float)
+        if fixedDct is None:
+            fixedDct = {}
+        self.fixedDct = dict(fixedDct)
+        if self.ssrArr.shape != tuple(len(c) for c in self.coordinates):
+            raise ValueError("ssrArr must have a dimension for each parameter.")
+
+    def toDataframe(self):
+        """
+        Provides the SSR of each point.
+
+        Returns
+        -------
+        pd.DataFrame
+            columns: parameter names, ssr
+        """
+        arrs = np.meshgrid(*self.coordinates, indexing="ij")
+        dct = {n: a.flatten() for n, a in zip(self.names, arrs)}
+        dct[SSR] = self.ssrArr.flatten()
+        return pd.DataFrame(dct)
+
+    def toHeatmapDF(self, rowName=None, columnName=None):
+        """
+        Provides the SSRs of two parameters. Other scanned parameters are
+        set to the values with the smallest SSR.
+
+        Parameters
+        ----------
+        rowName: str
+            default: first parameter
+        columnName: str
+            default: second parameter
+
+        Returns
+        -------
+        pd.DataFrame
+            index: values of rowName
+            columns: values of columnName
+        """
+        if len(self.names) == 1:
+            return pd.DataFrame({SSR: self.ssrArr},
+                  index=pd.Index(self.coordinates[0], name=self.names[0]))
+        if rowName is None:
+            rowName = self.names[0]
+        if columnName is None:
+            columnName = [n for n in self.names if n != rowName][0]
+        rowIdx = self.names.index(rowName)
+        columnIdx = self.names.index(columnName)
+        arr = np.moveaxis(self.ssrArr, [rowIdx, columnIdx], [0, 1])
+        arr = np.nanmin(arr.reshape(arr.shape[0], arr.shape[1], -1), axis=2)
+        df = pd.DataFrame(arr, index=self.coordinates[rowIdx],
+              columns=self.coordinates[columnIdx])
+        df.index.name = rowName
+        df.columns.name = columnName
+        return df
+
+    def getMinimum(self):
+        """
+        Finds the point with the smallest SSR.
+
+        Returns
+        -------
+        dict
+            key: parameter name, value: value
+        float
+            SSR
+        """
+        idxs = np.unravel_index(np.nanargmin(self.ssrArr), self.ssrArr.shape)
+        valueDct = {n: c[i] for n, c, i in zip(self.names, self.coordinates,
+              idxs)}
+        return valueDct, float(self.ssrArr[idxs])
+
+    def getBounds(self, ssrFactor=SSR_FACTOR):
+        """
+        Finds the range of values of each parameter in which the SSR is at
+        most ssrFactor times the smallest SSR, extended by one grid point.
+
+        Parameters
+        ----------
+        ssrFactor: float
+
+        Returns
+        -------
+        dict
+            key: parameter name, value: (lower, upper)
+        """
+        isSmall = self.ssrArr <= ssrFactor*np.nanmin(self.ssrArr)
+        boundsDct = {}
+        for axis, (name, coordinates) in enumerate(zip(self.names,
+              self.coordinates)):
+            otherAxes = tuple(a for a in range(self.ssrArr.ndim) if a != axis)
+            idxs = np.nonzero(np.any(isSmall, axis=otherAxes))[0]
+            lowerIdx = max(idxs[0] - 1, 0)
+            upperIdx = min(idxs[-1] + 1, len(coordinates) - 1)
+            boundsDct[name] = (coordinates[lowerIdx], coordinates[upperIdx])
+        return boundsDct
+
+
+class LandscapeScanner(SharedDataPool):
+    """
+    Evaluates SSRs of a model for grids of parameter values.
+    """
+
+    def __init__(self, model, observedData, columns=None, numProcess=1):
+        """
+        Parameters
+        ----------
+        model: str/ExtendedRoadRunner
+        observedData: pd.DataFrame/NamedTimeseries/str
+            str: path to CSV file
+        columns: list-str
+            observed columns that are fitted (default: all but time)
+        numProcess: int
+            number of worker processes; 1 runs in the current process
+        """
+        self.modelStr = getModelString(model)
+        self.observedDF = getObservedDF(observedData).astype(float)
+        if columns is None:
+            columns = [c for c in self.observedDF.columns if c != TIME]
+        self.columns = list(columns)
+        self.numProcess = numProcess
+        # Objectives of the current process. key: parameter names
+        self._objectiveDct = {}
+
+    def calculateSSRs(self, parameterNames, valueArr):
+        """
+        Calculates the SSR for each row of parameter values.
+
+        Parameters
+        ----------
+        parameterNames: list-str
+        valueArr: np.array (points, parameters)
+
+        Returns
+        -------
+        np.array (points)
+            np.nan for failed simulations
+        """
+        valueArr = np.atleast_2d(np.asarray(valueArr, dtype=float))
+        if valueArr.shape[1] != len(parameterNames):
+            raise ValueError("valueArr must have a column for each parameter.")
+        if self.numProcess == 1:
+            key = tuple(parameterNames)
+            if not key in self._objectiveDct:
+                self._objectiveDct[key] = SSRObjective(self.modelStr,
+                      self.observedDF, parameterNames, columns=self.columns)
+            objective = self._objectiveDct[key]
+            ssrs = np.array([objective(v) for v in valueArr])
+        else:
+            pool = self._getPool()
+            numChunk = min(len(valueArr), 4*self.numProcess)
+            argss = [(self.modelStr, self._descriptor, list(parameterNames),
+                  self.columns, c) for c in np.array_split(valueArr, numChunk)]
+            ssrs = np.concatenate(pool.map(_calculateChunk, argss))
+        ssrs[ssrs >= FAILED_SSR] = np.nan
+        return ssrs
+
+    def scanGrid(self, gridDct, fixedDct=None):
+        """
+        Calculates SSRs for all combinations of values of parameters.
+
+        Parameters
+        ----------
+        gridDct: dict
+            key: parameter name, value: list-float
+        fixedDct: dict
+            key: parameter name, value: value of a parameter not scanned
+
+        Returns
+        -------
+        Landscape
+        """
+        if not 1 <= len(gridDct) <= MAX_GRID_DIMENSION:
+            raise ValueError("Grids have 1 to %d parameters. Use scanSlices."
+                  % MAX_GRID_DIMENSION)
+        if fixedDct is None:
+            fixedDct = {}
+        names = list(gridDct.keys()) + list(fixedDct.keys())
+        coordinates = [np.asarray(v, dtype=float) for v in gridDct.values()]
+        valueArr = np.array(list(itertools.product(*coordinates)))
+        fixedArr = np.array(list(fixedDct.values()), dtype=float)
+        valueArr = np.hstack([valueArr, np.tile(fixedArr, (len(valueArr), 1))])
+        ssrs = self.calculateSSRs(names, valueArr)
+        return Landscape(list(gridDct.keys()), coordinates,
+              ssrs.reshape([len(c) for c in coordinates]), fixedDct=fixedDct)
+
+    def scanSlices(self, centerDct, boundsDct, numSlice=5, numPoint=11,
+          seed=None):
+        """
+        Calculates SSRs on random slices through a point. A slice is a grid
+        of two parameters with the other parameters at the point.
+
+        Parameters
+        ----------
+        centerDct: dict
+            key: parameter name, value: value at the point
+        boundsDct: dict
+            key: parameter name, value: (lower, upper) of its grid
+        numSlice: int
+        numPoint: int
+            number of values of a parameter in a slice
+        seed: int
+
+        Returns
+        -------
+        list-Landscape
+        """
+        names = list(centerDct.keys())
+        if len(names) < 2:
+            raise ValueError("Slices require at least two parameters.")
+        rng = np.random.default_rng(seed)
+        pairs = list(itertools.combinations(names, 2))
+        pairIdxs = rng.choice(len(pairs), min(numSlice, len(pairs)),
+              replace=False)
+        landscapes = []
+        for pairIdx in pairIdxs:
+            gridDct = {n: np.linspace(*boundsDct[n], numPoint)
+                  for n in pairs[pairIdx]}
+            fixedDct = {n: v for n, v in centerDct.items() if not n in gridDct}
+            landscapes.append(self.scanGrid(gridDct, fixedDct=fixedDct))
+        return landscapes
@@ -0,0 +1,356 @@
+"""
+Exact solutions of linear reaction networks.
+
+A network is linear if every kinetic law is a sum of terms, each of which
+is a product of constants (parameters, compartments, numbers) and exactly
+one floating species, as in the first order mass action reactions of
+LINEAR_PATHWAY_MODEL. Then the concentrations satisfy dx/dt = A x, where
+the rate matrix A is constructed from the stoichiometry matrix, and
+
+    x(t + dt) = expm(A dt) x(t)
+
+Trajectories are computed for many parameter assignments at once by
+batched matrix exponentials and matrix-vector products, without
+integrating the ODEs. Models with rules, events, initial assignments,
+local parameters, or kinetic laws that are not linear are not supported
+(isLinearNetwork is False).
+"""
+
+from src.simulator import getModelHash, getModelString, getSBML,  \
+      makeNamedArray
+
+import collections
+
+import libsbml
+import numpy as np
+import scipy.linalg
+
+TIME = "time"
+
+# Linear term of a kinetic law: multiplier*prod(constants**exponents)*species
+#   speciesId: str
+#   multiplier: float
+#   exponentDct: dict (key: name of constant, value: exponent)
+Term = collections.namedtuple("Term", "speciesId multiplier exponentDct")
+
+# LinearNetwork or None for models analyzed. key: model hash
+_NETWORK_DCT = {}
+
+
+class NonlinearModelError(ValueError):
+    """
+    The model is not a linear network.
+    """
+
+
+def _expand(node, speciesIds, constantIds):
+    """
+    Expands an AST into a sum of monomials.
+
+    Returns
+    -------
+    list-tuple
+        multiplier, exponentDct (constants), exponentDct (species)
+    """
+    nodeType = node.getType()
+    def multiply(monomials1, monomials2, sign=1):
+        products = []
+        for multiplier1, constantDct1, speciesDct1 in monomials1:
+            for multiplier2, constantDct2, speciesDct2 in monomials2:
+                constantDct = dict(constantDct1)
+                for name, exponent in constantDct2.items():
+                    constantDct[name] = constantDct.get(name, 0) + sign*exponent
+                speciesDct = dict(speciesDct1)
+                for name, exponent in speciesDct2.items():
+                    speciesDct[name] = speciesDct.get(name, 0) + sign*exponent
+                products.append((multiplier1*multiplier2**sign, constantDct,
+                      speciesDct))
+        return products
+    def expandChild(idx):
+        return _expand(node.getChild(idx), speciesIds, constantIds)
+    if nodeType == libsbml.AST_PLUS:
+        return [m for i in range(node.getNumChildren()) for m in expandChild(i)]
+    if nodeType == libsbml.AST_MINUS:
+        negatives = [(-c, e, s) for c, e, s in expandChild(node.getNumChildren() - 1)]
+        if node.getNumChildren() == 1:
+            return negatives
+        return expandChild(0) + negatives
+    if nodeType == libsbml.AST_TIMES:
+        monomials = [(1.0, {}, {})]
+        for idx in range(node.getNumChildren()):
+            monomials = multiply(monomials, expandChild(idx))
+        return monomials
+    if nodeType == libsbml.AST_DIVIDE:
+        denominators = expandChild(1)
+        if len(denominators) != 1:
+            raise NonlinearModelError("Unsupported denominator: %s"
+                  % libsbml.formulaToL3String(node.getChild(1)))
+        return multiply(expandChild(0), denominators, sign=-1)
+    if node.isNumber():
+        return [(node.getValue(), {}, {})]
+    if nodeType == libsbml.AST_NAME:
+        name = node.getName()
+        if name in speciesIds:
+            return [(1.0, {}, {name: 1})]
+        if name in constantIds:
+            return [(1.0, {name: 1}, {})]
+        raise NonlinearModelError("Unsupported symbol: %s" % name)
+    raise NonlinearModelError("Unsupported expression: %s"
+          % libsbml.formulaToL3String(node))
+
+def _getTerms(node, speciesIds, constantIds):
+    """
+    Expresses an AST as a sum of linear terms.
+
+    Returns
+    -------
+    list-Term
+    """
+    terms = []
+    for multiplier, constantDct, speciesDct in _expand(node, speciesIds,
+          constantIds):
+        speciesDct = {n: e for n, e in speciesDct.items() if e != 0}
+        if list(speciesDct.values()) != [1]:
+            raise NonlinearModelError("Not linear in a floating species: %s"
+                  % libsbml.formulaToL3String(node))
+        terms.append(Term(speciesId=list(speciesDct.keys())[0],
+              multiplier=multiplier, exponentDct=constantDct))
+    return terms
+
+
+class LinearNetwork(object):
+    """
+    Rate matrix and initial concentrations of a linear network.
+    """
+
+    def __init__(self, model):
+        """
+        Parameters
+        ----------
+        model: str/ExtendedRoadRunner
+            Antimony, SBML, or RoadRunner
+
+        Raises
+        ------
+        NonlinearModelError
+        """
+        sbml = getSBML(getModelString(model))
+        document = libsbml.readSBMLFromString(sbml)
+        sbmlModel = document.getModel()
+        if sbmlModel is None:
+            raise ValueError("Invalid model.")
+        for count, description in [
+              (sbmlModel.getNumRules(), "rules"),
+              (sbmlModel.getNumEvents(), "events"),
+              (sbmlModel.getNumInitialAssignments(), "initial assignments")]:
+            if count > 0:
+                raise NonlinearModelError("Model has %s." % description)
+        floatings = [s for s in sbmlModel.getListOfSpecies()
+              if not s.getBoundaryCondition()]
+        # Symbols of species must be concentrations
+        for species in floatings:
+            if species.getHasOnlySubstanceUnits():
+                raise NonlinearModelError("%s has only substance units."
+                      % species.getId())
+        self.speciesIds = [s.getId() for s in floatings]
+        # Constants. key: name, value: default value
+        self.constantDct = collections.OrderedDict()
+        for parameter in sbmlModel.getListOfParameters():
+            self.constantDct[parameter.getId()] = parameter.getValue()
+        for compartment in sbmlModel.getListOfCompartments():
+            self.constantDct[compartment.getId()] = compartment.getSize()
+        self.constantNames = list(self.constantDct.keys())
+        # Initial concentrations
+        self.initialArr = np.zeros(len(floatings))
+        for idx, species in enumerate(floatings):
+            if species.isSetInitialConcentration():
+                self.initialArr[idx] = species.getInitialConcentration()
+            elif species.isSetInitialAmount():
+                self.initialArr[idx] = species.getInitialAmount()  \
+                      /self.constantDct[species.getCompartment()]
+        # Contributions to the rate matrix.
+        # Each is: row species index, column species index, Term
+        self._contributions = []
+        speciesIdxDct = {s: n for n, s in enumerate(self.speciesIds)}
+        for reaction in sbmlModel.getListOfReactions():
+            kineticLaw = reaction.getKineticLaw()
+            if kineticLaw is None:
+                raise NonlinearModelError("%s has no kinetic law."
+                      % reaction.getId())
+            if kineticLaw.getNumLocalParameters() + kineticLaw.getNumParameters() > 0:
+                raise NonlinearModelError("%s has local parameters."
+                      % reaction.getId())
+            terms = _getTerms(kineticLaw.getMath(), self.speciesIds,
+                  self.constantDct)
+            # Net stoichiometry of the floating species
+            stoichiometryDct = collections.defaultdict(float)
+            for reference in reaction.getListOfReactants():
+                stoichiometryDct[reference.getSpecies()] -= reference.getStoichiometry()
+            for reference in reaction.getListOfProducts():
+                stoichiometryDct[reference.getSpecies()] += reference.getStoichiometry()
+            for speciesId, stoichiometry in stoichiometryDct.items():
+                if (not speciesId in speciesIdxDct) or (stoichiometry == 0):
+                    continue
+                species = sbmlModel.getSpecies(speciesId)
+                for term in terms:
+                    # Rates are amounts per time. Divide by the volume.
+                    exponentDct = dict(term.exponentDct)
+                    compartment = species.getCompartment()
+                    exponentDct[compartment] = exponentDct.get(compartment, 0) - 1
+                    self._contributions.append((speciesIdxDct[speciesId],
+                          speciesIdxDct[term.speciesId],
+                          Term(speciesId=term.speciesId,
+                          multiplier=stoichiometry*term.multiplier,
+                          exponentDct=exponentDct)))
+
+    def _getValueArrs(self, parameterNames, valueArr):
+        """
+        Constant values and initial concentrations for each run.
+
+        Returns
+        -------
+        np.array (runs, constants)
+        np.array (runs, species)
+        """
+        valueArr = np.atleast_2d(np.asarray(valueArr, dtype=float))
+        numRun = len(valueArr)
+        constantArr = np.repeat(np.array(list(self.constantDct.values()),
+              dtype=float)[np.newaxis, :], numRun, axis=0)
+        initialArr = np.repeat(self.initialArr[np.newaxis, :], numRun, axis=0)
+        for idx, name in enumerate(parameterNames):
+            if name in self.constantDct:
+                constantArr[:, self.constantNames.index(name)] = valueArr[:, idx]
+            elif name in self.speciesIds:
+                initialArr[:, self.speciesIds.index(name)] = valueArr[:, idx]
+            else:
+                raise ValueError("Unknown parameter name: %s" % name)
+        return constantArr, initialArr
+
+    def getRateMatrices(self, parameterNames=(), valueArr=None):
+        """
+        Constructs the rate matrix A of dx/dt = A x for each run.
+
+        Parameters
+        ----------
+        parameterNames: list-str
+            parameters, compartments, or floating species (initial values)
+        valueArr: np.array (runs, parameters)
+
+        Returns
+        -------
+        np.array (runs, species, species)
+        """
+        if valueArr is None:
+            valueArr = np.zeros((1, len(parameterNames)))
+        constantArr, _ = self._getValueArrs(parameterNames, valueArr)
+        return self._makeRateMatrices(constantArr)
+
+    def _makeRateMatrices(self, constantArr):
+        numSpecies = len(self.speciesIds)
+        rateArr = np.zeros((len(constantArr), numSpecies, numSpecies))
+        for rowIdx, columnIdx, term in self._contributions:
+            coefficientArr = np.repeat(term.multiplier, len(constantArr))
+            for name, exponent in term.exponentDct.items():
+                if exponent != 0:
+                    coefficientArr = coefficientArr  \
+                          *constantArr[:, self.constantNames.index(name)]**exponent
+            rateArr[:, rowIdx, columnIdx] += coefficientArr
+        return rateArr
+
+    def simulate(self, parameterNames=(), valueArr=None, startTime=0,
+          endTime=5, numPoint=300):
+        """
+        Calculates concentrations at equally spaced times for each run.
+
+        Parameters
+        ----------
+        parameterNames: list-str
+            parameters, compartments, or floating species (initial values)
+        valueArr: np.array (runs, parameters)
+        startTime: float
+        endTime: float
+        numPoint: int
+
+        Returns
+        -------
+        np.array (runs, times, species)
+        """
+        if valueArr is None:
+            valueArr = np.zeros((1, len(parameterNames)))
+        constantArr, stateArr = self._getValueArrs(parameterNames, valueArr)
+        rateArr = self._makeRateMatrices(constantArr)
+        resultArr = np.zeros((len(stateArr), numPoint, len(self.speciesIds)))
+        if startTime != 0:
+            stateArr = np.einsum("rab,rb->ra", scipy.linalg.expm(rateArr*startTime),
+                  stateArr)
+        resultArr[:, 0, :] = stateArr
+        if numPoint > 1:
+            stepArr = scipy.linalg.expm(rateArr*(endTime - startTime)/(numPoint - 1))
+            for idx in range(1, numPoint):
+                stateArr = np.einsum("rab,rb->ra", stepArr, stateArr)
+                resultArr[:, idx, :] = stateArr
+        return resultArr
+
+    def simulateNamedArray(self, startTime=0, endTime=5, numPoint=300,
+          parameterDct=None):
+        """
+        Simulates one parameter assignment with the output of
+        RoadRunner.simulate.
+
+        Parameters
+        ----------
+        startTime: float
+        endTime: float
+        numPoint: int
+        parameterDct: dict
+            key: parameter name
+            value: parameter value
+
+        Returns
+        -------
+        NamedArray
+            columns: time, [species]
+        """
+        if parameterDct is None:
+            parameterDct = {}
+        names = list(parameterDct.keys())
+        valueArr = np.array([[parameterDct[n] for n in names]], dtype=float)
+        arr = self.simulate(names, valueArr, startTime=startTime,
+              endTime=endTime, numPoint=numPoint)[0]
+        times = np.linspace(startTime, endTime, numPoint)
+        return makeNamedArray(np.column_stack([times, arr]),
+              [TIME] + ["[%s]" % s for s in self.speciesIds])
+
+
+def getLinearNetwork(model):
+    """
+    Provides the LinearNetwork for a model if it is linear.
+    Results are cached by model hash.
+
+    Parameters
+    ----------
+    model: str/ExtendedRoadRunner
+
+    Returns
+    -------
+    LinearNetwork/None
+    """
+    modelHash = getModelHash(model)
+    if not modelHash in _NETWORK_DCT:
+        try:
+            _NETWORK_DCT[modelHash] = LinearNetwork(model)
+        except NonlinearModelError:
+            _NETWORK_DCT[modelHash] = None
+    return _NETWORK_DCT[modelHash]
+
+def isLinearNetwork(model):
+    """
+    Parameters
+    ----------
+    model: str/ExtendedRoadRunner
+
+    Returns
+    -------
+    bool
+    """
+    return getLinearNetwork(model) is not None
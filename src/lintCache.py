@@ -0,0 +1,212 @@
+"""
+Cached and incremental mass balance checks with SBMLLint.
+
+Mass balance errors involve reactions connected through shared species.
+A model is partitioned into stoichiometric components (connected
+components of the graph of reactions and species), and each component is
+checked separately with SBMLLint. Results are cached by the hash of the
+model and by the hash of the stoichiometry of each component. When a
+revision of a model changes a few reactions, only the components that
+contain changed reactions are checked again.
+
+    cache = LintCache()
+    result = cache.lint(WOLF_MODEL)
+    result = cache.lint(REVISED_WOLF_MODEL)  # checks changed components
+"""
+
+from src.resultStore import ResultStore
+from src.simulator import getModelHash, getSBML
+
+import collections
+import contextlib
+import hashlib
+import io
+
+import libsbml
+from SBMLLint.tools import sbmllint
+
+GAMES = "games"
+MOIETY_ANALYSIS = "moiety_analysis"
+IS_ERROR = "isError"
+REPORT = "report"
+
+# Result of checking a model
+#   isError: bool
+#   report: str (reports of the components with errors)
+#   numComponent: int
+#   numChecked: int (components checked with SBMLLint; others were cached)
+LintResult = collections.namedtuple("LintResult",
+      "isError report numComponent numChecked")
+# Stoichiometric component of a model
+#   reactionIds: list-str
+#   speciesIds: list-str
+#   key: str (hash of the stoichiometry of the reactions)
+Component = collections.namedtuple("Component", "reactionIds speciesIds key")
+
+
+def _readModel(sbml):
+    document = libsbml.readSBMLFromString(sbml)
+    if document.getNumErrors(libsbml.LIBSBML_SEV_ERROR) > 0:
+        raise ValueError("Invalid SBML: %s" % document.getErrorLog().toString())
+    return document, document.getModel()
+
+def _getStoichiometryString(reaction):
+    # Description of a reaction that ignores its kinetics
+    def termsToString(references):
+        terms = sorted("%s*%s" % (r.getStoichiometry(), r.getSpecies())
+              for r in references)
+        return " + ".join(terms)
+    return "%s: %s -> %s" % (reaction.getId(),
+          termsToString(reaction.getListOfReactants()),
+          termsToString(reaction.getListOfProducts()))
+
+def getComponents(sbml):
+    """
+    Finds the stoichiometric components of a model.
+
+    Parameters
+    ----------
+    sbml: str
+
+    Returns
+    -------
+    list-Component
+    """
+    _, model = _readModel(sbml)
+    # Union-find of reactions through shared species
+    parentDct = {}
+    def find(name):
+        while parentDct[name] != name:
+            parentDct[name] = parentDct[parentDct[name]]
+            name = parentDct[name]
+        return name
+    speciesDct = {}  # key: reaction id, value: list of species
+    for reaction in model.getListOfReactions():
+        reactionId = reaction.getId()
+        parentDct[reactionId] = reactionId
+        speciesIds = [r.getSpecies() for r in
+              list(reaction.getListOfReactants()) + list(reaction.getListOfProducts())]
+        speciesDct[reactionId] = speciesIds
+        for speciesId in speciesIds:
+            name = "species:" + speciesId
+            if not name in parentDct:
+                parentDct[name] = name
+            parentDct[find(name)] = find(reactionId)
+    memberDct = collections.OrderedDict()
+    for reaction in model.getListOfReactions():
+        root = find(reaction.getId())
+        if not root in memberDct:
+            memberDct[root] = []
+        memberDct[root].append(reaction)
+    components = []
+    for reactions in memberDct.values():
+        reactionIds = [r.getId() for r in reactions]
+        speciesIds = sorted(set(s for i in reactionIds for s in speciesDct[i]))
+        descriptions = sorted(_getStoichiometryString(r) for r in reactions)
+        key = hashlib.md5("\n".join(descriptions).encode()).hexdigest()
+        components.append(Component(reactionIds=reactionIds,
+              speciesIds=speciesIds, key=key))
+    return components
+
+def _lintComponent(sbml, component, massBalanceCheck):
+    """
+    Checks the reactions of a component with SBMLLint.
+
+    Returns
+    -------
+    bool: is error
+    str: report
+    """
+    document, model = _readModel(sbml)
+    for reactionId in [r.getId() for r in model.getListOfReactions()]:
+        if not reactionId in component.reactionIds:
+            model.removeReaction(reactionId)
+    for speciesId in [s.getId() for s in model.getListOfSpecies()]:
+        if not speciesId in component.speciesIds:
+            model.removeSpecies(speciesId)
+    stream = io.StringIO()
+    with contextlib.redirect_stdout(stream):
+        result = sbmllint.lint(model, file_out=stream,
+              mass_balance_check=massBalanceCheck)
+    if massBalanceCheck == MOIETY_ANALYSIS:
+        isError = result.num_imbalances > 0
+    else:
+        isError = bool(result)
+    return isError, stream.getvalue()
+
+
+class LintCache(object):
+    """
+    Mass balance checks that reuse the results for models and
+    stoichiometric components that were checked before.
+    """
+
+    def __init__(self, massBalanceCheck=GAMES, store=None):
+        """
+        Parameters
+        ----------
+        massBalanceCheck: str
+            games, moiety_analysis
+        store: ResultStore/str
+            persists the results of components across sessions
+        """
+        self.massBalanceCheck = massBalanceCheck
+        if isinstance(store, str):
+            store = ResultStore(store)
+        self.store = store
+        self._modelDct = {}  # key: model hash, value: LintResult
+        self._componentDct = {}  # key: component key, value: (isError, report)
+
+    def _getComponentResult(self, component):
+        # Returns None if the component has not been checked
+        key = "%s:%s" % (self.massBalanceCheck, component.key)
+        if key in self._componentDct:
+            return self._componentDct[key]
+        if (self.store is not None) and self.store.has(key):
+            dct = self.store.get(key)
+            self._componentDct[key] = (dct[IS_ERROR], dct[REPORT])
+            return self._componentDct[key]
+        return None
+
+    def _setComponentResult(self, component, isError, report):
+        key = "%s:%s" % (self.massBalanceCheck, component.key)
+        self._componentDct[key] = (isError, report)
+        if (self.store is not None) and (not self.store.has(key)):
+            self.store.append(key, {IS_ERROR: isError, REPORT: report})
+
+    def lint(self, model):
+        """
+        Checks the mass balance of a model.
+
+        Parameters
+        ----------
+        model: str
+            Antimony or SBML
+
+        Returns
+        -------
+        LintResult
+        """
+        modelKey = getModelHash(model)
+        if modelKey in self._modelDct:
+            return self._modelDct[modelKey]._replace(numChecked=0)
+        sbml = getSBML(model)
+        components = getComponents(sbml)
+        isError = False
+        reports = []
+        numChecked = 0
+        for component in components:
+            componentResult = self._getComponentResult(component)
+            if componentResult is None:
+                componentResult = _lintComponent(sbml, component,
+                      self.massBalanceCheck)
+                self._setComponentResult(component, *componentResult)
+                numChecked += 1
+            isComponentError, report = componentResult
+            if isComponentError:
+                isError = True
+                reports.append(report)
+        result = LintResult(isError=isError, report="\n".join(reports),
+              numComponent=len(components), numChecked=numChecked)
+        self._modelDct[modelKey] = result
+        return result
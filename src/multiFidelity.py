@@ -0,0 +1,308 @@
+"""
+Multi-fidelity parameter fitting with differential evolution.
+
+In the early generations of differential evolution the population is
+spread over the parameter space, and the ranking of candidates does not
+need precise trajectories. fitMultiFidelity runs differential evolution
+in stages. Each stage uses a Fidelity that determines
+  tolerance: relative tolerance of the integrator
+  stride: every stride-th observation time is simulated and compared
+  convergenceTolerance: tol of differential_evolution that ends the stage
+  maxGeneration: largest number of generations of the stage
+Each stage starts from the population of the previous stage, so fidelity
+is tightened as the optimizer converges. The best candidates of the last
+stage are re-evaluated at full fidelity (all observations, tight
+tolerance), and the best of them is the result.
+
+compareFidelity fits a model with the schedule of fidelities and with
+full fidelity alone, and reports the integration time of each.
+
+    result = fitMultiFidelity(WOLF_MODEL, WOLF_DF, ["J1_k1", "J9_k"],
+          bounds=[(100, 1000), (10, 50)])
+    result.stageDF  # integration time and number of simulations of stages
+"""
+
+from src.simulator import getModelString, loadModel
+
+import collections
+import time
+
+import numpy as np
+import pandas as pd
+from scipy.optimize import differential_evolution
+
+# Constants
+TIME = "time"
+STAGE = "stage"
+TOLERANCE = "tolerance"
+STRIDE = "stride"
+CONVERGENCE_TOLERANCE = "convergenceTolerance"
+MAX_GENERATION = "maxGeneration"
+NUM_SIMULATION = "numSimulation"
+INTEGRATION_SECONDS = "integrationSeconds"
+SSR = "ssr"
+SECONDS = "seconds"
+METHOD = "method"
+MULTI_FIDELITY = "multiFidelity"
+FULL_FIDELITY = "fullFidelity"
+FINAL = "final"
+ABSOLUTE_TOLERANCE_RATIO = 1e-6  # absolute tolerance/relative tolerance
+FAILED_SSR = 1e10  # SSR of a simulation that fails
+
+# Fidelity of the simulations of a stage
+#   tolerance: float (relative tolerance of CVODE)
+#   stride: int (every stride-th observation time is used)
+#   convergenceTolerance: float (tol of differential_evolution)
+#   maxGeneration: int
+Fidelity = collections.namedtuple("Fidelity",
+      "tolerance stride convergenceTolerance maxGeneration")
+DEFAULT_SCHEDULE = [
+      Fidelity(tolerance=1e-3, stride=10, convergenceTolerance=0.1,
+            maxGeneration=100),
+      Fidelity(tolerance=1e-4, stride=4, convergenceTolerance=0.03,
+            maxGeneration=100),
+      Fidelity(tolerance=1e-6, stride=1, convergenceTolerance=0.01,
+            maxGeneration=100),
+      ]
+FULL = Fidelity(tolerance=1e-8, stride=1, convergenceTolerance=0.01,
+      maxGeneration=1000)
+
+# Result of a fit
+#   valueDct: dict (key: parameter name, value: fitted value)
+#   ssr: float (sum of squared residuals at full fidelity)
+#   stageDF: pd.DataFrame
+#     index: stage (0, 1, ..., final)
+#     columns: tolerance, stride, numSimulation, integrationSeconds, ssr
+#   candidateDF: pd.DataFrame
+#     columns: parameter names, ssr (full fidelity) of the final candidates
+FitResult = collections.namedtuple("FitResult",
+      "valueDct ssr stageDF candidateDF")
+
+
+def getObservedDF(observedData):
+    """
+    Converts observed data to a DataFrame with a time column.
+
+    Parameters
+    ----------
+    observedData: pd.DataFrame/NamedTimeseries/str
+        str: path to CSV file
+
+    Returns
+    -------
+    pd.DataFrame
+    """
+    if isinstance(observedData, str):
+        observedDF = pd.read_csv(observedData)
+    elif isinstance(observedData, pd.DataFrame):
+        observedDF = observedData
+    else:
+        # NamedTimeseries has time as the index
+        observedDF = observedData.to_dataframe().reset_index()
+    if not TIME in observedDF.columns:
+        observedDF = observedDF.rename(columns={observedDF.columns[0]: TIME})
+    return observedDF
+
+
+class SSRObjective(object):
+    """
+    Sum of squared residuals of simulations at a fidelity. The SSR of a
+    subset of observation times is multiplied by the stride so that SSRs
+    at different strides have the same scale.
+    """
+
+    def __init__(self, model, observedDF, parameterNames, columns=None):
+        """
+        Parameters
+        ----------
+        model: str/ExtendedRoadRunner
+        observedDF: pd.DataFrame
+            columns: time, floating species
+        parameterNames: list-str
+        columns: list-str
+            observed columns that are fitted (default: all but time)
+        """
+        self.roadrunner = loadModel(getModelString(model))
+        self.parameterNames = list(parameterNames)
+        if columns is None:
+            columns = [c for c in observedDF.columns if c != TIME]
+        self.columns = list(columns)
+        self.times = observedDF[TIME].to_numpy(dtype=float)
+        self.observedArr = observedDF[self.columns].to_numpy(dtype=float)
+        self.selections = [TIME] + ["[%s]" % c for c in self.columns]
+        self.fidelity = None
+        self.numSimulation = 0
+        self.integrationSeconds = 0.0
+        self.setFidelity(FULL)
+
+    def setFidelity(self, fidelity):
+        """
+        Parameters
+        ----------
+        fidelity: Fidelity
+        """
+        self.fidelity = fidelity
+        integrator = self.roadrunner.integrator
+        integrator.relative_tolerance = fidelity.tolerance
+        integrator.absolute_tolerance = ABSOLUTE_TOLERANCE_RATIO*fidelity.tolerance
+        # The first time is the start of the simulation
+        self._idxs = np.unique(np.append(np.arange(0, len(self.times),
+              fidelity.stride), [0]))
+
+    def simulate(self, values):
+        """
+        Simulates the selected observation times.
+
+        Parameters
+        ----------
+        values: list-float
+
+        Returns
+        -------
+        np.array (times, columns)
+        """
+        self.roadrunner.resetAll()
+        for name, value in zip(self.parameterNames, values):
+            self.roadrunner[name] = float(value)
+        startSeconds = time.time()
+        try:
+            data = self.roadrunner.simulate(times=list(self.times[self._idxs]),
+                  selections=self.selections)
+            arr = np.array(data)[:, 1:]
+        except RuntimeError:
+            arr = None
+        self.integrationSeconds += time.time() - startSeconds
+        self.numSimulation += 1
+        return arr
+
+    def __call__(self, values):
+        """
+        Parameters
+        ----------
+        values: list-float
+
+        Returns
+        -------
+        float
+        """
+        arr = self.simulate(values)
+        if arr is None:
+            return FAILED_SSR
+        ssr = np.sum((self.observedArr[self._idxs] - arr)**2)
+        # Scale to the number of observation times
+        ssr *= len(self.times)/len(self._idxs)
+        if not np.isfinite(ssr):
+            return FAILED_SSR
+        return float(ssr)
+
+
+def _makeStageDct(stage, fidelity, objective, startSimulation, startSeconds,
+      ssr):
+    return {STAGE: stage, TOLERANCE: fidelity.tolerance, STRIDE: fidelity.stride,
+          NUM_SIMULATION: objective.numSimulation - startSimulation,
+          INTEGRATION_SECONDS: objective.integrationSeconds - startSeconds,
+          SSR: ssr}
+
+def fitMultiFidelity(model, observedDF, parameterNames, bounds,
+      schedule=DEFAULT_SCHEDULE, fullFidelity=FULL, numCandidate=5,
+      popsize=15, seed=None, columns=None):
+    """
+    Fits parameters with stages of differential evolution of increasing
+    fidelity.
+
+    Parameters
+    ----------
+    model: str/ExtendedRoadRunner
+    observedDF: pd.DataFrame
+        columns: time, floating species
+    parameterNames: list-str
+    bounds: list-(float, float)
+    schedule: list-Fidelity
+        fidelities of the stages
+    fullFidelity: Fidelity
+        fidelity of the re-evaluation of the final candidates
+    numCandidate: int
+        number of the best candidates of the last stage that are
+        re-evaluated
+    popsize: int
+        popsize of differential_evolution
+    seed: int
+    columns: list-str
+        observed columns that are fitted
+
+    Returns
+    -------
+    FitResult
+    """
+    objective = SSRObjective(model, observedDF, parameterNames, columns=columns)
+    rng = np.random.default_rng(seed)
+    population = "latinhypercube"
+    stageDcts = []
+    for stage, fidelity in enumerate(schedule):
+        startSimulation = objective.numSimulation
+        startSeconds = objective.integrationSeconds
+        objective.setFidelity(fidelity)
+        result = differential_evolution(objective, bounds, init=population,
+              popsize=popsize, tol=fidelity.convergenceTolerance,
+              maxiter=fidelity.maxGeneration, polish=False, seed=rng)
+        population = result.population
+        energies = result.population_energies
+        stageDcts.append(_makeStageDct(stage, fidelity, objective,
+              startSimulation, startSeconds, float(result.fun)))
+    # Re-evaluate the best candidates at full fidelity
+    startSimulation = objective.numSimulation
+    startSeconds = objective.integrationSeconds
+    objective.setFidelity(fullFidelity)
+    candidateArr = population[np.argsort(energies)[:numCandidate]]
+    ssrs = np.array([objective(v) for v in candidateArr])
+    bestIdx = int(np.argmin(ssrs))
+    stageDcts.append(_makeStageDct(FINAL, fullFidelity, objective,
+          startSimulation, startSeconds, float(ssrs[bestIdx])))
+    candidateDF = pd.DataFrame(candidateArr, columns=parameterNames)
+    candidateDF[SSR] = ssrs
+    stageDF = pd.DataFrame(stageDcts).set_index(STAGE)
+    return FitResult(
+          valueDct=dict(zip(parameterNames, candidateArr[bestIdx])),
+          ssr=float(ssrs[bestIdx]),
+          stageDF=stageDF,
+          candidateDF=candidateDF.sort_values(SSR).reset_index(drop=True))
+
+def compareFidelity(model, observedDF, parameterNames, bounds,
+      schedule=DEFAULT_SCHEDULE, fullFidelity=FULL, seed=None, **kwargs):
+    """
+    Compares fits with the schedule of fidelities and with full fidelity
+    alone (a single stage of differential evolution).
+
+    Parameters
+    ----------
+    model: str/ExtendedRoadRunner
+    observedDF: pd.DataFrame
+    parameterNames: list-str
+    bounds: list-(float, float)
+    schedule: list-Fidelity
+    fullFidelity: Fidelity
+    seed: int
+    kwargs: dict
+        optional arguments for fitMultiFidelity
+
+    Returns
+    -------
+    pd.DataFrame
+        index: method (multiFidelity, fullFidelity)
+        columns: integrationSeconds, numSimulation, seconds, ssr,
+            parameter names
+    """
+    resultDcts = []
+    for method, stages in [(MULTI_FIDELITY, schedule),
+          (FULL_FIDELITY, [fullFidelity])]:
+        startSeconds = time.time()
+        result = fitMultiFidelity(model, observedDF, parameterNames, bounds,
+              schedule=stages, fullFidelity=fullFidelity, seed=seed, **kwargs)
+        resultDct = {METHOD: method,
+              INTEGRATION_SECONDS: result.stageDF[INTEGRATION_SECONDS].sum(),
+              NUM_SIMULATION: result.stageDF[NUM_SIMULATION].sum(),
+              SECONDS: time.time() - startSeconds,
+              SSR: result.ssr}
+        resultDct.update(result.valueDct)
+        resultDcts.append(resultDct)
+    return pd.DataFrame(resultDcts).set_index(METHOD)
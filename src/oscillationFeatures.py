@@ -0,0 +1,234 @@
+"""
+Oscillation features calculated from peaks and zero crossings.
+
+This is an alternative to the FFT calculations in src.spectral that
+uses the same batched representation of simulation results
+(runs, times, species). Features are calculated for all species in all
+runs at once:
+  period: mean time between upward crossings of the mean
+  amplitude: half of the last peak to trough distance
+  phase: radians of the first upward crossing relative to the start time
+  damping: damping ratio from the logarithmic decrement of peak heights
+The resolution of the period is not limited by the frequency grid of
+an FFT since crossing times are interpolated between points.
+"""
+
+from src import doe
+from src import spectral
+from src.simulator import BatchSimulator
+
+import collections
+import time
+import numpy as np
+import pandas as pd
+
+TIME_AXIS = 1
+PERIOD = "period"
+AMPLITUDE = "amplitude"
+PHASE = "phase"
+DAMPING = "damping"
+FREQUENCY = "frequency"
+METHOD = "method"
+SECONDS = "seconds"
+FFT = "fft"
+PEAK = "peak"
+
+# Features of oscillations. Each is np.array (runs, species) with np.nan
+# where there are no oscillations.
+OscillationFeatures = collections.namedtuple("OscillationFeatures",
+      [PERIOD, AMPLITUDE, PHASE, DAMPING])
+
+
+def _firstIndex(mask):
+    # Index of first True along the time axis; -1 if none
+    idxArr = np.argmax(mask, axis=TIME_AXIS)
+    return np.where(np.any(mask, axis=TIME_AXIS), idxArr, -1)
+
+def _lastIndex(mask):
+    # Index of last True along the time axis; -1 if none
+    numTime = mask.shape[TIME_AXIS]
+    idxArr = numTime - 1 - np.argmax(mask[:, ::-1, :], axis=TIME_AXIS)
+    return np.where(np.any(mask, axis=TIME_AXIS), idxArr, -1)
+
+def _take(arr, idxArr):
+    # Values of arr (runs, times, species) at time indices (runs, species)
+    result = np.take_along_axis(arr, np.maximum(idxArr, 0)[:, np.newaxis, :],
+          axis=TIME_AXIS)[:, 0, :]
+    return np.where(idxArr >= 0, result, np.nan)
+
+def findExtrema(arr):
+    """
+    Finds strict local maxima and minima along the time axis.
+
+    Parameters
+    ----------
+    arr: np.array (runs, times, species)
+
+    Returns
+    -------
+    np.array-bool (runs, times, species): is peak
+    np.array-bool (runs, times, species): is trough
+    """
+    isPeak = np.zeros(arr.shape, dtype=bool)
+    isTrough = np.zeros(arr.shape, dtype=bool)
+    middle = arr[:, 1:-1, :]
+    isPeak[:, 1:-1, :] = (middle > arr[:, :-2, :]) & (middle >= arr[:, 2:, :])
+    isTrough[:, 1:-1, :] = (middle < arr[:, :-2, :]) & (middle <= arr[:, 2:, :])
+    return isPeak, isTrough
+
+def findUpwardCrossings(arr, times):
+    """
+    Finds the interpolated times at which series cross their mean upward.
+
+    Parameters
+    ----------
+    arr: np.array (runs, times, species)
+    times: np.array
+
+    Returns
+    -------
+    np.array-bool (runs, times - 1, species): crossing between points
+    np.array (runs, times - 1, species): time of the crossing (nan if none)
+    """
+    centeredArr = arr - np.mean(arr, axis=TIME_AXIS, keepdims=True)
+    lowerArr = centeredArr[:, :-1, :]
+    upperArr = centeredArr[:, 1:, :]
+    isCrossing = (lowerArr < 0) & (upperArr >= 0)
+    dtArr = np.diff(times)[np.newaxis, :, np.newaxis]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        fractionArr = -lowerArr/(upperArr - lowerArr)
+    crossingTimes = np.asarray(times)[np.newaxis, :-1, np.newaxis] + fractionArr*dtArr
+    return isCrossing, np.where(isCrossing, crossingTimes, np.nan)
+
+def calculateOscillationFeatures(arr, times, offset=0, minAmplitude=1e-6):
+    """
+    Calculates oscillation features for every species in every run.
+
+    Parameters
+    ----------
+    arr: np.array (runs, times, species)
+    times: np.array
+    offset: int
+        Initial data that are not included in the calculation
+    minAmplitude: float
+        smaller amplitudes are not considered oscillations
+
+    Returns
+    -------
+    OscillationFeatures
+    """
+    arr = np.asarray(arr, dtype=float)
+    if arr.ndim == 2:
+        arr = arr[np.newaxis, :, :]
+    arr = arr[:, offset:, :]
+    times = np.asarray(times, dtype=float)[offset:]
+    # Period and phase from crossings of the mean
+    isCrossing, crossingTimes = findUpwardCrossings(arr, times)
+    numCrossing = np.sum(isCrossing, axis=TIME_AXIS)
+    firstTimes = np.min(np.where(isCrossing, crossingTimes, np.inf),
+          axis=TIME_AXIS)
+    lastTimes = np.max(np.where(isCrossing, crossingTimes, -np.inf),
+          axis=TIME_AXIS)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        periodArr = (lastTimes - firstTimes)/(numCrossing - 1)
+        periodArr = np.where(numCrossing >= 2, periodArr, np.nan)
+        phaseArr = 2*np.pi*np.mod(firstTimes - times[0], periodArr)/periodArr
+    # Amplitude and damping from peaks and troughs
+    isPeak, isTrough = findExtrema(arr)
+    lastPeaks = _take(arr, _lastIndex(isPeak))
+    lastTroughs = _take(arr, _lastIndex(isTrough))
+    amplitudeArr = 0.5*(lastPeaks - lastTroughs)
+    centers = np.mean(arr, axis=TIME_AXIS)
+    firstHeights = _take(arr, _firstIndex(isPeak)) - centers
+    lastHeights = lastPeaks - centers
+    numPeak = np.sum(isPeak, axis=TIME_AXIS)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        decrementArr = np.log(firstHeights/lastHeights)/(numPeak - 1)
+    dampingArr = decrementArr/np.sqrt(4*np.pi**2 + decrementArr**2)
+    dampingArr = np.where((numPeak >= 2) & (firstHeights > 0) & (lastHeights > 0),
+          dampingArr, np.nan)
+    # Eliminate series without oscillations
+    isOscillating = (np.abs(amplitudeArr) >= minAmplitude) & (numCrossing >= 2)
+    def select(featureArr):
+        return np.where(isOscillating, featureArr, np.nan)
+    return OscillationFeatures(period=select(periodArr),
+          amplitude=select(amplitudeArr), phase=select(phaseArr),
+          damping=select(dampingArr))
+
+def calculateFeatureDF(datas, molecules=None, **kwargs):
+    """
+    Calculates oscillation features for simulation results.
+
+    Parameters
+    ----------
+    datas: list-NamedArray/list-DataFrame
+    molecules: list-str
+    kwargs: dict
+        optional arguments for calculateOscillationFeatures
+
+    Returns
+    -------
+    pd.DataFrame
+        index: run, molecule
+        columns: period, amplitude, phase, damping
+    """
+    arr, times, molecules = spectral.stackSimulations(datas, molecules=molecules)
+    features = calculateOscillationFeatures(arr, times, **kwargs)
+    index = pd.MultiIndex.from_product([range(arr.shape[0]), molecules],
+          names=["run", "molecule"])
+    dct = {n: getattr(features, n).flatten() for n in features._fields}
+    return pd.DataFrame(dct, index=index)
+
+def benchmarkDoeSweep(model, factors=doe.WOLF_FACTORS, percents=[-10, 0, 10],
+      molecule=None, offset=100, numRepeat=3):
+    """
+    Compares the time to calculate frequencies for the simulations of a
+    1WD sweep with the FFT (src.spectral) and with oscillation features.
+    Simulations are done once and are not included in the times.
+
+    Parameters
+    ----------
+    model: str/ExtendedRoadRunner
+    factors: list-str
+    percents: list-float
+    molecule: str/list-str/None
+        None is all floating species
+    offset: int
+        Initial data that are not included in the calculations
+    numRepeat: int
+        number of times that each calculation is timed
+
+    Returns
+    -------
+    pd.DataFrame
+        index: method (fft, peak)
+        columns: seconds (smallest time of the repeats),
+            frequency (mean frequency over runs and molecules)
+    np.array (runs, species): frequencies from the FFT
+    np.array (runs, species): frequencies from oscillation features
+    """
+    molecules = doe.getMolecules(model, molecule)
+    designDF = pd.DataFrame([{f: p if f == g else 0 for f in factors}
+          for g in factors for p in percents])
+    with BatchSimulator(model, startTime=doe.START, endTime=doe.END,
+          numPoint=doe.NUMPT, molecules=molecules) as simulator:
+        baseValues = simulator.getParameterValues(factors)
+        valueArr = baseValues[np.newaxis, :]*(1 + 0.01*designDF.to_numpy())
+        arr = simulator.simulate(factors, valueArr)
+        times = simulator.times
+    def timeIt(function):
+        seconds = []
+        for _ in range(numRepeat):
+            startTime = time.time()
+            result = function()
+            seconds.append(time.time() - startTime)
+        return min(seconds), result
+    fftSeconds, fftFrequencies = timeIt(lambda:
+          spectral.calculatePeakFrequencies(arr, doe.END, offset=offset))
+    peakSeconds, features = timeIt(lambda:
+          calculateOscillationFeatures(arr, times, offset=offset))
+    peakFrequencies = 1/features.period
+    df = pd.DataFrame({SECONDS: [fftSeconds, peakSeconds],
+          FREQUENCY: [np.nanmean(fftFrequencies), np.nanmean(peakFrequencies)]},
+          index=pd.Index([FFT, PEAK], name=METHOD))
+    return df, fftFrequencies, peakFrequencies
@@ -0,0 +1,252 @@
+"""
+Detection of the period of oscillations while a simulation is running.
+
+The simulation is integrated in chunks. Peaks are detected as each chunk
+is produced, and integration stops once the estimated period is stable.
+This avoids simulating a fixed window and computing an FFT afterwards.
+"""
+
+from src.simulator import loadModel
+
+import collections
+import numpy as np
+
+# Result of a period detection
+#   period: float (np.nan if no stable oscillation was found)
+#   amplitude: float (peak to trough for the last period)
+#   damping: float (damping ratio from the decay of successive peaks;
+#                   0 for sustained oscillations, negative if growing)
+#   endTime: float (time at which integration stopped)
+#   isConverged: bool
+#   numPeak: int
+PeriodResult = collections.namedtuple("PeriodResult",
+      "period amplitude damping endTime isConverged numPeak")
+
+
+def findPeaks(values, isMinimum=False):
+    """
+    Finds the indices of local maxima (or minima) in a series. A plateau
+    is reported at its first index.
+
+    Parameters
+    ----------
+    values: np.array
+    isMinimum: bool
+
+    Returns
+    -------
+    np.array-int
+    """
+    arr = np.asarray(values, dtype=float)
+    if isMinimum:
+        arr = -arr
+    diffArr = np.diff(arr)
+    # Carry the direction of the last non-zero difference across plateaus
+    isNonzero = diffArr != 0
+    lastIdxs = np.maximum.accumulate(np.where(isNonzero,
+          np.arange(len(diffArr)), -1))
+    signArr = np.where(lastIdxs >= 0, np.sign(diffArr[np.maximum(lastIdxs, 0)]), 0)
+    isPeak = (signArr[:-1] > 0) & (signArr[1:] < 0)
+    # First index of the plateau that ends in a decrease
+    peakIdxs = np.nonzero(isPeak)[0] + 1
+    plateauStarts = lastIdxs[peakIdxs - 1] + 1
+    return plateauStarts
+
+def _interpolatePeakTime(times, values, idx):
+    # Parabolic interpolation of the time of a peak
+    if (idx == 0) or (idx >= len(values) - 1):
+        return times[idx]
+    y0, y1, y2 = values[idx - 1], values[idx], values[idx + 1]
+    denominator = y0 - 2*y1 + y2
+    if denominator == 0:
+        return times[idx]
+    shift = 0.5*(y0 - y2)/denominator
+    return times[idx] + shift*(times[idx + 1] - times[idx])
+
+def calculateDampingRatio(amplitudes):
+    """
+    Calculates the damping ratio from successive peak amplitudes using
+    the logarithmic decrement.
+
+    Parameters
+    ----------
+    amplitudes: np.array
+
+    Returns
+    -------
+    float
+    """
+    amplitudes = np.asarray(amplitudes, dtype=float)
+    if (len(amplitudes) < 2) or np.any(amplitudes <= 0):
+        return np.nan
+    decrement = np.mean(np.log(amplitudes[:-1]/amplitudes[1:]))
+    return decrement/np.sqrt(4*np.pi**2 + decrement**2)
+
+
+class PeriodDetector(object):
+    """
+    Online detection of peaks in a series that arrives in chunks.
+    """
+
+    def __init__(self, tolerance=0.01, numStablePeriod=3, minAmplitude=1e-6):
+        """
+        Parameters
+        ----------
+        tolerance: float
+            largest relative deviation of recent periods from their mean
+        numStablePeriod: int
+            number of recent periods that must agree
+        minAmplitude: float
+            smallest peak to trough change considered an oscillation
+        """
+        self.tolerance = tolerance
+        self.numStablePeriod = numStablePeriod
+        self.minAmplitude = minAmplitude
+        self.peakTimes = []
+        self.amplitudes = []  # Peak to following trough
+        self._times = np.zeros(0)
+        self._values = np.zeros(0)
+
+    def update(self, times, values):
+        """
+        Adds a chunk of the series.
+
+        Parameters
+        ----------
+        times: np.array
+        values: np.array
+        """
+        times = np.asarray(times, dtype=float)
+        values = np.asarray(values, dtype=float)
+        if (len(self._times) > 0) and (len(times) > 0)  \
+              and (times[0] <= self._times[-1]):
+            times = times[1:]
+            values = values[1:]
+        self._times = np.concatenate([self._times, times])
+        self._values = np.concatenate([self._values, values])
+        peakIdxs = findPeaks(self._values)
+        troughIdxs = findPeaks(self._values, isMinimum=True)
+        # Peaks are complete once the following trough is known
+        lastIdx = 0
+        for peakIdx in peakIdxs:
+            laterTroughs = troughIdxs[troughIdxs > peakIdx]
+            if len(laterTroughs) == 0:
+                break
+            amplitude = self._values[peakIdx] - self._values[laterTroughs[0]]
+            if amplitude >= self.minAmplitude:
+                self.peakTimes.append(_interpolatePeakTime(self._times,
+                      self._values, peakIdx))
+                self.amplitudes.append(amplitude)
+            lastIdx = laterTroughs[0]
+        # Keep the unprocessed part of the series
+        self._times = self._times[lastIdx:]
+        self._values = self._values[lastIdx:]
+
+    def getPeriods(self):
+        """
+        Returns
+        -------
+        np.array
+        """
+        return np.diff(self.peakTimes)
+
+    def isStable(self):
+        """
+        Checks if the recent periods agree within the tolerance.
+
+        Returns
+        -------
+        bool
+        """
+        periods = self.getPeriods()
+        if len(periods) < self.numStablePeriod:
+            return False
+        recents = periods[-self.numStablePeriod:]
+        mean = np.mean(recents)
+        return bool(np.max(np.abs(recents - mean)) <= self.tolerance*mean)
+
+    def getResult(self, endTime):
+        """
+        Parameters
+        ----------
+        endTime: float
+
+        Returns
+        -------
+        PeriodResult
+        """
+        isConverged = self.isStable()
+        periods = self.getPeriods()
+        if len(periods) == 0:
+            period = np.nan
+        else:
+            numPeriod = min(self.numStablePeriod, len(periods))
+            period = np.mean(periods[-numPeriod:])
+        amplitude = np.nan
+        if len(self.amplitudes) > 0:
+            amplitude = self.amplitudes[-1]
+        numAmplitude = self.numStablePeriod + 1
+        damping = calculateDampingRatio(self.amplitudes[-numAmplitude:])
+        return PeriodResult(period=period, amplitude=amplitude, damping=damping,
+              endTime=endTime, isConverged=isConverged,
+              numPeak=len(self.peakTimes))
+
+
+def simulateUntilPeriodic(model, molecule, parameterDct=None, startTime=0,
+      chunkTime=1.0, maxTime=50, pointsPerTime=100, transientTime=0,
+      tolerance=0.01, numStablePeriod=3, minAmplitude=1e-6):
+    """
+    Integrates the model in chunks until the period of oscillations of
+    a molecule is stable or maxTime is reached.
+
+    Parameters
+    ----------
+    model: str/ExtendedRoadRunner
+    molecule: str
+    parameterDct: dict
+        key: parameter name
+        value: parameter value
+    startTime: float
+    chunkTime: float
+        length of time integrated before checking the period
+    maxTime: float
+        largest time simulated
+    pointsPerTime: int
+        number of points in a unit of time
+    transientTime: float
+        time after startTime during which peaks are ignored
+    tolerance: float
+        largest relative deviation of recent periods from their mean
+    numStablePeriod: int
+        number of recent periods that must agree
+    minAmplitude: float
+        smallest peak to trough change considered an oscillation
+
+    Returns
+    -------
+    PeriodResult
+    """
+    if isinstance(model, str):
+        roadrunner = loadModel(model)
+    else:
+        roadrunner = model
+        roadrunner.resetAll()
+    if parameterDct is not None:
+        for name, value in parameterDct.items():
+            roadrunner[name] = value
+    selections = ["time", "[%s]" % molecule]
+    detector = PeriodDetector(tolerance=tolerance,
+          numStablePeriod=numStablePeriod, minAmplitude=minAmplitude)
+    numPoint = max(int(chunkTime*pointsPerTime), 2) + 1
+    chunkStart = startTime
+    while chunkStart < maxTime:
+        chunkEnd = min(chunkStart + chunkTime, maxTime)
+        data = roadrunner.simulate(chunkStart, chunkEnd, numPoint,
+              selections=selections)
+        times = np.array(data[:, 0])
+        isAfterTransient = times >= startTime + transientTime
+        detector.update(times[isAfterTransient], np.array(data[isAfterTransient, 1]))
+        chunkStart = chunkEnd
+        if detector.isStable():
+            break
+    return detector.getResult(chunkStart)
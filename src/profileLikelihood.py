@@ -0,0 +1,325 @@
+"""
+Confidence intervals of fitted parameters from profile likelihoods.
+
+The profile of a parameter is the smallest SSR at each of its values
+when the other parameters are fitted. With normally distributed errors
+of unknown variance, the likelihood ratio statistic of the profile is
+    n*log(SSR/SSRmin)
+for n observations, and values for which the statistic is below the
+chi-square quantile with one degree of freedom are in the confidence
+interval.
+
+ProfileLikelihood starts at the fitted values (refined by least squares)
+and steps outward in both directions from the optimum of each parameter
+(in log space for parameters with positive bounds). The step size adapts
+to the change of the statistic. At each step the other parameters are
+fitted by least squares starting from their values at the previous step,
+and the profile stops once the statistic exceeds the threshold. Profiles
+of different parameters run in a pool of worker processes.
+
+The identifiability of a parameter is
+  identifiable: the interval is bounded on both sides
+  practicallyNonIdentifiable: the statistic stays below the threshold
+      up to a bound of the parameter on at least one side
+  structurallyNonIdentifiable: the profile is flat
+
+    with ProfileLikelihood(LINEAR_PATHWAY_MODEL, LINEAR_PATHWAY_DF,
+          {"k1": 1, "k2": 2, "k3": 3, "k4": 4}, numProcess=4) as profile:
+        df = profile.calculateProfiles()  # value, lower, upper, flag, seconds
+    profile.profileDct["k1"].profileDF  # for plots of the profile
+"""
+
+from src.landscape import getObjective
+from src.multiFidelity import SSRObjective, TIME, getObservedDF
+from src.reparameterization import ParameterSpace
+from src.sharedData import SharedDataPool
+from src.simulator import getModelString
+
+import collections
+import time
+
+import numpy as np
+import pandas as pd
+from scipy.optimize import least_squares
+from scipy.stats import chi2
+
+# Constants
+CONFIDENCE_LEVEL = 0.95
+INITIAL_STEP = 0.01  # Step in search coordinates
+MAX_NUM_STEP = 30  # Steps in each direction
+FLAT_FRACTION = 0.01  # Largest statistic of a flat profile/threshold
+FAILED_RESIDUAL = 1e5
+IDENTIFIABLE = "identifiable"
+PRACTICALLY_NON_IDENTIFIABLE = "practicallyNonIdentifiable"
+STRUCTURALLY_NON_IDENTIFIABLE = "structurallyNonIdentifiable"
+PARAMETER = "parameter"
+VALUE = "value"
+LOWER = "lower"
+UPPER = "upper"
+FLAG = "flag"
+SSR = "ssr"
+STATISTIC = "statistic"
+SECONDS = "seconds"
+NUM_SIMULATION = "numSimulation"
+
+# Profile of a parameter
+#   name: str
+#   profileDF: pd.DataFrame
+#     columns: parameter names, ssr, statistic; sorted by the parameter
+#   lower: float (lower end of the confidence interval)
+#   upper: float
+#   flag: str (identifiability)
+#   seconds: float
+#   numSimulation: int
+ProfileResult = collections.namedtuple("ProfileResult",
+      "name profileDF lower upper flag seconds numSimulation")
+
+
+def _fitFree(objective, space, fixedIdx, fixedValue, initialArr):
+    """
+    Fits the parameters other than a fixed parameter by least squares in
+    search coordinates.
+
+    Parameters
+    ----------
+    objective: SSRObjective
+    space: ParameterSpace
+    fixedIdx: int
+        index of the fixed parameter (None if all are fitted)
+    fixedValue: float
+        search coordinate of the fixed parameter
+    initialArr: np.array (parameters)
+        search coordinates of all parameters
+
+    Returns
+    -------
+    np.array (parameters)
+        search coordinates
+    float
+        SSR
+    """
+    searchArr = np.array(initialArr, dtype=float)
+    freeIdxs = [i for i in range(len(searchArr)) if i != fixedIdx]
+    if fixedIdx is not None:
+        searchArr[fixedIdx] = fixedValue
+    numResidual = objective.observedArr.size
+    def calculateResiduals(freeArr):
+        searchArr[freeIdxs] = freeArr
+        arr = objective.simulate(space.toValues(searchArr))
+        if (arr is None) or (not np.all(np.isfinite(arr))):
+            return np.repeat(FAILED_RESIDUAL, numResidual)
+        return (objective.observedArr - arr).flatten()
+    if len(freeIdxs) > 0:
+        lowers, uppers = space.searchBounds[freeIdxs].T
+        result = least_squares(calculateResiduals,
+              np.clip(searchArr[freeIdxs], lowers, uppers),
+              bounds=(lowers, uppers), xtol=1e-6, ftol=1e-8)
+        searchArr[freeIdxs] = result.x
+    residuals = calculateResiduals(searchArr[freeIdxs])
+    return searchArr.copy(), float(np.sum(residuals**2))
+
+def _calculateProfile(objective, space, idx, optimumArr, minSSR, threshold,
+      initialStep=INITIAL_STEP, maxNumStep=MAX_NUM_STEP):
+    """
+    Calculates the profile of a parameter.
+
+    Parameters
+    ----------
+    objective: SSRObjective
+    space: ParameterSpace
+    idx: int
+        index of the profiled parameter
+    optimumArr: np.array (parameters)
+        search coordinates of the optimum
+    minSSR: float
+    threshold: float
+        statistic at the end of the confidence interval
+    initialStep: float
+    maxNumStep: int
+
+    Returns
+    -------
+    ProfileResult
+    """
+    startSeconds = time.time()
+    startSimulation = objective.numSimulation
+    numObservation = objective.observedArr.size
+    def calculateStatistic(ssr):
+        return numObservation*np.log(ssr/minSSR)
+    lower, upper = space.searchBounds[idx]
+    pointArrs = [optimumArr]
+    ssrs = [minSSR]
+    ends = []  # (search coordinate, isCrossed) in each direction
+    for direction in [-1, 1]:
+        searchArr = optimumArr
+        step = initialStep
+        lastStatistic = 0.0
+        end = (upper if direction > 0 else lower, False)
+        for _ in range(maxNumStep):
+            value = np.clip(searchArr[idx] + direction*step, lower, upper)
+            if value == searchArr[idx]:
+                break
+            newArr, ssr = _fitFree(objective, space, idx, value, searchArr)
+            statistic = calculateStatistic(ssr)
+            pointArrs.append(newArr)
+            ssrs.append(ssr)
+            if statistic > threshold:
+                # Interpolate the end of the interval. The root of the
+                # statistic is nearly linear near the optimum.
+                fraction = (np.sqrt(threshold) - np.sqrt(lastStatistic))  \
+                      /(np.sqrt(statistic) - np.sqrt(lastStatistic))
+                end = (searchArr[idx] + fraction*(value - searchArr[idx]), True)
+                break
+            # Adapt the step to the change of the statistic
+            change = statistic - lastStatistic
+            if change < threshold/10:
+                step *= 2
+            elif change > threshold/3:
+                step /= 2
+            searchArr = newArr
+            lastStatistic = max(statistic, 0)
+        ends.append(end)
+    statistics = calculateStatistic(np.array(ssrs))
+    if all(isCrossed for _, isCrossed in ends):
+        flag = IDENTIFIABLE
+    elif np.max(statistics) < FLAT_FRACTION*threshold:
+        flag = STRUCTURALLY_NON_IDENTIFIABLE
+    else:
+        flag = PRACTICALLY_NON_IDENTIFIABLE
+    profileDF = pd.DataFrame(space.toValues(np.array(pointArrs)),
+          columns=space.names)
+    profileDF[SSR] = ssrs
+    profileDF[STATISTIC] = statistics
+    profileDF = profileDF.sort_values(space.names[idx]).reset_index(drop=True)
+    endArr = np.tile(optimumArr, (2, 1))
+    endArr[:, idx] = [e for e, _ in ends]
+    endValues = space.toValues(endArr)[:, idx]
+    return ProfileResult(name=space.names[idx], profileDF=profileDF,
+          lower=endValues[0], upper=endValues[1], flag=flag,
+          seconds=time.time() - startSeconds,
+          numSimulation=objective.numSimulation - startSimulation)
+
+def _calculateProfileTask(args):
+    """
+    Calculates a profile in a worker process.
+
+    Parameters
+    ----------
+    args: tuple
+        modelStr, descriptor, columns, space, idx, optimumArr, minSSR,
+        threshold, initialStep, maxNumStep
+
+    Returns
+    -------
+    ProfileResult
+    """
+    modelStr, descriptor, columns, space, idx, optimumArr, minSSR,  \
+          threshold, initialStep, maxNumStep = args
+    objective = getObjective(modelStr, descriptor, space.names, columns)
+    return _calculateProfile(objective, space, idx, optimumArr, minSSR,
+          threshold, initialStep=initialStep, maxNumStep=maxNumStep)
+
+
+class ProfileLikelihood(SharedDataPool):
+    """
+    Profile likelihoods of fitted parameters.
+    """
+
+    def __init__(self, model, observedData, valueDct, boundsDct=None,
+          columns=None, confidenceLevel=CONFIDENCE_LEVEL,
+          initialStep=INITIAL_STEP, maxNumStep=MAX_NUM_STEP, numProcess=1):
+        """
+        Parameters
+        ----------
+        model: str/ExtendedRoadRunner
+        observedData: pd.DataFrame/NamedTimeseries/str
+            str: path to CSV file
+        valueDct: dict
+            key: name of a fitted parameter, value: fitted value
+        boundsDct: dict
+            key: parameter name, value: (lower, upper)
+            default: value/100, value*100 (reparameterization.BOUND_FACTOR)
+        columns: list-str
+            observed columns that are fitted (default: all but time)
+        confidenceLevel: float
+        initialStep: float
+            first step of a profile in search coordinates (decades for
+            parameters in log space)
+        maxNumStep: int
+            largest number of steps in each direction
+        numProcess: int
+            number of worker processes; 1 runs in the current process
+        """
+        self.modelStr = getModelString(model)
+        self.observedDF = getObservedDF(observedData).astype(float)
+        if columns is None:
+            columns = [c for c in self.observedDF.columns if c != TIME]
+        self.columns = list(columns)
+        self.space = ParameterSpace.fromValues(valueDct, boundsDct=boundsDct)
+        self.objective = SSRObjective(self.modelStr, self.observedDF,
+              self.space.names, columns=self.columns)
+        self.threshold = chi2.ppf(confidenceLevel, 1)
+        self.initialStep = initialStep
+        self.maxNumStep = maxNumStep
+        self.numProcess = numProcess
+        self.optimumArr = self.space.toSearch(list(valueDct.values()))
+        self.valueDct = dict(valueDct)
+        self.ssr = None
+        self.profileDct = {}
+
+    def fitOptimum(self):
+        """
+        Refines the fitted values by least squares so that the profiles
+        start at a minimum of the SSR.
+
+        Returns
+        -------
+        dict
+            key: parameter name, value: fitted value
+        """
+        self.optimumArr, self.ssr = _fitFree(self.objective, self.space,
+              None, None, self.optimumArr)
+        self.valueDct = dict(zip(self.space.names,
+              self.space.toValues(self.optimumArr)))
+        return self.valueDct
+
+    def calculateProfiles(self, names=None):
+        """
+        Calculates the profiles of parameters.
+
+        Parameters
+        ----------
+        names: list-str
+            default: all fitted parameters
+
+        Returns
+        -------
+        pd.DataFrame
+            index: parameter
+            columns: value, lower, upper, flag, seconds, numSimulation
+        """
+        if self.ssr is None:
+            self.fitOptimum()
+        if names is None:
+            names = self.space.names
+        idxs = [self.space.names.index(n) for n in names]
+        if self.numProcess == 1:
+            results = [_calculateProfile(self.objective, self.space, i,
+                  self.optimumArr, self.ssr, self.threshold,
+                  initialStep=self.initialStep, maxNumStep=self.maxNumStep)
+                  for i in idxs]
+        else:
+            pool = self._getPool()
+            argss = [(self.modelStr, self._descriptor, self.columns,
+                  self.space, i, self.optimumArr, self.ssr, self.threshold,
+                  self.initialStep, self.maxNumStep) for i in idxs]
+            results = pool.map(_calculateProfileTask, argss)
+        resultDcts = []
+        for result in results:
+            self.profileDct[result.name] = result
+            resultDcts.append({PARAMETER: result.name,
+                  VALUE: self.valueDct[result.name], LOWER: result.lower,
+                  UPPER: result.upper, FLAG: result.flag,
+                  SECONDS: result.seconds,
+                  NUM_SIMULATION: result.numSimulation})
+        return pd.DataFrame(resultDcts).set_index(PARAMETER)
@@ -0,0 +1,421 @@
+"""
+Log-space reparameterization and adaptive bounds for parameter fitting.
+
+The parameters of Wolf range from about 1 (J1_Ki) to 76411 (J4_kp), and
+WOLF_PARAMETERS bounds all of them by [0, 1e5]. Differential evolution
+samples such bounds uniformly, so almost all trials have values in the
+thousands. Searching log10 of the values gives every decade the same
+weight (Part-3 of the parameter fitting notebooks does this by hand).
+
+ParameterSpace converts between the values of parameters and the
+coordinates searched by the optimizer. A parameter with lower >= 0 and
+upper > 0 is searched in log space. A lower bound of 0 (which
+SBstoat.Parameter stores as -0.001) is replaced by minRatio*upper.
+ParameterSpace.fromValues constructs the space around fitted values for
+the analyses of uncertainty (profile likelihoods, posterior sampling).
+
+AdaptiveFitter runs differential evolution in stages. After an
+exploratory stage of numExplorationGeneration generations, the bounds
+are tightened to the region spanned by the best members (the elite)
+plus a margin, and the next stage starts from the elite and new members
+sampled in the tightened bounds. The last stage runs until convergence.
+
+    fitter = AdaptiveFitter(WOLF_MODEL, WOLF_DF, WOLF_PARAMETERS)
+    fitter.fitModel()
+    print(fitter.reportFit())
+    fitter.stageDF  # generations, simulations and bounds width of stages
+"""
+
+from src import differentialEvolution
+from src.multiFidelity import SSRObjective, getObservedDF
+
+import collections
+import time
+
+import numpy as np
+import pandas as pd
+from scipy.stats import qmc
+
+# Constants
+PARAMETER_LOWER_BOUND = 0  # Defaults of SBstoat
+PARAMETER_UPPER_BOUND = 10
+ZERO_LOWER_BOUND = -0.001  # SBstoat.Parameter replaces a lower bound of 0
+MIN_RATIO = 1e-6  # Smallest lower bound/upper bound in log space
+MIN_WIDTH = 0.01  # Smallest width of tightened bounds/width of bounds
+BOUND_FACTOR = 100  # Default bounds are value/BOUND_FACTOR, value*BOUND_FACTOR
+STAGE = "stage"
+NUM_GENERATION = "numGeneration"
+NUM_SIMULATION = "numSimulation"
+SSR = "ssr"
+WIDTH = "width"
+SECONDS = "seconds"
+METHOD = "method"
+LINEAR = "linear"
+LOG_SCALE = "logScale"
+ADAPTIVE = "adaptive"
+
+# Bounds of a parameter given by name
+_Bound = collections.namedtuple("_Bound", "name lower upper")
+
+
+class ParameterSpace(object):
+    """
+    Coordinates of the parameter search.
+    """
+
+    def __init__(self, names, bounds, isLogs):
+        """
+        Parameters
+        ----------
+        names: list-str
+        bounds: list-(float, float)
+            bounds of the values of the parameters
+        isLogs: list-bool
+            parameter is searched in log10 space
+        """
+        self.names = list(names)
+        self.bounds = np.array(bounds, dtype=float)
+        self.isLogs = np.array(isLogs, dtype=bool)
+        if np.any(self.bounds[self.isLogs, 0] <= 0):
+            raise ValueError("Parameters in log space must have positive bounds.")
+        self.searchBounds = self.bounds.copy()
+        self.searchBounds[self.isLogs] = np.log10(self.bounds[self.isLogs])
+
+    @classmethod
+    def fromParameters(cls, parametersToFit,
+          parameterLowerBound=PARAMETER_LOWER_BOUND,
+          parameterUpperBound=PARAMETER_UPPER_BOUND, isLogScale=True,
+          minRatio=MIN_RATIO):
+        """
+        Constructs the space of parameters given in the format of
+        SBstoat's ModelFitter.
+
+        Parameters
+        ----------
+        parametersToFit: list-str/list-SBstoat.Parameter
+        parameterLowerBound: float
+            lower bound of parameters given by name
+        parameterUpperBound: float
+            upper bound of parameters given by name
+        isLogScale: bool
+            search positive-bounded parameters in log space
+        minRatio: float
+            lower bound of 0 is replaced by minRatio*upper in log space
+
+        Returns
+        -------
+        ParameterSpace
+        """
+        names = []
+        bounds = []
+        isLogs = []
+        for parameter in parametersToFit:
+            if isinstance(parameter, str):
+                name = parameter
+                lower, upper = parameterLowerBound, parameterUpperBound
+            else:
+                name = parameter.name
+                lower, upper = parameter.lower, parameter.upper
+            isLog = isLogScale and (lower >= ZERO_LOWER_BOUND) and (upper > 0)
+            if isLog:
+                lower = max(lower, minRatio*upper)
+            names.append(name)
+            bounds.append((lower, upper))
+            isLogs.append(isLog)
+        return cls(names, bounds, isLogs)
+
+    @classmethod
+    def fromValues(cls, valueDct, boundsDct=None, boundFactor=BOUND_FACTOR,
+          isLogScale=True, minRatio=MIN_RATIO):
+        """
+        Constructs the space of parameters around their values.
+
+        Parameters
+        ----------
+        valueDct: dict
+            key: parameter name, value: value (e.g., fitted value)
+        boundsDct: dict
+            key: parameter name, value: (lower, upper)
+            default: value/boundFactor, value*boundFactor
+        boundFactor: float
+        isLogScale: bool
+            search positive-bounded parameters in log space
+        minRatio: float
+            lower bound of 0 is replaced by minRatio*upper in log space
+
+        Returns
+        -------
+        ParameterSpace
+        """
+        if boundsDct is None:
+            boundsDct = {}
+        bounds = []
+        for name, value in valueDct.items():
+            if name in boundsDct:
+                lower, upper = boundsDct[name]
+            else:
+                lower, upper = sorted([value/boundFactor, value*boundFactor])
+            bounds.append(_Bound(name=name, lower=lower, upper=upper))
+        return cls.fromParameters(bounds, isLogScale=isLogScale,
+              minRatio=minRatio)
+
+    def toValues(self, searchArr):
+        """
+        Converts search coordinates to parameter values.
+
+        Parameters
+        ----------
+        searchArr: np.array (parameters)/(points, parameters)
+
+        Returns
+        -------
+        np.array
+        """
+        arr = np.array(searchArr, dtype=float)
+        arr[..., self.isLogs] = 10**arr[..., self.isLogs]
+        return arr
+
+    def toSearch(self, valueArr):
+        """
+        Converts parameter values to search coordinates.
+
+        Parameters
+        ----------
+        valueArr: np.array (parameters)/(points, parameters)
+
+        Returns
+        -------
+        np.array
+        """
+        arr = np.clip(np.array(valueArr, dtype=float), self.bounds[:, 0],
+              self.bounds[:, 1])
+        arr[..., self.isLogs] = np.log10(arr[..., self.isLogs])
+        return arr
+
+
+def tightenBounds(searchBounds, population, energies, eliteFraction=0.2,
+      margin=1.0, originalBounds=None):
+    """
+    Tightens bounds to the region of the best members of a population.
+
+    Parameters
+    ----------
+    searchBounds: np.array (parameters, 2)
+    population: np.array (members, parameters)
+    energies: np.array (members)
+    eliteFraction: float
+        fraction of the members that determine the region
+    margin: float
+        fraction of the width of the region added on each side
+    originalBounds: np.array (parameters, 2)
+        tightened bounds are within these (default: searchBounds)
+
+    Returns
+    -------
+    np.array (parameters, 2)
+    """
+    searchBounds = np.array(searchBounds, dtype=float)
+    if originalBounds is None:
+        originalBounds = searchBounds
+    originalBounds = np.array(originalBounds, dtype=float)
+    numElite = max(2, int(np.ceil(eliteFraction*len(population))))
+    eliteArr = population[np.argsort(energies)[:numElite]]
+    lowers, uppers = np.min(eliteArr, axis=0), np.max(eliteArr, axis=0)
+    widths = np.maximum(uppers - lowers,
+          MIN_WIDTH*(originalBounds[:, 1] - originalBounds[:, 0]))
+    newBounds = np.column_stack([lowers - margin*widths, uppers + margin*widths])
+    newBounds[:, 0] = np.maximum(newBounds[:, 0], originalBounds[:, 0])
+    newBounds[:, 1] = np.minimum(newBounds[:, 1], originalBounds[:, 1])
+    return newBounds
+
+
+class AdaptiveFitter(object):
+    """
+    Fits parameters with differential evolution in log space with
+    adaptively tightened bounds.
+    """
+
+    def __init__(self, modelSpecification, observedData, parametersToFit,
+          parameterLowerBound=PARAMETER_LOWER_BOUND,
+          parameterUpperBound=PARAMETER_UPPER_BOUND, selectedColumns=None,
+          isLogScale=True, numTightening=2, numExplorationGeneration=10,
+          eliteFraction=0.2, margin=1.0, popsize=15, maxGeneration=1000,
+          tol=0.01, seed=None):
+        """
+        Parameters
+        ----------
+        modelSpecification: ExtendedRoadRunner/str
+        observedData: pd.DataFrame/NamedTimeseries/str
+            str: path to CSV file
+        parametersToFit: list-str/list-SBstoat.Parameter
+        parameterLowerBound: float
+            lower bound of parameters given by name
+        parameterUpperBound: float
+            upper bound of parameters given by name
+        selectedColumns: list-str
+            observed columns that are fitted (default: all)
+        isLogScale: bool
+            search positive-bounded parameters in log space
+        numTightening: int
+            number of times that bounds are tightened
+        numExplorationGeneration: int
+            generations of differential evolution before a tightening
+        eliteFraction: float
+            fraction of the population that determines tightened bounds
+        margin: float
+            fraction of the width of the elite added to tightened bounds
+        popsize: int
+        maxGeneration: int
+            total generations of all stages
+        tol: float
+            convergence tolerance of differential evolution
+        seed: int
+        """
+        self.space = ParameterSpace.fromParameters(parametersToFit,
+              parameterLowerBound=parameterLowerBound,
+              parameterUpperBound=parameterUpperBound, isLogScale=isLogScale)
+        self.parameterNames = self.space.names
+        self.objective = SSRObjective(modelSpecification,
+              getObservedDF(observedData), self.parameterNames,
+              columns=selectedColumns)
+        self.numTightening = numTightening
+        self.numExplorationGeneration = numExplorationGeneration
+        self.eliteFraction = eliteFraction
+        self.margin = margin
+        self.popsize = popsize
+        self.maxGeneration = maxGeneration
+        self.tol = tol
+        self.seed = seed
+        # Results of fitModel
+        self.valueDct = None
+        self.ssr = None
+        self.bounds = None
+        self.stageDF = None
+        self.seconds = None
+
+    @property
+    def numSimulation(self):
+        return self.objective.numSimulation
+
+    @property
+    def numGeneration(self):
+        if self.stageDF is None:
+            return 0
+        return int(self.stageDF[NUM_GENERATION].sum())
+
+    def _calculateSSR(self, searchValues):
+        return self.objective(self.space.toValues(searchValues))
+
+    def _makePopulation(self, searchBounds, population, energies, rng):
+        """
+        Keeps the elite that is within the bounds and samples the other
+        members in the bounds.
+        """
+        numElite = max(2, int(np.ceil(self.eliteFraction*len(population))))
+        eliteArr = population[np.argsort(energies)[:numElite]]
+        isInside = np.all((eliteArr >= searchBounds[:, 0])
+              & (eliteArr <= searchBounds[:, 1]), axis=1)
+        eliteArr = eliteArr[isInside]
+        sampler = qmc.LatinHypercube(d=len(searchBounds), seed=rng)
+        sampleArr = qmc.scale(sampler.random(len(population) - len(eliteArr)),
+              searchBounds[:, 0], searchBounds[:, 1])
+        return np.vstack([eliteArr, sampleArr])
+
+    def fitModel(self):
+        """
+        Fits the parameters.
+        """
+        rng = np.random.default_rng(self.seed)
+        searchBounds = self.space.searchBounds
+        init = None
+        numGeneration = 0
+        stageDcts = []
+        startSeconds = time.time()
+        for stage in range(self.numTightening + 1):
+            startSimulation = self.numSimulation
+            maxGeneration = self.maxGeneration - numGeneration
+            if stage < self.numTightening:
+                maxGeneration = min(maxGeneration, self.numExplorationGeneration)
+            result = differentialEvolution.minimize(searchBounds,
+                  function=self._calculateSSR, init=init, popsize=self.popsize,
+                  maxGeneration=maxGeneration, tol=self.tol, seed=rng)
+            numGeneration += result.numGeneration
+            width = np.mean((searchBounds[:, 1] - searchBounds[:, 0])
+                  /(self.space.searchBounds[:, 1] - self.space.searchBounds[:, 0]))
+            stageDcts.append({STAGE: stage, NUM_GENERATION: result.numGeneration,
+                  NUM_SIMULATION: self.numSimulation - startSimulation,
+                  SSR: result.fun, WIDTH: width})
+            if result.isConverged or (numGeneration >= self.maxGeneration)  \
+                  or (stage == self.numTightening):
+                break
+            # The population of minimize is in search coordinates
+            searchBounds = tightenBounds(searchBounds, result.population,
+                  result.populationEnergies, eliteFraction=self.eliteFraction,
+                  margin=self.margin, originalBounds=self.space.searchBounds)
+            init = self._makePopulation(searchBounds, result.population,
+                  result.populationEnergies, rng)
+        self.seconds = time.time() - startSeconds
+        self.stageDF = pd.DataFrame(stageDcts).set_index(STAGE)
+        self.bounds = self.space.toValues(searchBounds.T).T
+        self.valueDct = dict(zip(self.parameterNames,
+              self.space.toValues(result.x)))
+        self.ssr = result.fun
+
+    def reportFit(self):
+        """
+        Describes the fit.
+
+        Returns
+        -------
+        str
+        """
+        if self.stageDF is None:
+            raise ValueError("Must do fitModel before reportFit.")
+        lines = ["[[Variables]]"]
+        for name, value, isLog, (lower, upper) in zip(self.parameterNames,
+              self.valueDct.values(), self.space.isLogs, self.bounds):
+            scale = "log" if isLog else "linear"
+            lines.append("    %s: %g (%s, bounds [%g, %g])" % (name, value,
+                  scale, lower, upper))
+        lines.append("[[Fit Statistics]]")
+        lines.append("    ssr: %g" % self.ssr)
+        lines.append("    stages: %d" % len(self.stageDF))
+        lines.append("    generations: %d" % self.numGeneration)
+        lines.append("    simulations: %d" % self.numSimulation)
+        return "\n".join(lines)
+
+
+def compareReparameterization(modelSpecification, observedData,
+      parametersToFit, **kwargs):
+    """
+    Fits parameters in linear space, in log space, and in log space with
+    adaptive bounds.
+
+    Parameters
+    ----------
+    modelSpecification: ExtendedRoadRunner/str
+    observedData: pd.DataFrame/NamedTimeseries/str
+    parametersToFit: list-str/list-SBstoat.Parameter
+    kwargs: dict
+        optional arguments for AdaptiveFitter
+
+    Returns
+    -------
+    pd.DataFrame
+        index: method (linear, logScale, adaptive)
+        columns: numGeneration, numSimulation, ssr, seconds, parameter names
+    """
+    numTightening = kwargs.pop("numTightening", 2)
+    resultDcts = []
+    for method, isLogScale, num in [(LINEAR, False, 0), (LOG_SCALE, True, 0),
+          (ADAPTIVE, True, numTightening)]:
+        fitter = AdaptiveFitter(modelSpecification, observedData,
+              parametersToFit, isLogScale=isLogScale, numTightening=num,
+              **kwargs)
+        fitter.fitModel()
+        resultDct = {METHOD: method, NUM_GENERATION: fitter.numGeneration,
+              NUM_SIMULATION: fitter.numSimulation, SSR: fitter.ssr,
+              SECONDS: fitter.seconds}
+        resultDct.update(fitter.valueDct)
+        resultDcts.append(resultDct)
+    return pd.DataFrame(resultDcts).set_index(METHOD)
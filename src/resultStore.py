@@ -0,0 +1,163 @@
+"""
+Append-only store of results kept in a local SQLite database.
+
+Results are written as soon as they are available so that long running
+studies (e.g., cross validation with many folds) can be resumed after
+an interruption by skipping the entries that are already present.
+"""
+
+import contextlib
+import json
+import os
+import sqlite3
+import time
+
+import numpy as np
+import pandas as pd
+
+KEY = "key"
+TIMESTAMP = "timestamp"
+DEFAULT_TABLE = "results"
+
+
+class ResultStore(object):
+    """
+    Append-only collection of keyed results. Each result is a dictionary
+    of values that can be serialized as JSON (numpy scalars and arrays
+    are converted).
+    """
+
+    def __init__(self, path, table=DEFAULT_TABLE):
+        """
+        Parameters
+        ----------
+        path: str
+            path to the SQLite file; created if it does not exist
+        table: str
+            name of the table in which results are stored
+        """
+        if not table.isidentifier():
+            raise ValueError("Invalid table name: %s" % table)
+        self.path = path
+        self.table = table
+        dirname = os.path.dirname(os.path.abspath(path))
+        if not os.path.isdir(dirname):
+            os.makedirs(dirname)
+        with self._connect() as connection:
+            connection.execute(
+                  "CREATE TABLE IF NOT EXISTS %s (%s TEXT PRIMARY KEY, %s REAL, value TEXT)"
+                  % (self.table, KEY, TIMESTAMP))
+
+    @contextlib.contextmanager
+    def _connect(self):
+        """
+        Provides a connection that commits (or rolls back) the
+        transaction and is closed on exit.
+        """
+        with contextlib.closing(sqlite3.connect(self.path,
+              timeout=60)) as connection:
+            with connection:
+                yield connection
+
+    @staticmethod
+    def _toSerializable(value):
+        if isinstance(value, dict):
+            return {str(k): ResultStore._toSerializable(v)
+                  for k, v in value.items()}
+        if isinstance(value, np.ndarray):
+            return np.asarray(value).tolist()
+        if isinstance(value, (list, tuple)):
+            return [ResultStore._toSerializable(v) for v in value]
+        if isinstance(value, np.generic):
+            return value.item()
+        return value
+
+    def append(self, key, resultDct):
+        """
+        Adds a result. The result is committed before returning.
+
+        Parameters
+        ----------
+        key: str
+        resultDct: dict
+        """
+        valueStr = json.dumps(self._toSerializable(resultDct))
+        try:
+            with self._connect() as connection:
+                connection.execute("INSERT INTO %s VALUES (?, ?, ?)"
+                      % self.table, (str(key), time.time(), valueStr))
+        except sqlite3.IntegrityError:
+            raise ValueError("Result already stored for key: %s" % key)
+
+    def has(self, key):
+        """
+        Checks if there is a result for the key.
+
+        Parameters
+        ----------
+        key: str
+
+        Returns
+        -------
+        bool
+        """
+        with self._connect() as connection:
+            row = connection.execute("SELECT 1 FROM %s WHERE %s = ?"
+                  % (self.table, KEY), (str(key),)).fetchone()
+        return row is not None
+
+    def get(self, key):
+        """
+        Retrieves the result for the key.
+
+        Parameters
+        ----------
+        key: str
+
+        Returns
+        -------
+        dict
+        """
+        with self._connect() as connection:
+            row = connection.execute("SELECT value FROM %s WHERE %s = ?"
+                  % (self.table, KEY), (str(key),)).fetchone()
+        if row is None:
+            raise KeyError(key)
+        return json.loads(row[0])
+
+    def getKeys(self):
+        """
+        Returns
+        -------
+        list-str
+            keys in the order in which results were appended
+        """
+        with self._connect() as connection:
+            rows = connection.execute("SELECT %s FROM %s ORDER BY rowid"
+                  % (KEY, self.table)).fetchall()
+        return [r[0] for r in rows]
+
+    def __len__(self):
+        return len(self.getKeys())
+
+    def toDataframe(self):
+        """
+        Constructs a dataframe of all results.
+
+        Returns
+        -------
+        pd.DataFrame
+            index: key
+            columns: timestamp, entries of the result dictionaries
+        """
+        with self._connect() as connection:
+            rows = connection.execute("SELECT %s, %s, value FROM %s ORDER BY rowid"
+                  % (KEY, TIMESTAMP, self.table)).fetchall()
+        dcts = []
+        for key, timestamp, valueStr in rows:
+            dct = {KEY: key, TIMESTAMP: timestamp}
+            dct.update(json.loads(valueStr))
+            dcts.append(dct)
+        if len(dcts) == 0:
+            return pd.DataFrame(columns=[TIMESTAMP], index=pd.Index([], name=KEY))
+        return pd.DataFrame(dcts).set_index(KEY)
@@ -0,0 +1,231 @@
+"""
+Robustness of qualitative properties to perturbations of parameters.
+
+Validation tests such as the ordering of concentrations in the Wolf model
+are usually checked for the nominal parameter values. calculateRobustness
+samples parameters uniformly in [-maxPercent, maxPercent] percent of their
+nominal values, simulates the samples in parallel with BatchSimulator,
+and reports the fraction of samples for which each property holds.
+
+Samples are generated, simulated, and evaluated one batch at a time and
+only the counts of passes are kept, so memory does not grow with the
+number of samples. Properties are described by Property objects that
+reduce simulation results (runs, times, species) to one bool per run,
+typically using the vectorized checks in src.shapeChecks.
+"""
+
+from src import designs
+from src import shapeChecks
+from src.resultStore import ResultStore
+from src.simulator import BatchSimulator
+
+import collections
+import numpy as np
+import pandas as pd
+
+# Constants
+PROPERTY = "property"
+NUM_PASS = "numPass"
+NUM_RUN = "numRun"
+PASS_FRACTION = "passFraction"
+STD_ERROR = "stdError"
+
+# Qualitative property of a simulation
+#   name: str
+#   function: Function
+#     parameters: np.array (runs, times, species), BatchSimulator
+#     returns: np.array-bool (runs)
+#   key: str
+#     identifies the check in checkpoints (default: name)
+Property = collections.namedtuple("Property", "name function key",
+      defaults=[None])
+
+
+def _getValues(arr, simulator, molecule):
+    # Trajectories of a molecule (runs, times)
+    return arr[:, :, simulator.molecules.index(molecule)]
+
+def makeLargerProperty(molecule1, molecule2, fractionTrue=1.0, startIdx=0):
+    """
+    Property that molecule1 is larger than molecule2 for at least
+    fractionTrue of the times from startIdx (isLarger in the exercises).
+
+    Parameters
+    ----------
+    molecule1: str
+    molecule2: str
+    fractionTrue: float in [0, 1]
+    startIdx: int
+
+    Returns
+    -------
+    Property
+    """
+    def function(arr, simulator):
+        idxs = [simulator.molecules.index(m) for m in [molecule1, molecule2]]
+        dominanceArr = shapeChecks.calculateDominanceMatrix(arr[:, :, idxs],
+              startIdx=startIdx)
+        return dominanceArr[:, 0, 1] >= fractionTrue
+    name = "%s>%s" % (molecule1, molecule2)
+    key = "%s(fractionTrue=%s,startIdx=%d)" % (name, fractionTrue, startIdx)
+    return Property(name=name, function=function, key=key)
+
+def makeMonotoneProperty(molecule, direction=1, startIdx=0):
+    """
+    Property that a molecule is monotone from startIdx.
+
+    Parameters
+    ----------
+    molecule: str
+    direction: int
+        1 (increasing), -1 (decreasing)
+    startIdx: int
+
+    Returns
+    -------
+    Property
+    """
+    def function(arr, simulator):
+        values = _getValues(arr, simulator, molecule)[:, startIdx:]
+        return shapeChecks.isMonotone(values, direction=direction)
+    name = "%s_%s" % (molecule, "increasing" if direction > 0 else "decreasing")
+    key = "%s(startIdx=%d)" % (name, startIdx)
+    return Property(name=name, function=function, key=key)
+
+def makeConcaveProperty(molecule, direction=1):
+    """
+    Property that a molecule increases and then decreases
+    (decreases and then increases for direction -1).
+
+    Parameters
+    ----------
+    molecule: str
+    direction: int
+
+    Returns
+    -------
+    Property
+    """
+    def function(arr, simulator):
+        values = _getValues(arr, simulator, molecule)
+        return shapeChecks.isConcave(values, direction=direction)
+    return Property(name="%s_concave" % molecule, function=function,
+          key="%s_concave(direction=%d)" % (molecule, direction))
+
+def makeBoundedProperty(molecule, lower=-np.inf, upper=np.inf):
+    """
+    Property that a molecule is in [lower, upper] at all times.
+
+    Parameters
+    ----------
+    molecule: str
+    lower: float
+    upper: float
+
+    Returns
+    -------
+    Property
+    """
+    def function(arr, simulator):
+        values = _getValues(arr, simulator, molecule)
+        return shapeChecks.isBounded(values, lower=lower, upper=upper)
+    return Property(name="%s_bounded" % molecule, function=function,
+          key="%s_bounded(lower=%s,upper=%s)" % (molecule, lower, upper))
+
+def makeOscillationProperty(molecule, minPeak=2, startIdx=0, tolerance=0):
+    """
+    Property that a molecule has at least minPeak turning points from
+    startIdx.
+
+    Parameters
+    ----------
+    molecule: str
+    minPeak: int
+    startIdx: int
+    tolerance: float
+        changes no larger than this are ignored
+
+    Returns
+    -------
+    Property
+    """
+    def function(arr, simulator):
+        values = _getValues(arr, simulator, molecule)[:, startIdx:]
+        numChange = shapeChecks.countSignChanges(np.diff(values, axis=1),
+              tolerance=tolerance)
+        return numChange >= minPeak
+    key = "%s_oscillates(minPeak=%d,startIdx=%d,tolerance=%s)" % (molecule,
+          minPeak, startIdx, tolerance)
+    return Property(name="%s_oscillates" % molecule, function=function,
+          key=key)
+
+def getPropertyKey(properties):
+    """
+    Identifies a list of properties in checkpoints.
+
+    Parameters
+    ----------
+    properties: list-Property
+
+    Returns
+    -------
+    str
+    """
+    return str([p.name if p.key is None else p.key for p in properties])
+
+def calculateRobustness(model, factors, properties, numSample=1000,
+      maxPercent=10, seed=None, batchSize=1000, numProcess=1, store=None,
+      **kwargs):
+    """
+    Calculates the fraction of parameter perturbations for which
+    properties hold. Runs whose simulation fails do not pass.
+
+    Parameters
+    ----------
+    model: str/ExtendedRoadRunner
+    factors: list-str
+        parameters that are perturbed
+    properties: list-Property
+    numSample: int
+    maxPercent: float
+        largest percent change from the nominal value
+    seed: int
+    batchSize: int
+        number of samples simulated and evaluated together
+    numProcess: int
+    store: ResultStore/str
+        checkpoint for the outcomes of batches
+    kwargs: dict
+        optional arguments for BatchSimulator (e.g., endTime, numPoint)
+
+    Returns
+    -------
+    pd.DataFrame
+        index: property
+        columns: numPass, numRun, passFraction, stdError
+    """
+    if isinstance(store, str):
+        store = ResultStore(store)
+    rng = np.random.default_rng(seed)
+    numPassArr = np.zeros(len(properties), dtype=int)
+    def outputFunction(arr, simulator):
+        return np.transpose([p.function(arr, simulator) for p in properties])
+    with BatchSimulator(model, numProcess=numProcess, **kwargs) as simulator:
+        baseValues = simulator.getParameterValues(factors)
+        for startIdx in range(0, numSample, batchSize):
+            numRun = min(batchSize, numSample - startIdx)
+            designDF = pd.DataFrame(maxPercent*(2*rng.random((numRun,
+                  len(factors))) - 1), columns=factors)
+            valueArr = designs.toParameterValues(designDF, baseValues)
+            outputArr = simulator.evaluate(factors, valueArr, outputFunction,
+                  batchSize=numRun, store=store,
+                  outputKey=getPropertyKey(properties))
+            numPassArr += np.sum(outputArr == 1, axis=0)
+    passFractions = numPassArr/numSample
+    df = pd.DataFrame({
+          NUM_PASS: numPassArr,
+          NUM_RUN: numSample,
+          PASS_FRACTION: passFractions,
+          STD_ERROR: np.sqrt(passFractions*(1 - passFractions)/numSample),
+          }, index=pd.Index([p.name for p in properties], name=PROPERTY))
+    return df
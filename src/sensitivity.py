@@ -0,0 +1,298 @@
+"""
+Global sensitivity analysis of scalar model outputs.
+
+Factors vary in [-maxPercent, maxPercent] percent of their baseline values,
+as in src.designs. Two methods are provided:
+  Morris elementary effects (mu, mu*, sigma)
+  Sobol first order (S1) and total order (ST) indices using the
+  Saltelli sampling scheme and the Jansen estimators.
+
+Model evaluations are done by BatchSimulator.evaluate so that they run in
+parallel and are checkpointed in a ResultStore when a store is provided.
+Outputs are described by Output objects that reduce simulation results
+(runs, times, species) to one value per run.
+"""
+
+from src import designs
+from src import spectral
+from src.simulator import BatchSimulator
+
+import collections
+import numpy as np
+import pandas as pd
+from scipy.stats import qmc
+
+# Constants
+MU = "mu"
+MU_STAR = "muStar"
+SIGMA = "sigma"
+S1 = "S1"
+ST = "ST"
+FACTOR = "factor"
+OUTPUT = "output"
+STATISTIC = "statistic"
+
+# Scalar output of a simulation
+#   name: str
+#   function: Function
+#     parameters: np.array (runs, times, species), BatchSimulator
+#     returns: np.array (runs)
+#   key: str
+#     identifies the calculation in checkpoints (default: name)
+Output = collections.namedtuple("Output", "name function key",
+      defaults=[None])
+
+
+def makePeakFrequencyOutput(molecule, offset=100):
+    """
+    Output that is the peak frequency of a molecule.
+
+    Parameters
+    ----------
+    molecule: str
+    offset: int
+        Initial data that are not included in the FFT calculation
+
+    Returns
+    -------
+    Output
+    """
+    def function(arr, simulator):
+        idx = simulator.molecules.index(molecule)
+        frequencyArr = spectral.calculatePeakFrequencies(arr[:, :, [idx]],
+              simulator.endTime, offset=offset)
+        return frequencyArr[:, 0]
+    return Output(name="%s_frequency" % molecule, function=function,
+          key="%s_frequency(offset=%d)" % (molecule, offset))
+
+def makeFinalConcentrationOutput(molecule):
+    """
+    Output that is the concentration of a molecule at the end time.
+
+    Parameters
+    ----------
+    molecule: str
+
+    Returns
+    -------
+    Output
+    """
+    def function(arr, simulator):
+        idx = simulator.molecules.index(molecule)
+        return arr[:, -1, idx]
+    return Output(name="%s_final" % molecule, function=function)
+
+def getOutputKey(outputs):
+    """
+    Identifies a list of outputs in checkpoints.
+
+    Parameters
+    ----------
+    outputs: list-Output
+
+    Returns
+    -------
+    str
+    """
+    return str([o.name if o.key is None else o.key for o in outputs])
+
+def _evaluate(model, factors, unitArr, outputs, maxPercent, numProcess,
+      batchSize, store, **kwargs):
+    """
+    Evaluates outputs for points in the unit hypercube.
+
+    Returns
+    -------
+    np.array (points, outputs)
+    """
+    designDF = pd.DataFrame(maxPercent*(2*unitArr - 1), columns=factors)
+    with BatchSimulator(model, numProcess=numProcess, **kwargs) as simulator:
+        valueArr = designs.toParameterValues(designDF,
+              simulator.getParameterValues(factors))
+        def outputFunction(arr, batchSimulator):
+            return np.transpose([o.function(arr, batchSimulator) for o in outputs])
+        return simulator.evaluate(factors, valueArr, outputFunction,
+              batchSize=batchSize, store=store, outputKey=getOutputKey(outputs))
+
+def _makeResultDF(factors, outputs, statistics, arrs):
+    # arrs: list (for statistics) of np.array (factors, outputs)
+    columns = pd.MultiIndex.from_product([[o.name for o in outputs], statistics],
+          names=[OUTPUT, STATISTIC])
+    values = np.stack(arrs, axis=2).reshape(len(factors), -1)
+    return pd.DataFrame(values, index=pd.Index(factors, name=FACTOR),
+          columns=columns)
+
+############### MORRIS ###################
+def makeMorrisTrajectories(numFactor, numTrajectory, numLevel=4, seed=None):
+    """
+    Creates Morris trajectories in the unit hypercube. Each trajectory
+    changes one factor at a time by delta = numLevel/(2*(numLevel - 1)).
+
+    Parameters
+    ----------
+    numFactor: int
+    numTrajectory: int
+    numLevel: int
+        number of grid levels (even)
+    seed: int
+
+    Returns
+    -------
+    np.array (numTrajectory, numFactor + 1, numFactor)
+    np.array (numTrajectory, numFactor): index of the factor changed at each step
+    np.array (numTrajectory, numFactor): signed change of each factor
+    float: delta
+    """
+    rng = np.random.default_rng(seed)
+    delta = numLevel/(2.0*(numLevel - 1))
+    grid = np.arange(numLevel)/(numLevel - 1)
+    baseArr = rng.choice(grid, size=(numTrajectory, numFactor))
+    orderArr = np.argsort(rng.random((numTrajectory, numFactor)), axis=1)
+    # Move up if possible, otherwise down
+    stepArr = np.where(baseArr + delta <= 1 + 1e-12, delta, -delta)
+    trajectoryArr = np.repeat(baseArr[:, np.newaxis, :], numFactor + 1, axis=1)
+    # Factor j changes at step position(j) + 1
+    positionArr = np.argsort(orderArr, axis=1)
+    stepIdxs = np.arange(numFactor + 1)[np.newaxis, :, np.newaxis]
+    isChanged = stepIdxs > positionArr[:, np.newaxis, :]
+    trajectoryArr = trajectoryArr + isChanged*stepArr[:, np.newaxis, :]
+    return trajectoryArr, orderArr, stepArr, delta
+
+def calculateMorris(model, factors, outputs, numTrajectory=10, numLevel=4,
+      maxPercent=20, seed=None, numProcess=1, batchSize=100, store=None,
+      **kwargs):
+    """
+    Calculates Morris elementary effect statistics.
+
+    Parameters
+    ----------
+    model: str/ExtendedRoadRunner
+    factors: list-str
+    outputs: list-Output
+    numTrajectory: int
+    numLevel: int
+    maxPercent: float
+    seed: int
+    numProcess: int
+    batchSize: int
+    store: ResultStore/str
+        checkpoint for simulation outputs
+    kwargs: dict
+        optional arguments for BatchSimulator (e.g., endTime, numPoint)
+
+    Returns
+    -------
+    pd.DataFrame
+        index: factor
+        columns: output, statistic (mu, muStar, sigma)
+    """
+    numFactor = len(factors)
+    trajectoryArr, orderArr, stepArr, delta = makeMorrisTrajectories(numFactor,
+          numTrajectory, numLevel=numLevel, seed=seed)
+    unitArr = trajectoryArr.reshape(-1, numFactor)
+    yArr = _evaluate(model, factors, unitArr, outputs, maxPercent, numProcess,
+          batchSize, store, **kwargs)
+    yArr = yArr.reshape(numTrajectory, numFactor + 1, len(outputs))
+    # Elementary effects of the factor changed at each step
+    diffArr = yArr[:, 1:, :] - yArr[:, :-1, :]
+    trajectoryIdxs = np.arange(numTrajectory)[:, np.newaxis]
+    signArr = np.sign(stepArr[trajectoryIdxs, orderArr])
+    stepEffectArr = diffArr*signArr[:, :, np.newaxis]/delta
+    # Arrange by factor
+    effectArr = np.zeros((numTrajectory, numFactor, len(outputs)))
+    effectArr[trajectoryIdxs, orderArr, :] = stepEffectArr
+    muArr = np.nanmean(effectArr, axis=0)
+    muStarArr = np.nanmean(np.abs(effectArr), axis=0)
+    if numTrajectory > 1:
+        sigmaArr = np.nanstd(effectArr, axis=0, ddof=1)
+    else:
+        sigmaArr = np.repeat(np.nan, muArr.size).reshape(muArr.shape)
+    return _makeResultDF(factors, outputs, [MU, MU_STAR, SIGMA],
+          [muArr, muStarArr, sigmaArr])
+
+############### SOBOL ###################
+def makeSaltelliSample(numFactor, numSample, seed=None):
+    """
+    Creates the matrices A, B, and AB_i (A with column i from B).
+
+    Parameters
+    ----------
+    numFactor: int
+    numSample: int
+        number of rows in A (a power of 2)
+    seed: int
+
+    Returns
+    -------
+    np.array (numFactor + 2, numSample, numFactor)
+        A, B, AB_1, ..., AB_numFactor
+    """
+    sampler = qmc.Sobol(d=2*numFactor, seed=seed)
+    sampleArr = sampler.random(numSample)
+    aArr = sampleArr[:, :numFactor]
+    bArr = sampleArr[:, numFactor:]
+    abArr = np.repeat(aArr[np.newaxis, :, :], numFactor, axis=0)
+    factorIdxs = np.arange(numFactor)
+    abArr[factorIdxs, :, factorIdxs] = np.transpose(bArr)
+    return np.concatenate([aArr[np.newaxis], bArr[np.newaxis], abArr])
+
+def calculateSobolIndices(yArr):
+    """
+    Calculates first and total order indices from outputs for a Saltelli sample.
+    Samples with an output of nan are ignored.
+
+    Parameters
+    ----------
+    yArr: np.array (numFactor + 2, numSample, outputs)
+
+    Returns
+    -------
+    np.array (numFactor, outputs): S1
+    np.array (numFactor, outputs): ST
+    """
+    isValid = np.all(np.isfinite(yArr), axis=0)
+    yArr = np.where(isValid[np.newaxis], yArr, np.nan)
+    fA = yArr[0]
+    fB = yArr[1]
+    fAB = yArr[2:]
+    variance = np.nanvar(np.concatenate([fA, fB]), axis=0)
+    s1Arr = np.nanmean(fB*(fAB - fA), axis=1)/variance
+    stArr = 0.5*np.nanmean((fA - fAB)**2, axis=1)/variance
+    return s1Arr, stArr
+
+def calculateSobol(model, factors, outputs, numSample=64, maxPercent=20,
+      seed=None, numProcess=1, batchSize=100, store=None, **kwargs):
+    """
+    Calculates Sobol first and total order indices. Requires
+    numSample*(len(factors) + 2) simulations.
+
+    Parameters
+    ----------
+    model: str/ExtendedRoadRunner
+    factors: list-str
+    outputs: list-Output
+    numSample: int
+        a power of 2
+    maxPercent: float
+    seed: int
+    numProcess: int
+    batchSize: int
+    store: ResultStore/str
+        checkpoint for simulation outputs
+    kwargs: dict
+        optional arguments for BatchSimulator (e.g., endTime, numPoint)
+
+    Returns
+    -------
+    pd.DataFrame
+        index: factor
+        columns: output, statistic (S1, ST)
+    """
+    numFactor = len(factors)
+    sampleArr = makeSaltelliSample(numFactor, numSample, seed=seed)
+    unitArr = sampleArr.reshape(-1, numFactor)
+    yArr = _evaluate(model, factors, unitArr, outputs, maxPercent, numProcess,
+          batchSize, store, **kwargs)
+    yArr = yArr.reshape(numFactor + 2, numSample, len(outputs))
+    s1Arr, stArr = calculateSobolIndices(yArr)
+    return _makeResultDF(factors, outputs, [S1, ST], [s1Arr, stArr])
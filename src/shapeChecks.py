@@ -0,0 +1,225 @@
+"""
+Qualitative checks of the shapes of trajectories for dynamic testing.
+
+These are vectorized versions of the helper functions in the
+Verification and Validation dynamic testing notebook (isMonotone,
+isConcave). Every check takes time linear in the length of the
+trajectories and works on batches: values are an array whose time axis
+is given by the axis argument (the last axis by default), and the result
+has one entry for each trajectory (the shape of the other axes). For the
+batched representation (runs, times, species) of src.spectral, use axis=1.
+calculateDominanceMatrix compares all pairs of species in that
+representation.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def _moveTimeAxis(values, axis):
+    # Array of floats with time as the last axis
+    return np.moveaxis(np.asarray(values, dtype=float), axis, -1)
+
+def isMonotone(values, direction=1, axis=-1):
+    """
+    Checks if trajectories are strictly monotone in the desired direction.
+
+    Parameters
+    ----------
+    values: np.array
+    direction: int
+        1 (increasing), -1 (decreasing)
+    axis: int
+        time axis
+
+    Returns
+    -------
+    bool/np.array-bool
+    """
+    arr = _moveTimeAxis(values, axis)
+    return np.all(direction*np.diff(arr, axis=-1) > 0, axis=-1)
+
+def isConcave(values, direction=1, axis=-1):
+    """
+    Checks if trajectories are unimodal. For direction 1, there must be
+    a split index idx (1 <= idx <= numTime - 3) such that values[:idx] are
+    strictly increasing and values[idx:] are strictly decreasing. This is
+    the condition checked by isConcave in the notebook, which evaluates
+    isMonotone for each split. Here, the prefixes that increase and
+    the suffixes that decrease are found in a single pass.
+
+    Parameters
+    ----------
+    values: np.array
+    direction: int
+        1 (increase then decrease), -1 (decrease then increase)
+    axis: int
+        time axis
+
+    Returns
+    -------
+    bool/np.array-bool
+    """
+    arr = _moveTimeAxis(values, axis)
+    numTime = arr.shape[-1]
+    if numTime < 4:
+        return np.zeros(arr.shape[:-1], dtype=bool)
+    diffArr = direction*np.diff(arr, axis=-1)
+    # isPrefixIncreasing[..., k]: values[:k + 2] increase
+    isPrefixIncreasing = np.logical_and.accumulate(diffArr > 0, axis=-1)
+    # isSuffixDecreasing[..., k]: values[k:] decrease
+    isSuffixDecreasing = np.logical_and.accumulate((diffArr < 0)[..., ::-1],
+          axis=-1)[..., ::-1]
+    # Split idx requires values[:idx] to increase and values[idx:] to decrease
+    isPrefixOk = np.concatenate([np.ones(arr.shape[:-1] + (1,), dtype=bool),
+          isPrefixIncreasing[..., :numTime - 4]], axis=-1)
+    isSuffixOk = isSuffixDecreasing[..., 1:numTime - 2]
+    return np.any(isPrefixOk & isSuffixOk, axis=-1)
+
+def countSignChanges(values, tolerance=0, axis=-1):
+    """
+    Counts the changes in sign of trajectories. Values whose magnitude
+    is no larger than the tolerance are ignored. Counting the sign
+    changes of np.diff(values) provides the number of turning points.
+
+    Parameters
+    ----------
+    values: np.array
+    tolerance: float
+    axis: int
+        time axis
+
+    Returns
+    -------
+    int/np.array-int
+    """
+    arr = _moveTimeAxis(values, axis)
+    signArr = np.where(np.abs(arr) > tolerance, np.sign(arr), 0)
+    # Carry the last non-zero sign forward
+    timeIdxs = np.arange(arr.shape[-1])
+    lastIdxs = np.maximum.accumulate(np.where(signArr != 0, timeIdxs, -1),
+          axis=-1)
+    lastSigns = np.take_along_axis(signArr, np.maximum(lastIdxs, 0), axis=-1)
+    lastSigns = np.where(lastIdxs >= 0, lastSigns, 0)
+    return np.sum(lastSigns[..., 1:]*lastSigns[..., :-1] < 0, axis=-1)
+
+def findLargerIndex(values1, values2, axis=-1):
+    """
+    Finds the first index from which values1 is larger than values2
+    for all later times.
+
+    Parameters
+    ----------
+    values1: np.array
+    values2: np.array
+    axis: int
+        time axis
+
+    Returns
+    -------
+    int/np.array-int
+        number of times if values1 is not larger at the last time
+    """
+    arr1 = _moveTimeAxis(values1, axis)
+    arr2 = _moveTimeAxis(values2, axis)
+    isLarger = np.broadcast_to(arr1 > arr2, np.broadcast_shapes(arr1.shape,
+          arr2.shape))
+    numTime = isLarger.shape[-1]
+    # Length of the run of True values at the end
+    isSuffixLarger = np.logical_and.accumulate(isLarger[..., ::-1], axis=-1)
+    return numTime - np.sum(isSuffixLarger, axis=-1)
+
+def isEventuallyLarger(values1, values2, idx=None, axis=-1):
+    """
+    Checks if values1 is larger than values2 at all times from idx.
+
+    Parameters
+    ----------
+    values1: np.array
+    values2: np.array
+    idx: int
+        index of the first time checked. If None, checks that there is
+        some index after which values1 is larger.
+    axis: int
+        time axis
+
+    Returns
+    -------
+    bool/np.array-bool
+    """
+    largerIdx = findLargerIndex(values1, values2, axis=axis)
+    numTime = np.shape(values1)[axis]
+    if idx is None:
+        return largerIdx < numTime
+    if idx < 0:
+        idx += numTime
+    return largerIdx <= idx
+
+def isBounded(values, lower=-np.inf, upper=np.inf, axis=-1):
+    """
+    Checks if trajectories are within [lower, upper] at all times.
+    Trajectories with nan values are not bounded.
+
+    Parameters
+    ----------
+    values: np.array
+    lower: float
+    upper: float
+    axis: int
+        time axis
+
+    Returns
+    -------
+    bool/np.array-bool
+    """
+    arr = _moveTimeAxis(values, axis)
+    return np.all((arr >= lower) & (arr <= upper), axis=-1)
+
+def calculateDominanceMatrix(values, startIdx=0):
+    """
+    Calculates for every pair of species the fraction of times from
+    startIdx at which the first species is larger than the second.
+    This evaluates isLarger of the Verification and Validation exercises
+    for all pairs at once.
+
+    Parameters
+    ----------
+    values: np.array (times, species) or (runs, times, species)
+    startIdx: int
+
+    Returns
+    -------
+    np.array (species, species) or (runs, species, species)
+        value at [..., i, j] is the fraction of times at which
+        species i is larger than species j
+    """
+    arr = np.asarray(values, dtype=float)[..., startIdx:, :]
+    if arr.shape[-2] == 0:
+        raise ValueError("No times after startIdx.")
+    isLarger = arr[..., :, :, np.newaxis] > arr[..., :, np.newaxis, :]
+    return np.mean(isLarger, axis=-3)
+
+def calculateDominanceDF(df, molecules=None, startIdx=0):
+    """
+    Calculates the dominance matrix for the columns of a dataframe.
+
+    Parameters
+    ----------
+    df: pd.DataFrame
+        index: time
+        columns: molecules
+    molecules: list-str
+        default is all columns
+    startIdx: int
+
+    Returns
+    -------
+    pd.DataFrame
+        index: molecule that is larger
+        columns: molecule that is smaller
+        values: fraction of times
+    """
+    if molecules is None:
+        molecules = list(df.columns)
+    arr = calculateDominanceMatrix(df[molecules].to_numpy(), startIdx=startIdx)
+    return pd.DataFrame(arr, index=molecules, columns=molecules)
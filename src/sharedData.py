@@ -0,0 +1,206 @@
+"""
+Publishes observed data once into shared memory for use by pool workers.
+
+The publishing process creates a SharedDataPublisher and passes the small
+descriptors it returns to the tasks. Workers call attachArray or
+attachDataframe to obtain read-only numpy views of the data without
+the arrays being pickled for every task.
+
+Usage
+-----
+    with SharedDataPublisher() as publisher:
+        descriptor = publisher.publish("wolf", WOLF_DF)
+        with multiprocessing.Pool() as pool:
+            results = pool.map(task, [(descriptor, idx) for idx in range(10)])
+
+    def task(args):
+        descriptor, idx = args
+        arr = attachArray(descriptor)
+        ...
+
+Classes that evaluate in a pool derive from SharedDataPool, which
+creates the pool (and publishes self.observedDF, if any) on first use
+and releases both in close.
+"""
+
+import collections
+import multiprocessing
+import sys
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+import pandas as pd
+
+# Description of a published array
+#   shmName: str (name of the shared memory block)
+#   shape: tuple-int
+#   dtype: str
+#   columns: list-str (None if the data were not a dataframe)
+SharedArrayDescriptor = collections.namedtuple("SharedArrayDescriptor",
+      "shmName shape dtype columns")
+
+# Blocks attached by this process. key: shmName, value: (SharedMemory, np.array)
+_ATTACHED_DCT = {}
+
+
+def _attachSharedMemory(shmName):
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=shmName, track=False)
+    # Only the publisher is responsible for removing the block, and so
+    # the block is not registered with the resource tracker.
+    register = resource_tracker.register
+    resource_tracker.register = lambda *args, **kwargs: None
+    try:
+        shm = shared_memory.SharedMemory(name=shmName)
+    finally:
+        resource_tracker.register = register
+    return shm
+
+
+class SharedDataPublisher(object):
+    """
+    Owns the shared memory blocks for published datasets. The blocks are
+    removed when the publisher is closed.
+    """
+
+    def __init__(self):
+        self._shmDct = {}  # key: name of dataset, value: SharedMemory
+        self.descriptorDct = {}  # key: name of dataset, value: descriptor
+
+    def publish(self, name, data):
+        """
+        Copies the data into shared memory.
+
+        Parameters
+        ----------
+        name: str
+            name of the dataset
+        data: np.array/pd.DataFrame
+
+        Returns
+        -------
+        SharedArrayDescriptor
+        """
+        if name in self._shmDct:
+            raise ValueError("Dataset already published: %s" % name)
+        columns = None
+        if isinstance(data, pd.DataFrame):
+            columns = [str(c) for c in data.columns]
+            data = data.to_numpy()
+        arr = np.ascontiguousarray(data)
+        if arr.dtype == object:
+            raise ValueError("Dataset %s must have a numeric dtype" % name)
+        shm = shared_memory.SharedMemory(create=True, size=max(arr.nbytes, 1))
+        sharedArr = np.ndarray(arr.shape, dtype=arr.dtype, buffer=shm.buf)
+        sharedArr[...] = arr
+        descriptor = SharedArrayDescriptor(shmName=shm.name, shape=arr.shape,
+              dtype=arr.dtype.str, columns=columns)
+        self._shmDct[name] = shm
+        self.descriptorDct[name] = descriptor
+        return descriptor
+
+    def close(self):
+        """
+        Releases and removes all shared memory blocks.
+        """
+        for shm in self._shmDct.values():
+            shm.close()
+            shm.unlink()
+        self._shmDct = {}
+        self.descriptorDct = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+
+class SharedDataPool(object):
+    """
+    Mixin for classes whose evaluations run in a pool of worker processes.
+    Subclasses set numProcess and optionally observedDF, which is placed
+    in shared memory. The descriptor of the observed data is _descriptor.
+    """
+    observedDF = None
+    _pool = None
+    _publisher = None
+    _descriptor = None
+
+    def _getPool(self):
+        if self._pool is None:
+            if self.observedDF is not None:
+                self._publisher = SharedDataPublisher()
+                self._descriptor = self._publisher.publish("observed",
+                      self.observedDF)
+            self._pool = multiprocessing.Pool(self.numProcess)
+        return self._pool
+
+    def close(self):
+        """
+        Terminates the worker processes and releases the shared data.
+        """
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+        if self._publisher is not None:
+            self._publisher.close()
+            self._publisher = None
+            self._descriptor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+
+def attachArray(descriptor):
+    """
+    Obtains a read-only view of a published array. Blocks are attached
+    once per process.
+
+    Parameters
+    ----------
+    descriptor: SharedArrayDescriptor
+
+    Returns
+    -------
+    np.array
+    """
+    if descriptor.shmName not in _ATTACHED_DCT:
+        shm = _attachSharedMemory(descriptor.shmName)
+        arr = np.ndarray(descriptor.shape, dtype=np.dtype(descriptor.dtype),
+              buffer=shm.buf)
+        arr.flags.writeable = False
+        _ATTACHED_DCT[descriptor.shmName] = (shm, arr)
+    return _ATTACHED_DCT[descriptor.shmName][1]
+
+def attachDataframe(descriptor):
+    """
+    Obtains a dataframe for a published dataset. The dataframe does not copy
+    the shared data.
+
+    Parameters
+    ----------
+    descriptor: SharedArrayDescriptor
+
+    Returns
+    -------
+    pd.DataFrame
+    """
+    arr = attachArray(descriptor)
+    return pd.DataFrame(arr, columns=descriptor.columns, copy=False)
+
+def detachAll():
+    """
+    Releases the blocks attached by this process.
+    """
+    for shm, _ in _ATTACHED_DCT.values():
+        try:
+            shm.close()
+        except BufferError:
+            # Views of the block are still referenced
+            pass
+    _ATTACHED_DCT.clear()
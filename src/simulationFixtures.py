@@ -0,0 +1,161 @@
+"""
+Shared simulation fixtures for unit tests of models.
+
+The tests in the dynamic testing notebook load and simulate the model in
+setUp, which is repeated for every test method. ModelTestCase instead
+simulates once for the class, and simulations are cached in the process
+by the hash of the model and the simulation settings. Fixtures are
+read-only so that a test cannot change the data seen by other tests.
+
+    class TestLinearPathway(ModelTestCase):
+        MODEL = LINEAR_PATHWAY_MODEL
+        END_TIME = 10
+        NUM_POINT = 100
+
+        def testS1(self):
+            self.assertTrue(shapeChecks.isMonotone(self.data["[S1]"],
+                  direction=-1))
+
+runTestCases runs independent TestCase classes in parallel processes.
+"""
+
+from src.simulator import getModelHash, getModelString, loadModel
+
+import multiprocessing
+import unittest
+
+import pandas as pd
+
+TEST = "test"
+TEST_CASE = "testCase"
+OUTCOME = "outcome"
+MESSAGE = "message"
+PASSED = "passed"
+FAILURE = "failure"
+ERROR = "error"
+SKIPPED = "skipped"
+
+# Simulations in this process.
+#   key: model hash, startTime, endTime, numPoint, selections
+#   value: read-only NamedArray
+_SIMULATION_DCT = {}
+
+
+def getSimulation(model, startTime=0, endTime=10, numPoint=100,
+      selections=None):
+    """
+    Provides the simulation of a model, simulating only if the same
+    simulation has not been done in this process.
+
+    Parameters
+    ----------
+    model: str/ExtendedRoadRunner
+    startTime: float
+    endTime: float
+    numPoint: int
+    selections: list-str
+
+    Returns
+    -------
+    NamedArray (read-only)
+    """
+    modelStr = getModelString(model)
+    if selections is not None:
+        selections = tuple(selections)
+    key = (getModelHash(modelStr), startTime, endTime, numPoint, selections)
+    if not key in _SIMULATION_DCT:
+        roadrunner = loadModel(modelStr)
+        if selections is None:
+            data = roadrunner.simulate(startTime, endTime, numPoint)
+        else:
+            data = roadrunner.simulate(startTime, endTime, numPoint,
+                  selections=list(selections))
+        data.flags.writeable = False
+        _SIMULATION_DCT[key] = data
+    return _SIMULATION_DCT[key]
+
+def clearSimulations():
+    """
+    Removes the cached simulations of this process.
+    """
+    _SIMULATION_DCT.clear()
+
+
+class ModelTestCase(unittest.TestCase):
+    """
+    TestCase whose tests share one simulation of MODEL.
+    Subclasses set MODEL and optionally the simulation settings.
+    The simulation is available as self.data.
+    """
+    MODEL = None
+    START_TIME = 0
+    END_TIME = 10
+    NUM_POINT = 100
+    SELECTIONS = None
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        if cls.MODEL is None:
+            raise ValueError("%s must set MODEL." % cls.__name__)
+        cls.data = getSimulation(cls.MODEL, startTime=cls.START_TIME,
+              endTime=cls.END_TIME, numPoint=cls.NUM_POINT,
+              selections=cls.SELECTIONS)
+
+
+def _runTestCase(testCaseClass):
+    """
+    Runs the tests of a TestCase class.
+
+    Parameters
+    ----------
+    testCaseClass: type
+
+    Returns
+    -------
+    list-tuple: (test, testCase, outcome, message)
+    """
+    suite = unittest.TestLoader().loadTestsFromTestCase(testCaseClass)
+    outcomeDct = {t.id(): (PASSED, "") for t in suite}
+    result = unittest.TestResult()
+    suite.run(result)
+    for outcome, items in [(FAILURE, result.failures), (ERROR, result.errors),
+          (SKIPPED, result.skipped)]:
+        for test, message in items:
+            if test.id() in outcomeDct:
+                outcomeDct[test.id()] = (outcome, message)
+            else:
+                # Error in setUpClass or tearDownClass applies to all tests
+                for key in outcomeDct.keys():
+                    outcomeDct[key] = (outcome, message)
+    return [(k, testCaseClass.__name__, o, m) for k, (o, m) in outcomeDct.items()]
+
+def runTestCases(testCaseClasses, numProcess=None):
+    """
+    Runs TestCase classes in parallel processes. The classes must be
+    defined at the top level of a module and must not depend on each other.
+
+    Parameters
+    ----------
+    testCaseClasses: list-type
+    numProcess: int
+        default is the number of CPUs (at most the number of classes)
+
+    Returns
+    -------
+    pd.DataFrame
+        index: test
+        columns: testCase, outcome (passed, failure, error, skipped), message
+    """
+    testCaseClasses = list(testCaseClasses)
+    if numProcess is None:
+        numProcess = multiprocessing.cpu_count()
+    numProcess = max(1, min(numProcess, len(testCaseClasses)))
+    if numProcess == 1:
+        resultss = [_runTestCase(c) for c in testCaseClasses]
+    else:
+        with multiprocessing.Pool(numProcess) as pool:
+            resultss = pool.map(_runTestCase, testCaseClasses)
+    results = [r for rs in resultss for r in rs]
+    df = pd.DataFrame(results, columns=[TEST, TEST_CASE, OUTCOME, MESSAGE])
+    return df.set_index(TEST)
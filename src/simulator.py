@@ -0,0 +1,310 @@
+"""
+Batched simulation of a model for many parameter assignments.
+
+Runs are distributed to a pool of worker processes, each of which holds
+a RoadRunner instance that is loaded once. Results are returned in the
+batched representation (runs, times, species) used by src.spectral.
+A run that fails to integrate has values of np.nan.
+Long studies can use BatchSimulator.evaluate, which reduces each batch
+of simulations to output values and checkpoints them in a ResultStore.
+"""
+
+from src.resultStore import ResultStore
+from src.sharedData import SharedDataPool
+
+import functools
+import hashlib
+
+import numpy as np
+import tellurium as te
+
+# Model simulated to obtain the array type of RoadRunner.simulate
+NAMED_ARRAY_MODEL = "S1 -> ; k1*S1; S1 = 1; k1 = 1"
+
+# RoadRunner used by the current process. key: model string, value: roadrunner
+_ROADRUNNER_DCT = {}
+
+
+def isSBML(modelStr):
+    """
+    Parameters
+    ----------
+    modelStr: str
+        Antimony or SBML
+
+    Returns
+    -------
+    bool
+    """
+    return "<sbml" in modelStr[:1000]
+
+def getSBML(model):
+    """
+    Parameters
+    ----------
+    model: str
+        Antimony or SBML
+
+    Returns
+    -------
+    str
+    """
+    if isSBML(model):
+        return model
+    return te.antimonyToSBML(model)
+
+def loadModel(modelStr):
+    """
+    Creates a RoadRunner for an Antimony or SBML model.
+
+    Parameters
+    ----------
+    modelStr: str
+
+    Returns
+    -------
+    ExtendedRoadRunner
+    """
+    if isSBML(modelStr):
+        return te.loadSBMLModel(modelStr)
+    return te.loada(modelStr)
+
+def getModelString(model):
+    """
+    Obtains a string for the model that can be passed to other processes.
+
+    Parameters
+    ----------
+    model: str/ExtendedRoadRunner
+
+    Returns
+    -------
+    str
+    """
+    if isinstance(model, str):
+        return model
+    return model.getCurrentSBML()
+
+def getModelHash(model):
+    """
+    Identifies the content of a model.
+
+    Parameters
+    ----------
+    model: str/ExtendedRoadRunner
+
+    Returns
+    -------
+    str
+    """
+    return hashlib.md5(getModelString(model).encode()).hexdigest()
+
+def getRoadrunner(modelStr):
+    """
+    Obtains the RoadRunner for the model in this process.
+
+    Parameters
+    ----------
+    modelStr: str
+
+    Returns
+    -------
+    ExtendedRoadRunner
+    """
+    if not modelStr in _ROADRUNNER_DCT:
+        _ROADRUNNER_DCT[modelStr] = loadModel(modelStr)
+    return _ROADRUNNER_DCT[modelStr]
+
+@functools.lru_cache(maxsize=None)
+def _getNamedArrayType():
+    # The type is only available from a simulation, which is done once
+    return type(getRoadrunner(NAMED_ARRAY_MODEL).simulate(0, 1, 2))
+
+def makeNamedArray(arr, colnames):
+    """
+    Creates an array of the type returned by RoadRunner.simulate.
+
+    Parameters
+    ----------
+    arr: np.array (times, columns)
+    colnames: list-str
+
+    Returns
+    -------
+    NamedArray
+    """
+    arr = np.asarray(arr, dtype=float)
+    data = _getNamedArrayType()(arr.shape)
+    data[:] = arr
+    data.colnames = list(colnames)
+    return data
+
+def _simulateChunk(args):
+    """
+    Simulates a chunk of parameter assignments in the current process.
+
+    Parameters
+    ----------
+    args: tuple
+        modelStr, parameterNames, valueArr, startTime, endTime, numPoint,
+        selections
+
+    Returns
+    -------
+    np.array (runs, times, selections)
+    """
+    modelStr, parameterNames, valueArr, startTime, endTime, numPoint,  \
+          selections = args
+    roadrunner = getRoadrunner(modelStr)
+    resultArr = np.repeat(np.nan, len(valueArr)*numPoint*len(selections))
+    resultArr = resultArr.reshape(len(valueArr), numPoint, len(selections))
+    for idx, values in enumerate(valueArr):
+        roadrunner.resetAll()
+        for name, value in zip(parameterNames, values):
+            roadrunner[name] = value
+        try:
+            resultArr[idx, :, :] = roadrunner.simulate(startTime, endTime,
+                  numPoint, selections=selections)
+        except RuntimeError:
+            # Integration failed
+            pass
+    roadrunner.resetAll()
+    return resultArr
+
+
+class BatchSimulator(SharedDataPool):
+    """
+    Simulates a model for many parameter assignments.
+    """
+
+    def __init__(self, model, startTime=0, endTime=5, numPoint=300,
+          molecules=None, numProcess=1):
+        """
+        Parameters
+        ----------
+        model: str/ExtendedRoadRunner
+            Antimony, SBML, or RoadRunner
+        startTime: float
+        endTime: float
+        numPoint: int
+        molecules: list-str
+            floating species reported (default: all)
+        numProcess: int
+            number of worker processes; 1 runs in the current process
+        """
+        self.modelStr = getModelString(model)
+        self.startTime = startTime
+        self.endTime = endTime
+        self.numPoint = numPoint
+        self.numProcess = numProcess
+        roadrunner = getRoadrunner(self.modelStr)
+        if molecules is None:
+            molecules = list(roadrunner.getFloatingSpeciesIds())
+        self.molecules = list(molecules)
+        self.selections = ["[%s]" % m for m in self.molecules]
+        self.times = np.linspace(startTime, endTime, numPoint)
+
+    def getParameterValues(self, parameterNames):
+        """
+        Provides the values of parameters in the model.
+
+        Parameters
+        ----------
+        parameterNames: list-str
+
+        Returns
+        -------
+        np.array
+        """
+        roadrunner = getRoadrunner(self.modelStr)
+        roadrunner.resetAll()
+        for name in parameterNames:
+            if not name in roadrunner.keys():
+                raise ValueError("Unknown parameter name: %s" % name)
+        return np.array([roadrunner[n] for n in parameterNames])
+
+    def simulate(self, parameterNames, valueArr):
+        """
+        Runs a simulation for each row of parameter values.
+
+        Parameters
+        ----------
+        parameterNames: list-str
+        valueArr: np.array (runs, parameters)
+
+        Returns
+        -------
+        np.array (runs, times, species)
+        """
+        valueArr = np.atleast_2d(np.asarray(valueArr, dtype=float))
+        if valueArr.shape[1] != len(parameterNames):
+            raise ValueError("valueArr must have a column for each parameter.")
+        numRun = len(valueArr)
+        if numRun == 0:
+            return np.zeros((0, self.numPoint, len(self.molecules)))
+        numChunk = min(numRun, 4*self.numProcess)
+        chunks = np.array_split(valueArr, numChunk)
+        argss = [(self.modelStr, list(parameterNames), c, self.startTime,
+              self.endTime, self.numPoint, self.selections) for c in chunks]
+        if self.numProcess == 1:
+            resultArrs = [_simulateChunk(a) for a in argss]
+        else:
+            resultArrs = self._getPool().map(_simulateChunk, argss)
+        return np.concatenate(resultArrs)
+
+    def evaluate(self, parameterNames, valueArr, outputFunction,
+          batchSize=100, store=None, outputKey=None):
+        """
+        Simulates in batches and reduces the simulation results of each
+        batch to outputs. If a store is provided, the outputs of each batch
+        are appended to the store and batches already in the store are
+        not simulated.
+
+        Parameters
+        ----------
+        parameterNames: list-str
+        valueArr: np.array (runs, parameters)
+        outputFunction: Function
+            parameters: np.array (runs, times, species), BatchSimulator
+            returns: np.array (runs, outputs)
+        batchSize: int
+        store: ResultStore/str
+            store (or path to the SQLite file of a store) used as checkpoint
+        outputKey: str
+            identifies the outputs of outputFunction; required with a store
+
+        Returns
+        -------
+        np.array (runs, outputs)
+        """
+        if isinstance(store, str):
+            store = ResultStore(store)
+        if (store is not None) and (outputKey is None):
+            raise ValueError("A store requires an outputKey for the outputs.")
+        valueArr = np.atleast_2d(np.asarray(valueArr, dtype=float))
+        outputArrs = []
+        for startIdx in range(0, len(valueArr), batchSize):
+            batchArr = valueArr[startIdx:startIdx + batchSize]
+            key = None
+            if store is not None:
+                key = self._makeBatchKey(parameterNames, batchArr, outputKey)
+                if store.has(key):
+                    outputArr = np.array(store.get(key), dtype=float)
+                    outputArrs.append(outputArr.reshape(len(batchArr), -1))
+                    continue
+            arr = self.simulate(parameterNames, batchArr)
+            outputArr = np.asarray(outputFunction(arr, self), dtype=float)
+            outputArr = outputArr.reshape(len(batchArr), -1)
+            if store is not None:
+                store.append(key, outputArr)
+            outputArrs.append(outputArr)
+        return np.concatenate(outputArrs)
+
+    def _makeBatchKey(self, parameterNames, batchArr, outputKey):
+        # Identifies the simulation inputs and the outputs of a batch
+        hasher = hashlib.md5()
+        for item in [self.modelStr, str(parameterNames), str(self.molecules),
+              str((self.startTime, self.endTime, self.numPoint)), outputKey]:
+            hasher.update(item.encode())
+        hasher.update(np.ascontiguousarray(batchArr).tobytes())
+        return hasher.hexdigest()
@@ -0,0 +1,460 @@
+"""
+Selection of the integrator of a model from trial integrations.
+
+Models differ in the integrator that simulates them fastest for a given
+accuracy. Wolf is stiff, the linear pathway is not, and the Lorenz system
+is chaotic. profileSolvers runs short trial integrations of a model with
+configurations of the RoadRunner integrators (CVODE with BDF or Adams
+methods, rk45, rk4) and of the ensemble integrator of
+src.ensembleIntegrator at several tolerances. For each configuration it
+records the wall time, the number of steps, the number of rejected steps
+(not reported by the RoadRunner integrators), and the error relative to a
+CVODE simulation with tight tolerances.
+
+The trials use a short window (by default 100 points in [0, 2]) that is
+independent of the simulations. getProfile runs them once for a model
+and caches the profile by the hash of the model and of the profiling
+arguments (optionally in a ResultStore), so that later simulations of
+any horizon and grid do not repeat the trials. getSolverConfiguration
+selects the fastest configuration whose error is at most maxError. The
+accuracy of the fixed step integrator (rk4) depends on its step, which
+is the output interval, and so it is only selected for simulations whose
+output interval is at most that of the trials:
+
+    profileDF = profileSolvers(WOLF_MODEL)
+    configuration = getSolverConfiguration(WOLF_MODEL)  # cvode-bdf:1e-06
+    data = simulate(WOLF_MODEL, endTime=100, numPoint=10000)
+"""
+
+from src import ensembleIntegrator
+from src.ensembleIntegrator import EnsembleModel
+from src.resultStore import ResultStore
+from src.simulator import getModelHash, getModelString, loadModel,  \
+      makeNamedArray
+
+import collections
+import hashlib
+import inspect
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+# Constants
+ROADRUNNER = "roadrunner"
+ENSEMBLE = "ensemble"
+CVODE = "cvode"
+RK45 = "rk45"
+RK4 = "rk4"
+CONFIGURATION = "configuration"
+BACKEND = "backend"
+INTEGRATOR = "integrator"
+IS_STIFF = "isStiff"
+TOLERANCE = "tolerance"
+SECONDS = "seconds"
+NUM_STEP = ensembleIntegrator.NUM_STEP
+NUM_REJECTED = ensembleIntegrator.NUM_REJECTED
+ERROR = "error"
+IS_ACCURATE = "isAccurate"
+MESSAGE = "message"
+TIME = "time"
+DEFAULT_TOLERANCES = [1e-4, 1e-6, 1e-8]
+ABSOLUTE_TOLERANCE_RATIO = 1e-3  # absolute tolerance/relative tolerance
+REFERENCE_TOLERANCE = 1e-10
+MAX_REPEAT_SECONDS = 1.0  # Trials are repeated until this time is used
+
+# Configuration of an integrator
+#   backend: str (roadrunner, ensemble)
+#   integrator: str (cvode, rk45, rk4 for roadrunner;
+#                    dopri5, rosenbrock for ensemble)
+#   isStiff: bool (BDF or Adams methods of CVODE)
+#   tolerance: float (relative tolerance)
+SolverConfiguration = collections.namedtuple("SolverConfiguration",
+      "backend integrator isStiff tolerance")
+
+# Profiles of models. key: configuration key, value: pd.DataFrame
+_PROFILE_DCT = {}
+
+
+def getConfigurationName(configuration):
+    """
+    Parameters
+    ----------
+    configuration: SolverConfiguration
+
+    Returns
+    -------
+    str
+    """
+    integrator = configuration.integrator
+    if (configuration.backend == ROADRUNNER) and (integrator == CVODE):
+        integrator = "%s-%s" % (CVODE, "bdf" if configuration.isStiff else "adams")
+    name = "%s:%s" % (configuration.backend, integrator)
+    if not np.isnan(configuration.tolerance):
+        name = "%s:%g" % (name, configuration.tolerance)
+    return name
+
+def getDefaultConfigurations(tolerances=DEFAULT_TOLERANCES):
+    """
+    Configurations that are profiled by default.
+
+    Parameters
+    ----------
+    tolerances: list-float
+
+    Returns
+    -------
+    list-SolverConfiguration
+    """
+    configurations = []
+    for tolerance in tolerances:
+        for isStiff in [True, False]:
+            configurations.append(SolverConfiguration(backend=ROADRUNNER,
+                  integrator=CVODE, isStiff=isStiff, tolerance=tolerance))
+        configurations.append(SolverConfiguration(backend=ROADRUNNER,
+              integrator=RK45, isStiff=False, tolerance=tolerance))
+    configurations.append(SolverConfiguration(backend=ROADRUNNER,
+          integrator=RK4, isStiff=False, tolerance=np.nan))
+    # The ensemble integrator is profiled at the middle tolerance
+    tolerance = tolerances[len(tolerances)//2]
+    configurations.append(SolverConfiguration(backend=ENSEMBLE,
+          integrator=ensembleIntegrator.DOPRI5, isStiff=False,
+          tolerance=tolerance))
+    configurations.append(SolverConfiguration(backend=ENSEMBLE,
+          integrator=ensembleIntegrator.ROSENBROCK, isStiff=True,
+          tolerance=tolerance))
+    return configurations
+
+def configureRoadrunner(roadrunner, configuration, isVariableStep=False):
+    """
+    Sets the integrator of a RoadRunner.
+
+    Parameters
+    ----------
+    roadrunner: ExtendedRoadRunner
+    configuration: SolverConfiguration
+        configuration with the roadrunner backend
+    isVariableStep: bool
+        output at every step of CVODE
+    """
+    if configuration.backend != ROADRUNNER:
+        raise ValueError("Not a RoadRunner configuration: %s"
+              % getConfigurationName(configuration))
+    roadrunner.setIntegrator(configuration.integrator)
+    integrator = roadrunner.integrator
+    if configuration.integrator == CVODE:
+        integrator.stiff = bool(configuration.isStiff)
+        integrator.relative_tolerance = configuration.tolerance
+        integrator.absolute_tolerance =  \
+              ABSOLUTE_TOLERANCE_RATIO*configuration.tolerance
+        integrator.variable_step_size = isVariableStep
+    elif configuration.integrator == RK45:
+        # rk45 is accurate only in its variable step mode, which also
+        # produces output at fixed times if numPoint is given
+        integrator.epsilon = configuration.tolerance
+        integrator.variable_step_size = True
+
+def _getSelections(roadrunner):
+    return [s for s in roadrunner.timeCourseSelections if s != TIME]
+
+def _calculateError(arr, referenceArr):
+    # Largest difference from the reference relative to the scale of each column
+    with np.errstate(all="ignore"):
+        scales = np.max(np.abs(referenceArr), axis=0)
+        scales = np.maximum(scales, 1e-6*max(np.max(scales), 1e-12))
+        error = np.max(np.abs(arr - referenceArr)/scales)
+    return error if np.isfinite(error) else np.inf
+
+def _simulateEnsemble(ensembleModel, configuration, startTime, endTime,
+      numPoint, statisticDct=None):
+    return ensembleModel.simulate(startTime=startTime, endTime=endTime,
+          numPoint=numPoint, method=configuration.integrator,
+          rtol=configuration.tolerance,
+          atol=ABSOLUTE_TOLERANCE_RATIO*configuration.tolerance,
+          statisticDct=statisticDct)[0]
+
+def _runTrial(modelStr, configuration, startTime, endTime, numPoint,
+      selections, numRepeat, ensembleModel):
+    """
+    Simulates a model with a configuration.
+
+    Returns
+    -------
+    dict
+        keys: seconds, numStep, numRejected
+    np.array (times, selections)
+    """
+    resultDct = {NUM_STEP: np.nan, NUM_REJECTED: np.nan}
+    if configuration.backend == ROADRUNNER:
+        roadrunner = loadModel(modelStr)
+        if configuration.integrator == RK4:
+            # One step per output interval
+            resultDct[NUM_STEP] = numPoint - 1
+            resultDct[NUM_REJECTED] = 0
+        else:
+            configureRoadrunner(roadrunner, configuration, isVariableStep=True)
+            # The output has a row per step up to max_output_rows, and a
+            # truncated output leaves the count unknown
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                data = roadrunner.simulate(startTime, endTime)
+            if data[-1, 0] >= endTime:
+                resultDct[NUM_STEP] = len(data) - 1
+        configureRoadrunner(roadrunner, configuration)
+        def run():
+            roadrunner.resetAll()
+            return np.array(roadrunner.simulate(startTime, endTime, numPoint,
+                  selections))
+    else:
+        if ensembleModel is None:
+            raise ValueError("Model is not supported by the ensemble integrator.")
+        idxs = [ensembleModel.speciesIds.index(s[1:-1]) for s in selections]
+        statisticDct = {}
+        def run():
+            arr = _simulateEnsemble(ensembleModel, configuration, startTime,
+                  endTime, numPoint, statisticDct=statisticDct)
+            return arr[:, idxs]
+    secondss = []
+    for _ in range(numRepeat):
+        startSeconds = time.time()
+        arr = run()
+        secondss.append(time.time() - startSeconds)
+        if sum(secondss) > MAX_REPEAT_SECONDS:
+            break
+    resultDct[SECONDS] = min(secondss)
+    if configuration.backend == ENSEMBLE:
+        resultDct[NUM_STEP] = int(statisticDct[NUM_STEP][0])
+        resultDct[NUM_REJECTED] = int(statisticDct[NUM_REJECTED][0])
+    return resultDct, arr
+
+def _getEnsembleModel(modelStr, selections):
+    # EnsembleModel if the ensemble integrator supports the model
+    try:
+        ensembleModel = EnsembleModel(modelStr)
+    except ValueError:
+        return None
+    for selection in selections:
+        if not selection[1:-1] in ensembleModel.speciesIds:
+            return None
+    return ensembleModel
+
+def profileSolvers(model, startTime=0, endTime=2, numPoint=100,
+      configurations=None, maxError=1e-3, numRepeat=3):
+    """
+    Runs trial integrations of a model with configurations of integrators.
+
+    Parameters
+    ----------
+    model: str/ExtendedRoadRunner
+    startTime: float
+    endTime: float
+        end of the trial integrations
+    numPoint: int
+    configurations: list-SolverConfiguration
+        default: getDefaultConfigurations()
+    maxError: float
+        largest error relative to the scale of the variables for an
+        accurate configuration
+    numRepeat: int
+        largest number of repetitions of a trial to measure its time
+
+    Returns
+    -------
+    pd.DataFrame
+        index: configuration (name)
+        columns: backend, integrator, isStiff, tolerance, seconds, numStep,
+            numRejected, error, isAccurate, message
+    """
+    modelStr = getModelString(model)
+    if configurations is None:
+        configurations = getDefaultConfigurations()
+    roadrunner = loadModel(modelStr)
+    selections = _getSelections(roadrunner)
+    referenceConfiguration = SolverConfiguration(backend=ROADRUNNER,
+          integrator=CVODE, isStiff=True, tolerance=REFERENCE_TOLERANCE)
+    configureRoadrunner(roadrunner, referenceConfiguration)
+    referenceArr = np.array(roadrunner.simulate(startTime, endTime, numPoint,
+          selections))
+    ensembleModel = None
+    if any(c.backend == ENSEMBLE for c in configurations):
+        ensembleModel = _getEnsembleModel(modelStr, selections)
+    resultDcts = []
+    for configuration in configurations:
+        resultDct = collections.OrderedDict()
+        resultDct[CONFIGURATION] = getConfigurationName(configuration)
+        resultDct.update(configuration._asdict())
+        resultDct[MESSAGE] = ""
+        try:
+            trialDct, arr = _runTrial(modelStr, configuration, startTime,
+                  endTime, numPoint, selections, numRepeat, ensembleModel)
+            resultDct.update(trialDct)
+            resultDct[ERROR] = _calculateError(arr, referenceArr)
+        except Exception as exp:
+            resultDct.update({SECONDS: np.nan, NUM_STEP: np.nan,
+                  NUM_REJECTED: np.nan, ERROR: np.inf})
+            resultDct[MESSAGE] = "%s: %s" % (type(exp).__name__, str(exp))
+        resultDct[IS_ACCURATE] = bool(resultDct[ERROR] <= maxError)
+        resultDcts.append(resultDct)
+    columns = [CONFIGURATION, BACKEND, INTEGRATOR, IS_STIFF, TOLERANCE, SECONDS,
+          NUM_STEP, NUM_REJECTED, ERROR, IS_ACCURATE, MESSAGE]
+    return pd.DataFrame(resultDcts, columns=columns).set_index(CONFIGURATION)
+
+def selectConfiguration(profileDF, isFixedStep=True):
+    """
+    Selects the fastest accurate configuration. If no configuration is
+    accurate, the one with the smallest error is selected.
+
+    Parameters
+    ----------
+    profileDF: pd.DataFrame
+        result of profileSolvers
+    isFixedStep: bool
+        fixed step configurations (rk4) may be selected
+
+    Returns
+    -------
+    SolverConfiguration
+    """
+    if not isFixedStep:
+        profileDF = profileDF[profileDF[INTEGRATOR] != RK4]
+    accurateDF = profileDF[profileDF[IS_ACCURATE]]
+    if len(accurateDF) > 0:
+        name = accurateDF[SECONDS].idxmin()
+    else:
+        name = profileDF[ERROR].idxmin()
+    row = profileDF.loc[name]
+    return SolverConfiguration(backend=row[BACKEND], integrator=row[INTEGRATOR],
+          isStiff=bool(row[IS_STIFF]), tolerance=float(row[TOLERANCE]))
+
+def _getProfileArguments(model, **kwargs):
+    # Arguments of profileSolvers other than the model, with defaults
+    arguments = inspect.signature(profileSolvers).bind(model, **kwargs)
+    arguments.apply_defaults()
+    argumentDct = dict(arguments.arguments)
+    del argumentDct["model"]
+    return argumentDct
+
+def makeConfigurationKey(model, **kwargs):
+    """
+    Identifies a model and the arguments of profileSolvers. Omitted
+    arguments have their default values.
+
+    Parameters
+    ----------
+    model: str/ExtendedRoadRunner
+    kwargs: dict
+        optional arguments for profileSolvers
+
+    Returns
+    -------
+    str
+    """
+    argumentDct = _getProfileArguments(model, **kwargs)
+    hasher = hashlib.md5()
+    hasher.update(getModelHash(model).encode())
+    hasher.update(str(sorted(argumentDct.items())).encode())
+    return hasher.hexdigest()
+
+def getProfile(model, store=None, **kwargs):
+    """
+    Obtains the profile of a model, running the trials if the model has
+    not been profiled with the same arguments before.
+
+    Parameters
+    ----------
+    model: str/ExtendedRoadRunner
+    store: ResultStore/str
+        persists the profiles across sessions
+    kwargs: dict
+        optional arguments for profileSolvers
+
+    Returns
+    -------
+    pd.DataFrame
+        result of profileSolvers
+    """
+    key = makeConfigurationKey(model, **kwargs)
+    if key in _PROFILE_DCT:
+        return _PROFILE_DCT[key]
+    if isinstance(store, str):
+        store = ResultStore(store)
+    if (store is not None) and store.has(key):
+        profileDF = pd.DataFrame(store.get(key)).set_index(CONFIGURATION)
+    else:
+        profileDF = profileSolvers(model, **kwargs)
+        if store is not None:
+            store.append(key, profileDF.reset_index().to_dict(orient="list"))
+    _PROFILE_DCT[key] = profileDF
+    return profileDF
+
+def getSolverConfiguration(model, store=None, stepSize=None, **kwargs):
+    """
+    Selects the configuration of a model from its profile.
+
+    Parameters
+    ----------
+    model: str/ExtendedRoadRunner
+    store: ResultStore/str
+        persists the profiles across sessions
+    stepSize: float
+        output interval of the simulations; fixed step configurations are
+        only selected if it is at most the output interval of the trials
+        (default: the output interval of the trials)
+    kwargs: dict
+        optional arguments for profileSolvers
+
+    Returns
+    -------
+    SolverConfiguration
+    """
+    profileDF = getProfile(model, store=store, **kwargs)
+    argumentDct = _getProfileArguments(model, **kwargs)
+    trialStepSize = (argumentDct["endTime"] - argumentDct["startTime"])  \
+          /(argumentDct["numPoint"] - 1)
+    isFixedStep = (stepSize is None) or (stepSize <= trialStepSize*(1 + 1e-9))
+    return selectConfiguration(profileDF, isFixedStep=isFixedStep)
+
+def clearConfigurations():
+    """
+    Removes the profiles, and so the selected configurations, of this
+    process.
+    """
+    _PROFILE_DCT.clear()
+
+def simulate(model, startTime=0, endTime=10, numPoint=100, store=None,
+      **kwargs):
+    """
+    Simulates a model with the configuration selected from its profile.
+
+    Parameters
+    ----------
+    model: str/ExtendedRoadRunner
+    startTime: float
+    endTime: float
+    numPoint: int
+    store: ResultStore/str
+    kwargs: dict
+        optional arguments for profileSolvers (the trials)
+
+    Returns
+    -------
+    NamedArray
+        columns: time, default selections of RoadRunner
+    """
+    modelStr = getModelString(model)
+    stepSize = (endTime - startTime)/max(numPoint - 1, 1)
+    configuration = getSolverConfiguration(modelStr, store=store,
+          stepSize=stepSize, **kwargs)
+    roadrunner = loadModel(modelStr)
+    selections = _getSelections(roadrunner)
+    if configuration.backend == ROADRUNNER:
+        configureRoadrunner(roadrunner, configuration)
+        return roadrunner.simulate(startTime, endTime, numPoint,
+              [TIME] + selections)
+    ensembleModel = EnsembleModel(modelStr)
+    idxs = [ensembleModel.speciesIds.index(s[1:-1]) for s in selections]
+    arr = _simulateEnsemble(ensembleModel, configuration, startTime, endTime,
+          numPoint)[:, idxs]
+    times = np.linspace(startTime, endTime, numPoint)
+    return makeNamedArray(np.column_stack([times, arr]), [TIME] + selections)
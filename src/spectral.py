@@ -0,0 +1,173 @@
+"""
+Batched spectral analysis of simulation results.
+
+Simulation results are represented as a 3-d array with the dimensions
+(runs, times, species). A single real FFT along the time axis provides
+the spectra of all species in all runs. The frequency conventions are
+those of calculateFft in the Design-of-Experiments notebook so that
+peak frequencies are the same as those computed there.
+"""
+
+import numpy as np
+import pandas as pd
+
+TIME = "time"
+RUN_AXIS = 0
+TIME_AXIS = 1
+SPECIES_AXIS = 2
+
+
+def _getColumnNames(data):
+    if isinstance(data, pd.DataFrame):
+        return [str(c) for c in data.columns]
+    return [c[1:-1] if c.startswith("[") else c for c in data.colnames]
+
+def stackSimulations(datas, molecules=None):
+    """
+    Creates the batched representation of simulation results.
+
+    Parameters
+    ----------
+    datas: list-NamedArray/list-DataFrame
+        results of simulations with the same times; a "time" column is required
+    molecules: list-str
+        names of the species to include (default: all non-time columns)
+
+    Returns
+    -------
+    np.array: (runs, times, species)
+    np.array: times
+    list-str: names of species
+    """
+    if not isinstance(datas, (list, tuple)):
+        datas = [datas]
+    colnames = _getColumnNames(datas[0])
+    if not TIME in colnames:
+        raise ValueError("Simulation results do not have a time column.")
+    if molecules is None:
+        molecules = [c for c in colnames if c != TIME]
+    missings = set(molecules).difference(colnames)
+    if len(missings) > 0:
+        raise ValueError("Unknown molecules: %s" % str(missings))
+    indices = [colnames.index(m) for m in molecules]
+    arrs = [np.asarray(d, dtype=float) for d in datas]
+    arr = np.stack(arrs)
+    times = arr[0, :, colnames.index(TIME)]
+    return arr[:, :, indices], np.array(times), list(molecules)
+
+def calculateFfts(arr, endTime, offset=100):
+    """
+    Calculates the amplitude spectrum of every species in every run.
+    The calculation does not include amplitudes at a frequency of 0.
+
+    Parameters
+    ----------
+    arr: np.array (runs, times, species)
+    endTime: float
+        end time of the simulations
+    offset: int
+        Initial data that are not included in the FFT calculation
+
+    Returns
+    -------
+    np.array: frequencies (numFrequency)
+    np.array: amplitudes (runs, numFrequency, species)
+    """
+    arr = np.asarray(arr, dtype=float)
+    if arr.ndim == 2:
+        arr = arr[np.newaxis, :, :]
+    numPoint = arr.shape[TIME_AXIS]
+    count = numPoint - offset
+    if count < 2:
+        raise ValueError("Offset %d leaves too few points." % offset)
+    freqs = np.fft.rfftfreq(count, endTime/numPoint)
+    amplitudes = np.abs(np.fft.rfft(arr[:, offset:, :], axis=TIME_AXIS))
+    # Eliminate frequency of 0
+    return freqs[1:], amplitudes[:, 1:, :]
+
+def calculateTopPeaks(arr, endTime, numPeak=1, offset=100):
+    """
+    Finds the frequencies with the largest amplitudes for every species
+    in every run.
+
+    Parameters
+    ----------
+    arr: np.array (runs, times, species)
+    endTime: float
+    numPeak: int
+        number of peaks reported
+    offset: int
+        Initial data that are not included in the FFT calculation
+
+    Returns
+    -------
+    np.array: frequencies (runs, numPeak, species)
+    np.array: amplitudes (runs, numPeak, species)
+        ordered by decreasing amplitude; frequencies and amplitudes are
+        np.nan for a species and run with values that are not finite
+    """
+    freqs, amplitudes = calculateFfts(arr, endTime, offset=offset)
+    numFrequency = len(freqs)
+    if (numPeak < 1) or (numPeak > numFrequency):
+        raise ValueError("numPeak must be in [1, %d]" % numFrequency)
+    # Unordered indices of the largest amplitudes
+    kth = numFrequency - numPeak
+    indices = np.argpartition(amplitudes, kth, axis=TIME_AXIS)[:, kth:, :]
+    topAmplitudes = np.take_along_axis(amplitudes, indices, axis=TIME_AXIS)
+    # Order the peaks. Ties are resolved in favor of the lower frequency.
+    order = np.lexsort((indices, -topAmplitudes), axis=TIME_AXIS)
+    indices = np.take_along_axis(indices, order, axis=TIME_AXIS)
+    topAmplitudes = np.take_along_axis(topAmplitudes, order, axis=TIME_AXIS)
+    topFreqs = freqs[indices]
+    # A value that is not finite makes all amplitudes meaningless
+    isInvalids = np.any(~np.isfinite(amplitudes), axis=TIME_AXIS)
+    isInvalidArr = np.broadcast_to(isInvalids[:, np.newaxis, :],
+          topFreqs.shape)
+    topFreqs[isInvalidArr] = np.nan
+    topAmplitudes[isInvalidArr] = np.nan
+    return topFreqs, topAmplitudes
+
+def calculatePeakFrequencies(arr, endTime, numDelete=0, offset=100):
+    """
+    Calculates the frequency with the largest amplitude for every species
+    in every run after deleting the numDelete largest amplitudes.
+
+    Parameters
+    ----------
+    arr: np.array (runs, times, species)
+    endTime: float
+    numDelete: int
+        number of larger peaks that are ignored
+    offset: int
+        Initial data that are not included in the FFT calculation
+
+    Returns
+    -------
+    np.array (runs, species)
+        np.nan for a species and run with values that are not finite
+    """
+    freqs, _ = calculateTopPeaks(arr, endTime, numPeak=numDelete + 1,
+          offset=offset)
+    return freqs[:, numDelete, :]
+
+def calculatePeakFrequencyDF(datas, molecules=None, **kwargs):
+    """
+    Calculates peak frequencies for simulation results.
+
+    Parameters
+    ----------
+    datas: list-NamedArray/list-DataFrame
+    molecules: list-str
+    kwargs: dict
+        optional arguments for calculatePeakFrequencies
+
+    Returns
+    -------
+    pd.DataFrame
+        index: run
+        columns: molecule
+        values: peak frequency
+    """
+    arr, times, molecules = stackSimulations(datas, molecules=molecules)
+    frequencyArr = calculatePeakFrequencies(arr, times[-1], **kwargs)
+    return pd.DataFrame(frequencyArr, columns=molecules)
@@ -0,0 +1,285 @@
+"""
+Surrogate-assisted parameter fitting.
+
+Each evaluation of the objective of a fit of Wolf is a stiff simulation,
+and differential evolution evaluates thousands of trials, most of which
+are worse than their parents and are discarded. SurrogateFitter
+screens the trials of each generation with a radial basis function
+model (RBFSurrogate) of log(SSR) that is trained on the simulations done
+so far. A trial is simulated only if
+  its predicted SSR is smaller than the SSR of its parent, or
+  it is selected at random for exploration (explorationFraction).
+Other trials are rejected without simulation. The surrogate is retrained
+every retrainInterval generations.
+
+SurrogateFitter has the interface of SBstoat's ModelFitter for the
+workflow in the parameter estimation notebooks:
+
+    fitter = SurrogateFitter(WOLF_MODEL, WOLF_DF,
+          parametersToFit=["J1_k1", "J9_k"], parameterUpperBound=1000)
+    fitter.fitModel()
+    print(fitter.reportFit())  # includes the simulations saved
+
+compareSurrogate fits with and without the surrogate.
+"""
+
+from src import differentialEvolution
+from src.multiFidelity import SSRObjective, getObservedDF
+from src.reparameterization import ParameterSpace
+
+import time
+
+import numpy as np
+import pandas as pd
+from scipy.interpolate import RBFInterpolator
+
+# Constants
+PARAMETER_LOWER_BOUND = 0  # Defaults of SBstoat
+PARAMETER_UPPER_BOUND = 10
+MIN_ENERGY = 1e-300
+GENERATION = "generation"
+NUM_TRIAL = "numTrial"
+NUM_SIMULATION = "numSimulation"
+NUM_SCREENED = "numScreened"
+NUM_RETRAIN = "numRetrain"
+SSR = "ssr"
+SECONDS = "seconds"
+METHOD = "method"
+SURROGATE = "surrogate"
+DIFFERENTIAL_EVOLUTION = "differentialEvolution"
+
+
+class RBFSurrogate(object):
+    """
+    Radial basis function model of log(energy) over parameter vectors
+    scaled to the unit cube.
+    """
+
+    def __init__(self, bounds, maxPoint=500, smoothing=1e-6):
+        """
+        Parameters
+        ----------
+        bounds: list-(float, float)
+        maxPoint: int
+            number of the most recent points used in training
+        smoothing: float
+        """
+        bounds = np.array(bounds, dtype=float)
+        self.lowers, self.uppers = bounds[:, 0], bounds[:, 1]
+        self.maxPoint = maxPoint
+        self.smoothing = smoothing
+        self.pointArr = np.zeros((0, len(bounds)))
+        self.values = np.zeros(0)
+        self.interpolator = None
+
+    def _scale(self, arr):
+        return (np.atleast_2d(arr) - self.lowers)/(self.uppers - self.lowers)
+
+    def add(self, arr, energies):
+        """
+        Adds evaluated points.
+
+        Parameters
+        ----------
+        arr: np.array (points, parameters)
+        energies: np.array (points)
+        """
+        energies = np.asarray(energies, dtype=float)
+        isFinite = np.isfinite(energies)
+        self.pointArr = np.vstack([self.pointArr, self._scale(arr)[isFinite]])
+        self.values = np.append(self.values,
+              np.log(np.maximum(energies[isFinite], MIN_ENERGY)))
+
+    @property
+    def numPoint(self):
+        return len(self.values)
+
+    def fit(self):
+        """
+        Trains the model on the most recent points.
+        """
+        pointArr = self.pointArr[-self.maxPoint:]
+        values = self.values[-self.maxPoint:]
+        # Duplicate points make the interpolation singular
+        pointArr, idxs = np.unique(pointArr, axis=0, return_index=True)
+        self.interpolator = RBFInterpolator(pointArr, values[idxs],
+              kernel="thin_plate_spline", smoothing=self.smoothing)
+
+    def predict(self, arr):
+        """
+        Predicts energies.
+
+        Parameters
+        ----------
+        arr: np.array (points, parameters)
+
+        Returns
+        -------
+        np.array (points)
+        """
+        if self.interpolator is None:
+            self.fit()
+        return np.exp(self.interpolator(self._scale(arr)))
+
+
+class SurrogateFitter(object):
+    """
+    Fits parameters with differential evolution screened by a surrogate.
+    """
+
+    def __init__(self, modelSpecification, observedData, parametersToFit,
+          parameterLowerBound=PARAMETER_LOWER_BOUND,
+          parameterUpperBound=PARAMETER_UPPER_BOUND, selectedColumns=None,
+          isSurrogate=True, popsize=15, maxGeneration=1000, tol=0.01,
+          retrainInterval=5, explorationFraction=0.1, seed=None):
+        """
+        Parameters
+        ----------
+        modelSpecification: ExtendedRoadRunner/str
+        observedData: pd.DataFrame/NamedTimeseries/str
+            str: path to CSV file
+        parametersToFit: list-str/list-SBstoat.Parameter
+        parameterLowerBound: float
+            lower bound of parameters given by name
+        parameterUpperBound: float
+            upper bound of parameters given by name
+        selectedColumns: list-str
+            observed columns that are fitted (default: all)
+        isSurrogate: bool
+            screen trials with the surrogate
+        popsize: int
+        maxGeneration: int
+        tol: float
+            convergence tolerance of differential evolution
+        retrainInterval: int
+            generations between training the surrogate
+        explorationFraction: float
+            fraction of screened out trials that are simulated
+        seed: int
+        """
+        observedDF = getObservedDF(observedData)
+        space = ParameterSpace.fromParameters(parametersToFit,
+              parameterLowerBound=parameterLowerBound,
+              parameterUpperBound=parameterUpperBound, isLogScale=False)
+        self.parameterNames = space.names
+        self.bounds = [tuple(b) for b in space.bounds]
+        self.objective = SSRObjective(modelSpecification, observedDF,
+              self.parameterNames, columns=selectedColumns)
+        self.isSurrogate = isSurrogate
+        self.popsize = popsize
+        self.maxGeneration = maxGeneration
+        self.tol = tol
+        self.retrainInterval = retrainInterval
+        self.explorationFraction = explorationFraction
+        self.seed = seed
+        # Results of fitModel
+        self.valueDct = None
+        self.ssr = None
+        self.result = None
+        self.statisticDF = None
+        self.seconds = None
+
+    @property
+    def numSimulation(self):
+        return self.objective.numSimulation
+
+    @property
+    def numScreened(self):
+        """Trials rejected by the surrogate without simulation."""
+        if self.statisticDF is None:
+            return 0
+        return int(self.statisticDF[NUM_SCREENED].sum())
+
+    def fitModel(self):
+        """
+        Fits the parameters.
+        """
+        rng = np.random.default_rng(self.seed)
+        surrogate = RBFSurrogate(self.bounds)
+        statisticDcts = []
+        def evaluate(trialArr, parentEnergies):
+            generation = len(statisticDcts)
+            energies = np.repeat(np.inf, len(trialArr))
+            isSimulated = np.repeat(True, len(trialArr))
+            numRetrain = 0
+            if self.isSurrogate and np.all(np.isfinite(parentEnergies)):
+                if (surrogate.interpolator is None)  \
+                      or (generation % self.retrainInterval == 0):
+                    surrogate.fit()
+                    numRetrain = 1
+                isPromising = surrogate.predict(trialArr) < parentEnergies
+                isExplored = rng.random(len(trialArr)) < self.explorationFraction
+                isSimulated = isPromising | isExplored
+            for idx in np.nonzero(isSimulated)[0]:
+                energies[idx] = self.objective(trialArr[idx])
+            surrogate.add(trialArr[isSimulated], energies[isSimulated])
+            statisticDcts.append({GENERATION: generation,
+                  NUM_TRIAL: len(trialArr),
+                  NUM_SIMULATION: int(np.sum(isSimulated)),
+                  NUM_SCREENED: int(np.sum(~isSimulated)),
+                  NUM_RETRAIN: numRetrain})
+            return energies
+        startSeconds = time.time()
+        self.result = differentialEvolution.minimize(self.bounds,
+              evaluateFunction=evaluate, popsize=self.popsize,
+              maxGeneration=self.maxGeneration, tol=self.tol, seed=rng)
+        self.seconds = time.time() - startSeconds
+        self.statisticDF = pd.DataFrame(statisticDcts).set_index(GENERATION)
+        self.valueDct = dict(zip(self.parameterNames, self.result.x))
+        self.ssr = self.result.fun
+
+    def reportFit(self):
+        """
+        Describes the fit.
+
+        Returns
+        -------
+        str
+        """
+        if self.result is None:
+            raise ValueError("Must do fitModel before reportFit.")
+        numTrial = int(self.statisticDF[NUM_TRIAL].sum())
+        lines = ["[[Variables]]"]
+        for name, value in self.valueDct.items():
+            lines.append("    %s: %g" % (name, value))
+        lines.append("[[Fit Statistics]]")
+        lines.append("    ssr: %g" % self.ssr)
+        lines.append("    generations: %d" % self.result.numGeneration)
+        lines.append("    trials: %d" % numTrial)
+        lines.append("    simulations: %d" % self.numSimulation)
+        lines.append("    simulations saved: %d (%2.1f%%)" % (self.numScreened,
+              100*self.numScreened/numTrial))
+        return "\n".join(lines)
+
+
+def compareSurrogate(modelSpecification, observedData, parametersToFit,
+      **kwargs):
+    """
+    Fits parameters with and without the surrogate.
+
+    Parameters
+    ----------
+    modelSpecification: ExtendedRoadRunner/str
+    observedData: pd.DataFrame/NamedTimeseries/str
+    parametersToFit: list-str/list-SBstoat.Parameter
+    kwargs: dict
+        optional arguments for SurrogateFitter
+
+    Returns
+    -------
+    pd.DataFrame
+        index: method (surrogate, differentialEvolution)
+        columns: numSimulation, numScreened, ssr, seconds, parameter names
+    """
+    resultDcts = []
+    for method, isSurrogate in [(SURROGATE, True),
+          (DIFFERENTIAL_EVOLUTION, False)]:
+        fitter = SurrogateFitter(modelSpecification, observedData,
+              parametersToFit, isSurrogate=isSurrogate, **kwargs)
+        fitter.fitModel()
+        resultDct = {METHOD: method, NUM_SIMULATION: fitter.numSimulation,
+              NUM_SCREENED: fitter.numScreened, SSR: fitter.ssr,
+              SECONDS: fitter.seconds}
+        resultDct.update(fitter.valueDct)
+        resultDcts.append(resultDct)
+    return pd.DataFrame(resultDcts).set_index(METHOD)
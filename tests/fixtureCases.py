@@ -0,0 +1,62 @@
+"""
+TestCase classes run by testSimulationFixtures through runTestCases.
+Some of them fail by design, so they are not in a test module.
+"""
+
+from src import simulationFixtures as sf
+from src import shapeChecks
+
+import os
+
+DIR = os.path.dirname(os.path.abspath(__file__))
+with open(os.path.join(DIR, "..", "models", "wolf.ant"), "r") as fd:
+    WOLF_MODEL = fd.read()
+LINEAR_MODEL = """
+R1: S1 -> S2; k1*S1
+R2: S2 -> S3; k2*S2
+S1 = 10
+k1 = 1; k2 = 1
+"""
+INCORRECT_MODEL = """
+R1: S1 -> S2; k1*S1
+R2: S2 -> S3; k2*S1
+S1 = 10
+k1 = 1; k2 = 1
+"""
+
+
+class LinearPathwayTests(sf.ModelTestCase):
+    __test__ = False
+    MODEL = LINEAR_MODEL
+
+    def testS1(self):
+        self.assertTrue(shapeChecks.isMonotone(self.data["[S1]"], direction=-1))
+
+    def testS2(self):
+        self.assertTrue(shapeChecks.isConcave(self.data["[S2]"]))
+
+
+class IncorrectPathwayTests(LinearPathwayTests):
+    MODEL = INCORRECT_MODEL
+
+
+class WolfTests(sf.ModelTestCase):
+    __test__ = False
+    MODEL = WOLF_MODEL
+    END_TIME = 5
+    NUM_POINT = 300
+    SELECTIONS = ["time", "[Glucose]", "[pyruvate]"]
+
+    def testOrder(self):
+        self.assertTrue(shapeChecks.isEventuallyLarger(self.data["[pyruvate]"],
+              self.data["[Glucose]"], idx=100))
+
+    def testWrite(self):
+        self.data[0, 1] = 0
+
+
+class MissingModelTests(sf.ModelTestCase):
+    __test__ = False
+
+    def testNothing(self):
+        pass
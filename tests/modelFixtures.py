@@ -0,0 +1,18 @@
+"""
+Models and data shared by test modules.
+"""
+
+import os
+
+import pandas as pd
+
+DIR = os.path.dirname(os.path.abspath(__file__))
+MODEL_DIR = os.path.join(DIR, "..", "models")
+DATA_DIR = os.path.join(DIR, "..", "data")
+with open(os.path.join(MODEL_DIR, "linear_pathway.ant"), "r") as fd:
+    LINEAR_PATHWAY_MODEL = fd.read()
+# k3 and k4 have their true values, so that k1 and k2 are fitted
+LINEAR_PATHWAY_FIT_MODEL = LINEAR_PATHWAY_MODEL.replace("k3 = 0", "k3 = 3")  \
+      .replace("k4 = 0", "k4 = 4")
+LINEAR_PATHWAY_PATH = os.path.join(DATA_DIR, "linear_pathway.csv")
+LINEAR_PATHWAY_DF = pd.read_csv(LINEAR_PATHWAY_PATH)
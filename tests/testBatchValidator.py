@@ -0,0 +1,91 @@
+from src import batchValidator as bv
+import os
+import pandas as pd
+import shutil
+import tempfile
+import unittest
+
+IGNORE_TEST = False
+IS_PLOT = False
+DIR = os.path.dirname(os.path.abspath(__file__))
+MODEL_DIR = os.path.join(DIR, "..", "models")
+BALANCED_MODEL = """
+R1: S1 -> S2; k1*S1
+R2: S2 -> S1; k2*S2
+S1 = 10; k1 = 1; k2 = 1
+"""
+UNBALANCED_MODEL = """
+R1: S1 -> S2 + S3; k1*S1
+R2: S2 -> S1; k2*S2
+S1 = 10; k1 = 1; k2 = 1
+"""
+BAD_MODEL = "R1: S1 -> ; k1*S1; S1 = "
+SEDML = """<?xml version="1.0" encoding="UTF-8"?>
+<sedML xmlns="http://sed-ml.org/sed-ml/level1/version3" level="1" version="3">
+</sedML>
+"""
+
+
+class TestBatchValidator(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.reportPath = os.path.join(self.directory, "report.csv")
+        for filename, modelStr in [("balanced.ant", BALANCED_MODEL),
+              ("unbalanced.ant", UNBALANCED_MODEL), ("bad.ant", BAD_MODEL),
+              ("simulation.xml", SEDML), ("notes.txt", "notes")]:
+            with open(os.path.join(self.directory, filename), "w") as fd:
+                fd.write(modelStr)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def testGetModelPaths(self):
+        if IGNORE_TEST:
+            return
+        paths = bv.getModelPaths(self.directory)
+        self.assertEqual([os.path.basename(p) for p in paths],
+              ["bad.ant", "balanced.ant", "unbalanced.ant"])
+        paths = bv.getModelPaths(MODEL_DIR)
+        self.assertEqual([os.path.basename(p) for p in paths],
+              ["linear_pathway.ant", "wolf.ant"])
+
+    def testValidateModel(self):
+        if IGNORE_TEST:
+            return
+        resultDct = bv.validateModel(os.path.join(self.directory, "balanced.ant"))
+        for step in bv.STEPS:
+            self.assertEqual(resultDct[step + bv.STATUS_SUFFIX], bv.PASS)
+            self.assertGreaterEqual(resultDct[step + bv.SECONDS_SUFFIX], 0)
+        self.assertEqual(resultDct[bv.MESSAGE], "")
+        resultDct = bv.validateModel(os.path.join(self.directory, "unbalanced.ant"))
+        self.assertEqual(resultDct[bv.LINT + bv.STATUS_SUFFIX], bv.FAIL)
+        self.assertEqual(resultDct[bv.LOAD + bv.STATUS_SUFFIX], bv.PASS)
+        self.assertIn("lint:", resultDct[bv.MESSAGE])
+
+    def testValidateModels(self):
+        if IGNORE_TEST:
+            return
+        df = bv.validateModels(self.directory, numProcess=2,
+              reportPath=self.reportPath, endTime=5)
+        df = df.set_index(bv.MODEL)
+        self.assertEqual(len(df), 3)
+        self.assertEqual(df.loc["bad.ant", bv.LOAD + bv.STATUS_SUFFIX], bv.ERROR)
+        self.assertEqual(df.loc["bad.ant", bv.SIMULATE + bv.STATUS_SUFFIX], bv.SKIP)
+        self.assertEqual(df.loc["bad.ant", bv.STEADY_STATE + bv.STATUS_SUFFIX],
+              bv.SKIP)
+        self.assertEqual(df.loc["balanced.ant", bv.SIMULATE + bv.STATUS_SUFFIX],
+              bv.PASS)
+        reportDF = pd.read_csv(self.reportPath)
+        self.assertEqual(len(reportDF), 3)
+        self.assertIn(bv.LINT + bv.SECONDS_SUFFIX, reportDF.columns)
+
+    def testModelDirectory(self):
+        if IGNORE_TEST:
+            return
+        df = bv.validateModels(MODEL_DIR, numProcess=1).set_index(bv.MODEL)
+        self.assertEqual(df.loc["wolf.ant", bv.SIMULATE + bv.STATUS_SUFFIX], bv.PASS)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+from src import crossValidation as cv
+from src.resultStore import ResultStore
+from tests.modelFixtures import LINEAR_PATHWAY_MODEL, LINEAR_PATHWAY_DF
+import numpy as np
+import os
+import tellurium as te
+import unittest
+from SBstoat import NamedTimeseries, Parameter
+
+IGNORE_TEST = False
+IS_PLOT = False
+DIR = os.path.dirname(os.path.abspath(__file__))
+STORE_PATH = os.path.join(DIR, "testCrossValidation.db")
+COLNAMES = list(LINEAR_PATHWAY_DF.columns)
+NUM_FOLD = 3
+PARAMETERS_TO_FIT = [Parameter("k%d" % n, lower=0, value=0, upper=10)
+      for n in range(1, 5)]
+
+
+class TestCrossValidation(unittest.TestCase):
+
+    def setUp(self):
+        self.remove()
+
+    def tearDown(self):
+        self.remove()
+
+    def remove(self):
+        if os.path.isfile(STORE_PATH):
+            os.remove(STORE_PATH)
+
+    def testFindCloseMatchingValues(self):
+        if IGNORE_TEST:
+            return
+        indexArr = cv.findCloseMatchingValues(np.array(range(10)),
+              np.array([2.1, 2.9, 4.3]))
+        self.assertEqual(list(indexArr), [2, 3, 4])
+
+    def testGenerateFolds(self):
+        if IGNORE_TEST:
+            return
+        observedTS = NamedTimeseries(dataframe=LINEAR_PATHWAY_DF)
+        folds = cv.generateFolds(observedTS, NUM_FOLD)
+        self.assertEqual(len(folds), NUM_FOLD)
+        trainData, testData = folds[0]
+        self.assertEqual(len(observedTS), len(trainData) + len(testData))
+
+    def testCrossValidate(self):
+        if IGNORE_TEST:
+            return
+        model = te.loada(LINEAR_PATHWAY_MODEL)
+        observedTS = NamedTimeseries(dataframe=LINEAR_PATHWAY_DF)
+        df = cv.crossValidate(model, observedTS, PARAMETERS_TO_FIT,
+              COLNAMES, NUM_FOLD, store=STORE_PATH)
+        self.assertEqual(len(df), NUM_FOLD)
+        self.assertTrue(all(df[cv.RSQ] > 0.85))
+        for column in [cv.FIT_TIME, cv.EVALUATION_TIME, cv.NUM_EVALUATION, "k1"]:
+            self.assertTrue(column in df.columns)
+        store = ResultStore(STORE_PATH)
+        self.assertEqual(len(store), NUM_FOLD)
+        # Resume with a stored result that differs from a new fit
+        settingKey = cv.makeSettingKey(model, observedTS, PARAMETERS_TO_FIT)
+        key = cv.makeFoldKey(NUM_FOLD, 0, settingKey)
+        self.remove()
+        store = ResultStore(STORE_PATH)
+        resultDct = dict(df.loc[0])
+        resultDct[cv.RSQ] = -1
+        resultDct[cv.FOLD] = 0
+        store.append(key, resultDct)
+        df = cv.crossValidate(model, observedTS, PARAMETERS_TO_FIT,
+              COLNAMES, NUM_FOLD, store=store)
+        self.assertEqual(df.loc[0, cv.RSQ], -1)
+        self.assertGreater(df.loc[1, cv.RSQ], 0.85)
+        self.assertEqual(len(store), NUM_FOLD)
+        # Results for other parameters are not reused
+        parametersToFit = PARAMETERS_TO_FIT[:2]
+        df = cv.crossValidate(model, observedTS, parametersToFit,
+              COLNAMES, NUM_FOLD, store=store)
+        self.assertGreater(df.loc[0, cv.RSQ], 0)
+        self.assertFalse("k3" in df.columns)
+        self.assertEqual(len(store), 2*NUM_FOLD)
+
+    def testMakeSettingKey(self):
+        if IGNORE_TEST:
+            return
+        model = LINEAR_PATHWAY_MODEL
+        parameters = PARAMETERS_TO_FIT
+        observedTS = NamedTimeseries(dataframe=LINEAR_PATHWAY_DF)
+        settingKey = cv.makeSettingKey(model, observedTS, parameters)
+        self.assertEqual(settingKey,
+              cv.makeSettingKey(model, observedTS, parameters))
+        otherTS = NamedTimeseries(dataframe=LINEAR_PATHWAY_DF.iloc[:50])
+        otherKeys = [
+              cv.makeSettingKey(model.replace("k1 = 0", "k1 = 1"), observedTS,
+                    parameters),
+              cv.makeSettingKey(model, otherTS, parameters),
+              cv.makeSettingKey(model, observedTS, parameters[:2]),
+              cv.makeSettingKey(model, observedTS, parameters,
+                    fitterMethods=["leastsq"]),
+              ]
+        self.assertEqual(len(set(otherKeys + [settingKey])), 5)
+        # Fitting arguments are serialized independently of their order
+        self.assertEqual(
+              cv.makeSettingKey(model, observedTS, parameters,
+                    fitterMethods=["leastsq"], maxChiSq=10),
+              cv.makeSettingKey(model, observedTS, parameters,
+                    maxChiSq=10, fitterMethods=["leastsq"]))
+        with self.assertRaises(ValueError):
+            _ = cv.makeSettingKey(model, observedTS, parameters,
+                  logger=object())
+
+
+if __name__ == '__main__':
+    unittest.main()
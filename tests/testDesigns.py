@@ -0,0 +1,111 @@
+from src import designs
+from src import doe
+import numpy as np
+import os
+import pandas as pd
+import unittest
+
+IGNORE_TEST = False
+IS_PLOT = False
+DIR = os.path.dirname(os.path.abspath(__file__))
+with open(os.path.join(DIR, "..", "models", "wolf.ant"), "r") as fd:
+    WOLF_MODEL = fd.read()
+FACTORS = ["J1_Ki", "J2_k", "J9_k"]
+
+
+class TestDesigns(unittest.TestCase):
+
+    def testMakeFullFactorial(self):
+        if IGNORE_TEST:
+            return
+        df = designs.makeFullFactorial(FACTORS, [-10, 0, 10])
+        self.assertEqual(df.shape, (27, 3))
+        self.assertEqual(len(df.drop_duplicates()), 27)
+        df = designs.makeFullFactorial(FACTORS[:2], {"J1_Ki": [0, 1], "J2_k": [5]})
+        self.assertEqual(df.shape, (2, 2))
+
+    def testMakeFractionalFactorial(self):
+        if IGNORE_TEST:
+            return
+        factors = ["A", "B", "C", "D", "E"]
+        df = designs.makeFractionalFactorial(factors, percent=10)
+        # 3 base factors generate D=ABC and E=AB
+        self.assertEqual(df.shape, (8, 5))
+        codeArr = df.to_numpy()/10
+        self.assertTrue(np.allclose(codeArr[:, 3], np.prod(codeArr[:, :3], axis=1)))
+        # Main effects are orthogonal
+        self.assertTrue(np.allclose(np.dot(codeArr.T, codeArr), 8*np.identity(5)))
+        df = designs.makeFractionalFactorial(["A", "B", "C"],
+              generatorDct={"C": ["A", "B"]})
+        self.assertEqual(len(df), 4)
+        with self.assertRaises(ValueError):
+            _ = designs.makeFractionalFactorial(["A", "B", "C"],
+                  generatorDct={"C": ["A", "D"]})
+
+    def testSpaceFilling(self):
+        if IGNORE_TEST:
+            return
+        df = designs.makeLatinHypercube(FACTORS, 10, maxPercent=20, seed=0)
+        self.assertEqual(df.shape, (10, 3))
+        # One run in each stratum
+        strata = np.floor((df.to_numpy() + 20)/4)
+        for idx in range(3):
+            self.assertEqual(len(set(strata[:, idx])), 10)
+        df = designs.makeSobol(FACTORS, 16, maxPercent=20, seed=0)
+        self.assertEqual(df.shape, (16, 3))
+        self.assertTrue(np.all(np.abs(df.to_numpy()) <= 20))
+
+    def testCalculateEffects(self):
+        if IGNORE_TEST:
+            return
+        designDF = designs.makeFullFactorial(["A", "B", "C"], [-1, 0, 1])
+        aArr = designDF["A"].to_numpy()
+        bArr = designDF["B"].to_numpy()
+        cArr = designDF["C"].to_numpy()
+        yArr = 5 + 2*aArr - bArr + 3*aArr*bArr + 0*cArr
+        responseDF = pd.DataFrame({"y": yArr, "z": 2*yArr})
+        mu, effectDct, anovaDF = designs.calculateEffects(designDF, responseDF)
+        self.assertTrue(np.allclose(mu, [5, 10]))
+        self.assertAlmostEqual(effectDct["A"].loc[1, "y"], 2)
+        self.assertAlmostEqual(effectDct["B"].loc[-1, "z"], 2)
+        self.assertAlmostEqual(effectDct["A:B"].loc[(1, 1), "y"], 3)
+        self.assertAlmostEqual(effectDct["A:B"].loc[(1, -1), "y"], -3)
+        self.assertEqual(list(effectDct["A:B"].index.names), ["A", "B"])
+        self.assertTrue(np.allclose(effectDct["C"], 0))
+        self.assertTrue(np.allclose(effectDct["A:C"], 0))
+        self.assertFalse("A:B:C" in effectDct)
+        self.assertEqual(anovaDF.loc["A:B", designs.DOF], 4)
+        # Effects account for all of the variation
+        self.assertAlmostEqual(anovaDF["y"].sum(), np.sum((yArr - 5)**2))
+
+    def testEstimateLinearEffects(self):
+        if IGNORE_TEST:
+            return
+        designDF = designs.makeSobol(["A", "B"], 32, maxPercent=10, seed=1)
+        aArr = designDF["A"].to_numpy()
+        bArr = designDF["B"].to_numpy()
+        responseSer = pd.Series(1 + aArr + 0.1*aArr*bArr)
+        df = designs.estimateLinearEffects(designDF, responseSer)
+        self.assertEqual(list(df.index), [designs.INTERCEPT, "A", "B", "A:B"])
+        self.assertLess(np.abs(df.loc["B", 0]), 0.1)
+        self.assertGreater(df.loc["A", 0], 9)
+
+    def testRunDesign(self):
+        if IGNORE_TEST:
+            return
+        designDF = designs.makeFullFactorial(FACTORS[:2], [-10, 0, 10])
+        responseDF = designs.runDesign(WOLF_MODEL, designDF,
+              molecule=["Glucose", "NADH"], numProcess=2)
+        self.assertEqual(responseDF.shape, (9, 2))
+        # The baseline agrees with the 1WD
+        baseDF = doe.calculateFrequencyResponses(WOLF_MODEL, factors=FACTORS[:1])
+        isBase = (designDF == 0).all(axis=1)
+        self.assertAlmostEqual(responseDF.loc[isBase, "Glucose"].iloc[0],
+              baseDF.loc["J1_Ki", 0])
+        mu, effectDct, _ = designs.calculateEffects(designDF, responseDF)
+        self.assertEqual(len(mu), 2)
+        self.assertEqual(effectDct["J1_Ki:J2_k"].shape, (9, 2))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+from src import differentialEvolution as de
+import numpy as np
+import unittest
+
+IGNORE_TEST = False
+IS_PLOT = False
+BOUNDS = [(-5, 5), (-5, 5)]
+CENTER = np.array([1, -2])
+
+
+def quadratic(values):
+    return float(np.sum((np.asarray(values) - CENTER)**2))
+
+
+class TestDifferentialEvolution(unittest.TestCase):
+
+    def testMinimize(self):
+        if IGNORE_TEST:
+            return
+        result = de.minimize(BOUNDS, function=quadratic, tol=1e-6, seed=0)
+        self.assertTrue(result.isConverged)
+        self.assertTrue(np.allclose(result.x, CENTER, atol=1e-2))
+        self.assertEqual(result.population.shape, (30, 2))
+        self.assertEqual(result.numEvaluation, 30*(result.numGeneration + 1))
+        self.assertTrue(np.all(result.population >= -5))
+        self.assertTrue(np.all(result.population <= 5))
+        #
+        with self.assertRaises(ValueError):
+            _ = de.minimize(BOUNDS)
+
+    def testMinimizeSeed(self):
+        if IGNORE_TEST:
+            return
+        result1 = de.minimize(BOUNDS, function=quadratic, maxGeneration=5, seed=1)
+        result2 = de.minimize(BOUNDS, function=quadratic, maxGeneration=5, seed=1)
+        self.assertTrue(np.allclose(result1.population, result2.population))
+
+    def testEvaluateFunction(self):
+        if IGNORE_TEST:
+            return
+        parentEnergiesList = []
+        def evaluate(trialArr, parentEnergies):
+            parentEnergiesList.append(parentEnergies)
+            energies = np.array([quadratic(v) for v in trialArr])
+            # Rejecting half of the trials slows but does not stop convergence
+            energies[::2] = np.inf
+            return energies
+        result = de.minimize(BOUNDS, evaluateFunction=evaluate, popsize=10,
+              maxGeneration=50, seed=0)
+        self.assertTrue(np.all(np.isinf(parentEnergiesList[0])))
+        self.assertTrue(np.all(np.isfinite(parentEnergiesList[-1][1::2])))
+        # Parents only improve
+        self.assertTrue(np.all(parentEnergiesList[-1][1::2]
+              <= parentEnergiesList[1][1::2]))
+        self.assertLess(result.fun, 0.1)
+
+    def testInitAndCallback(self):
+        if IGNORE_TEST:
+            return
+        init = np.array([[0, 0], [1, 1], [-1, -1], [2, 2], [3, -3]])
+        result = de.minimize(BOUNDS, function=quadratic, init=init,
+              callback=lambda g, p, e: g >= 3, seed=0)
+        self.assertEqual(result.numGeneration, 3)
+        self.assertEqual(len(result.population), len(init))
+        self.assertFalse(result.isConverged)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+from src import doe
+import numpy as np
+import os
+import tellurium as te
+import unittest
+
+IGNORE_TEST = False
+IS_PLOT = False
+DIR = os.path.dirname(os.path.abspath(__file__))
+with open(os.path.join(DIR, "..", "models", "wolf.ant"), "r") as fd:
+    WOLF_MODEL = fd.read()
+FACTORS = ["J1_Ki", "J2_k", "J9_k"]
+PERCENTS = [-10, 0, 10]
+
+
+class TestDoe(unittest.TestCase):
+
+    def setUp(self):
+        self.roadrunner = te.loada(WOLF_MODEL)
+
+    def testRunSimulations(self):
+        if IGNORE_TEST:
+            return
+        resultDct = doe.runSimulations(self.roadrunner, "J1_Ki", PERCENTS)
+        self.assertEqual(set(resultDct.keys()), set(PERCENTS))
+        self.assertEqual(self.roadrunner["J1_Ki"], 1)
+        with self.assertRaises(ValueError):
+            _ = doe.runSimulations(self.roadrunner, "dummy", PERCENTS)
+
+    def testCalculateFrequencyResponsesSingle(self):
+        if IGNORE_TEST:
+            return
+        df = doe.calculateFrequencyResponses(WOLF_MODEL, factors=FACTORS,
+              percents=PERCENTS)
+        self.assertEqual(list(df.index), FACTORS)
+        self.assertEqual(list(df.columns), PERCENTS)
+        mu, alphaDF = doe.calculateMuAlpha(df)
+        self.assertTrue(np.abs(mu - 5.1) < 0.1)
+        self.assertTrue(np.allclose(alphaDF[0], 0))
+
+    def testCalculateFrequencyResponsesMultiple(self):
+        if IGNORE_TEST:
+            return
+        molecules = ["Glucose", "NADH"]
+        df = doe.calculateFrequencyResponses(self.roadrunner, factors=FACTORS,
+              percents=PERCENTS, molecule=molecules)
+        self.assertEqual(len(df), len(FACTORS)*len(molecules))
+        for molecule in molecules:
+            singleDF = doe.calculateFrequencyResponses(self.roadrunner,
+                  factors=FACTORS, percents=PERCENTS, molecule=molecule)
+            self.assertTrue(np.allclose(df.loc[molecule].to_numpy(),
+                  singleDF.to_numpy()))
+        mu, alphaDF = doe.runStudy(self.roadrunner, factors=FACTORS,
+              percents=PERCENTS, molecule=molecules)
+        self.assertEqual(list(mu.index), molecules)
+        self.assertTrue(np.allclose(alphaDF[0], 0))
+        diffDF = alphaDF.loc["Glucose"] - alphaDF.loc["NADH"]
+        self.assertEqual(diffDF.shape, (len(FACTORS), len(PERCENTS)))
+
+    def testAllMolecules(self):
+        if IGNORE_TEST:
+            return
+        df = doe.calculateFrequencyResponses(self.roadrunner, factors=FACTORS[:1],
+              percents=[0], molecule=None)
+        molecules = list(df.index.get_level_values(doe.MOLECULE))
+        self.assertEqual(molecules, self.roadrunner.getFloatingSpeciesIds())
+
+
+if __name__ == '__main__':
+    unittest.main()
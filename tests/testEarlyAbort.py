@@ -0,0 +1,123 @@
+from src import earlyAbort as ea
+from src.multiFidelity import SSRObjective
+from tests.modelFixtures import LINEAR_PATHWAY_DF, LINEAR_PATHWAY_FIT_MODEL
+import numpy as np
+import os
+import unittest
+from scipy.optimize import OptimizeResult, differential_evolution
+
+IGNORE_TEST = False
+IS_PLOT = False
+DIR = os.path.dirname(os.path.abspath(__file__))
+PARAMETER_NAMES = ["k1", "k2"]
+BOUNDS = [(0.1, 10), (0.1, 10)]
+
+
+class TestChunkedSSRObjective(unittest.TestCase):
+
+    def setUp(self):
+        self.objective = ea.ChunkedSSRObjective(LINEAR_PATHWAY_FIT_MODEL,
+              LINEAR_PATHWAY_DF, PARAMETER_NAMES)
+
+    def testCall(self):
+        if IGNORE_TEST:
+            return
+        expectedObjective = SSRObjective(LINEAR_PATHWAY_FIT_MODEL,
+              LINEAR_PATHWAY_DF, PARAMETER_NAMES)
+        for values in [[1, 2], [5, 0.5]]:
+            expected = expectedObjective(values)
+            # A threshold above the SSR gives the same SSR in chunks
+            ssr = self.objective(values, threshold=2*expected)
+            self.assertLess(abs(ssr - expected)/expected, 1e-4)
+            self.assertTrue(np.isclose(self.objective(values), expected))
+        self.assertEqual(self.objective.numAborted, 0)
+        self.assertEqual(self.objective.simulatedFraction, 1)
+
+    def testAbort(self):
+        if IGNORE_TEST:
+            return
+        ssr = self.objective([5, 0.5])
+        partialSSR = self.objective([5, 0.5], threshold=1)
+        self.assertGreater(partialSSR, 1)
+        self.assertLess(partialSSR, ssr)
+        self.assertEqual(self.objective.numAborted, 1)
+        self.assertEqual(self.objective.numSimulation, 2)
+        self.assertLess(self.objective.simulatedFraction, 1)
+
+    def testCheckInterval(self):
+        if IGNORE_TEST:
+            return
+        ssr = self.objective([5, 0.5])
+        simulatedFractions = []
+        for checkInterval in [1, 7, 1000]:
+            objective = ea.ChunkedSSRObjective(LINEAR_PATHWAY_FIT_MODEL,
+                  LINEAR_PATHWAY_DF, PARAMETER_NAMES,
+                  checkInterval=checkInterval)
+            # Stepping through the observation times gives the same SSR
+            self.assertLess(abs(objective([5, 0.5], threshold=2*ssr) - ssr)/ssr,
+                  1e-4)
+            _ = objective([5, 0.5], threshold=1)
+            self.assertEqual(objective.numAborted,
+                  0 if checkInterval == 1000 else 1)
+            simulatedFractions.append(objective.simulatedFraction)
+        # More frequent checks stop earlier
+        self.assertLessEqual(simulatedFractions[0], simulatedFractions[1])
+        self.assertEqual(simulatedFractions[2], 1)
+
+    def testThreshold(self):
+        if IGNORE_TEST:
+            return
+        ssr = self.objective([5, 0.5])
+        self.objective.threshold = 1
+        self.assertLess(self.objective([5, 0.5]), ssr)
+        self.assertEqual(self.objective.numAborted, 1)
+        # Threshold of the population of scipy
+        callback = self.objective.makeScipyCallback()
+        callback(intermediate_result=OptimizeResult(
+              population_energies=np.array([1, 3, 2])))
+        self.assertEqual(self.objective.threshold, 3)
+
+    def testMakeEvaluateFunction(self):
+        if IGNORE_TEST:
+            return
+        evaluate = self.objective.makeEvaluateFunction()
+        energies = evaluate(np.array([[1, 2], [5, 0.5]]), np.array([np.inf, 1]))
+        self.assertEqual(len(energies), 2)
+        self.assertEqual(self.objective.numAborted, 1)
+
+
+class TestFitEarlyAbort(unittest.TestCase):
+
+    def testMinimizeScipy(self):
+        if IGNORE_TEST:
+            return
+        objective = ea.ChunkedSSRObjective(LINEAR_PATHWAY_FIT_MODEL,
+              LINEAR_PATHWAY_DF, PARAMETER_NAMES)
+        result = ea.minimizeScipy(objective, BOUNDS, popsize=10, seed=0)
+        self.assertGreater(objective.numAborted, 0)
+        self.assertTrue(np.isinf(objective.threshold))
+        expectedObjective = ea.ChunkedSSRObjective(LINEAR_PATHWAY_FIT_MODEL,
+              LINEAR_PATHWAY_DF, PARAMETER_NAMES)
+        expected = differential_evolution(expectedObjective, BOUNDS,
+              popsize=10, seed=0)
+        # Stopping simulations does not change the fit
+        self.assertLess(abs(result.fun - expected.fun)/expected.fun, 1e-3)
+        self.assertTrue(np.allclose(result.x, expected.x, rtol=1e-3))
+
+    def testCompareEarlyAbort(self):
+        if IGNORE_TEST:
+            return
+        df = ea.compareEarlyAbort(LINEAR_PATHWAY_FIT_MODEL, LINEAR_PATHWAY_DF,
+              PARAMETER_NAMES, BOUNDS, popsize=10, seed=0)
+        self.assertEqual(list(df.index), [ea.EARLY_ABORT, ea.FULL_SIMULATION])
+        self.assertGreater(df.loc[ea.EARLY_ABORT, ea.NUM_ABORTED], 0)
+        self.assertEqual(df.loc[ea.FULL_SIMULATION, ea.NUM_ABORTED], 0)
+        self.assertLess(df.loc[ea.EARLY_ABORT, ea.SIMULATED_FRACTION], 1)
+        # Stopping simulations does not change the fit
+        ssrs = df[ea.SSR].values
+        self.assertLess(abs(ssrs[0] - ssrs[1])/ssrs[1], 1e-3)
+        self.assertLess(abs(df.loc[ea.EARLY_ABORT, "k1"] - 1), 0.1)
+
+
+if __name__ == '__main__':
+    unittest.main()
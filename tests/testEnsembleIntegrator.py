@@ -0,0 +1,168 @@
+from src import ensembleIntegrator as ei
+from tests.modelFixtures import LINEAR_PATHWAY_MODEL
+import numpy as np
+import os
+import tellurium as te
+import unittest
+
+IGNORE_TEST = False
+IS_PLOT = False
+DIR = os.path.dirname(os.path.abspath(__file__))
+with open(os.path.join(DIR, "..", "models", "wolf.ant"), "r") as fd:
+    WOLF_MODEL = fd.read()
+PARAMETER_NAMES = ["k1", "k2", "k3", "k4"]
+VALUE_ARR = np.array([[1, 2, 3, 4], [1, 1, 1, 1], [0.5, 0.1, 2, 3]])
+FUNCTION_MODEL = """
+function hill(v, s, k, n)
+  v*s^n/(k^n + s^n)
+end
+compartment C = 2
+species A in C, B in C
+R1: $X -> A; C*hill(vm, X, km, 2)
+R2: A -> B; C*piecewise(k1*A, time < 1, k2*A)
+R3: B -> ; C*kd*B
+X = 1; vm = 2; km = 0.5; k1 = 1; k2 = 0.1; kd = 0.3; A = 1
+"""
+RATE_RULE_MODEL = "A' = -k*A; A = 1; k = 1"
+
+
+class TestEnsembleIntegrator(unittest.TestCase):
+
+    def setUp(self):
+        self.model = ei.EnsembleModel(LINEAR_PATHWAY_MODEL)
+
+    def simulateRoadrunner(self, model, names, values, endTime, numPoint,
+          speciesIds):
+        rr = te.loada(model)
+        rr.integrator.relative_tolerance = 1e-10
+        rr.integrator.absolute_tolerance = 1e-12
+        for name, value in zip(names, values):
+            rr[name] = value
+        data = rr.simulate(0, endTime, numPoint, ["[%s]" % s for s in speciesIds])
+        return np.array(data)
+
+    def testConstructor(self):
+        if IGNORE_TEST:
+            return
+        self.assertEqual(self.model.speciesIds, ["S1", "S2", "S3", "S4", "S5"])
+        self.assertEqual(self.model.constantNames[-4:], PARAMETER_NAMES)
+        self.assertFalse(self.model.isTimeDependent)
+        self.assertTrue("def rhs(t, x, p):" in self.model.source)
+        wolfModel = ei.EnsembleModel(WOLF_MODEL)
+        self.assertEqual(len(wolfModel.speciesIds), 11)
+        #
+        with self.assertRaises(ValueError):
+            _ = ei.EnsembleModel(RATE_RULE_MODEL)
+
+    def testRhs(self):
+        if IGNORE_TEST:
+            return
+        for model in [WOLF_MODEL, FUNCTION_MODEL]:
+            ensembleModel = ei.EnsembleModel(model)
+            rr = te.loada(model)
+            ids = list(rr.getFloatingSpeciesIds())
+            rates = rr.model.getFloatingSpeciesConcentrationRates()
+            expectedArr = np.array([rates[ids.index(s)]
+                  for s in ensembleModel.speciesIds])
+            x = ensembleModel.initialArr[np.newaxis, :]
+            p = ensembleModel.constantArr[np.newaxis, :]
+            arr = ensembleModel.rhs(np.zeros(1), x, p)
+            self.assertTrue(np.allclose(arr[0], expectedArr))
+        self.assertTrue(ei.EnsembleModel(FUNCTION_MODEL).isTimeDependent)
+
+    def testGetInitialArrs(self):
+        if IGNORE_TEST:
+            return
+        initialArr, constantArr = self.model.getInitialArrs(["S1", "k2"],
+              np.array([[1, 2], [3, 4]]))
+        self.assertEqual(initialArr.shape, (2, 5))
+        self.assertEqual(list(initialArr[:, 0]), [1, 3])
+        self.assertEqual(list(constantArr[:, self.model.constantNames.index("k2")]),
+              [2, 4])
+        with self.assertRaises(ValueError):
+            _ = self.model.getInitialArrs(["dummy"], np.ones((1, 1)))
+
+    def testCalculateJacobians(self):
+        if IGNORE_TEST:
+            return
+        _, constantArr = self.model.getInitialArrs(PARAMETER_NAMES, VALUE_ARR)
+        x = np.ones((len(VALUE_ARR), 5))
+        jacobianArr = ei.calculateJacobians(self.model.rhs, np.zeros(3), x,
+              constantArr)
+        self.assertEqual(jacobianArr.shape, (3, 5, 5))
+        for jacobian, values in zip(jacobianArr, VALUE_ARR):
+            expectedArr = np.zeros((5, 5))
+            for idx, value in enumerate(values):
+                expectedArr[idx, idx] = -value
+                expectedArr[idx + 1, idx] = value
+            self.assertTrue(np.allclose(jacobian, expectedArr, atol=1e-6))
+
+    def testSimulate(self):
+        if IGNORE_TEST:
+            return
+        for method in [ei.DOPRI5, ei.ROSENBROCK]:
+            arr = self.model.simulate(PARAMETER_NAMES, VALUE_ARR, endTime=5,
+                  numPoint=50, method=method)
+            self.assertEqual(arr.shape, (3, 50, 5))
+            for values, ensembleArr in zip(VALUE_ARR, arr):
+                expectedArr = self.simulateRoadrunner(LINEAR_PATHWAY_MODEL,
+                      PARAMETER_NAMES, values, 5, 50, self.model.speciesIds)
+                self.assertTrue(np.allclose(ensembleArr, expectedArr,
+                      rtol=1e-3, atol=1e-5))
+        #
+        arr = ei.EnsembleModel(FUNCTION_MODEL).simulate(endTime=3, numPoint=31)
+        expectedArr = self.simulateRoadrunner(FUNCTION_MODEL, [], [], 3, 31,
+              ["A", "B"])
+        # The discontinuity at time 1 is an output time
+        self.assertTrue(np.allclose(arr[0], expectedArr, rtol=1e-3, atol=1e-5))
+        with self.assertRaises(ValueError):
+            _ = self.model.simulate(method="dummy")
+
+    def testSimulateWolf(self):
+        if IGNORE_TEST:
+            return
+        wolfModel = ei.EnsembleModel(WOLF_MODEL)
+        values = np.array([[550.0], [500.0], [600.0]])
+        arr = wolfModel.simulate(["J1_k1"], values, endTime=2, numPoint=50)
+        for value, ensembleArr in zip(values, arr):
+            expectedArr = self.simulateRoadrunner(WOLF_MODEL, ["J1_k1"], value,
+                  2, 50, wolfModel.speciesIds)
+            self.assertLess(np.max(np.abs(ensembleArr - expectedArr)), 1e-2)
+
+    def testIntegrateFailure(self):
+        if IGNORE_TEST:
+            return
+        def rhs(t, x, p):
+            # Solution 1/(1 - p*t) blows up at t = 1/p
+            return p*x**2
+        arr = ei.integrate(rhs, np.ones((2, 1)), np.array([[0.5], [2.0]]),
+              np.linspace(0, 1, 11), maxNumStep=1000)
+        self.assertTrue(np.allclose(arr[0, :, 0], 1/(1 - 0.5*np.linspace(0, 1, 11)),
+              rtol=1e-4))
+        self.assertTrue(np.all(np.isnan(arr[1, 1:])))
+
+    def testIntegrateStatistics(self):
+        if IGNORE_TEST:
+            return
+        initialArr, constantArr = self.model.getInitialArrs(PARAMETER_NAMES,
+              VALUE_ARR)
+        for method in [ei.DOPRI5, ei.ROSENBROCK]:
+            statisticDct = {}
+            _ = ei.integrate(self.model.rhs, initialArr, constantArr,
+                  np.linspace(0, 5, 11), method=method, statisticDct=statisticDct)
+            self.assertEqual(len(statisticDct[ei.NUM_STEP]), len(VALUE_ARR))
+            # At least one step per output interval
+            self.assertTrue(np.all(statisticDct[ei.NUM_STEP] >= 10))
+            self.assertTrue(np.all(statisticDct[ei.NUM_REJECTED] >= 0))
+
+    def testBenchmark(self):
+        if IGNORE_TEST:
+            return
+        df = ei.benchmark(LINEAR_PATHWAY_MODEL, PARAMETER_NAMES, VALUE_ARR)
+        self.assertEqual(list(df.index), [ei.ENSEMBLE, ei.ROADRUNNER])
+        self.assertEqual(list(df.columns), [ei.SECONDS, ei.MAX_DIFFERENCE])
+        self.assertLess(df.loc[ei.ENSEMBLE, ei.MAX_DIFFERENCE], 1e-3)
+
+
+if __name__ == '__main__':
+    unittest.main()
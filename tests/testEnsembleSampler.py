@@ -0,0 +1,167 @@
+from src import ensembleSampler as es
+from tests.modelFixtures import LINEAR_PATHWAY_DF, LINEAR_PATHWAY_FIT_MODEL
+import numpy as np
+import os
+import shutil
+import tempfile
+import unittest
+
+IGNORE_TEST = False
+IS_PLOT = False
+DIR = os.path.dirname(os.path.abspath(__file__))
+VALUE_DCT = {"k1": 1, "k2": 2.2}
+NUM_ITERATION = 20
+
+
+class TestFunctions(unittest.TestCase):
+
+    def testCalculateAutocorrelationTime(self):
+        if IGNORE_TEST:
+            return
+        rng = np.random.default_rng(0)
+        arr = rng.normal(size=(2000, 8))
+        self.assertLess(abs(es.calculateAutocorrelationTime(arr) - 1), 0.2)
+        # AR(1) with coefficient rho has time (1 + rho)/(1 - rho) = 9
+        rho = 0.8
+        for idx in range(1, len(arr)):
+            arr[idx] = rho*arr[idx - 1] + arr[idx]
+        self.assertLess(abs(es.calculateAutocorrelationTime(arr) - 9), 2)
+
+    def testCalculateRhat(self):
+        if IGNORE_TEST:
+            return
+        rng = np.random.default_rng(0)
+        arr = rng.normal(size=(1000, 8))
+        self.assertLess(es.calculateRhat(arr), 1.01)
+        arr[:, :4] += 5
+        self.assertGreater(es.calculateRhat(arr), 2)
+
+
+class TestEnsembleSampler(unittest.TestCase):
+
+    def setUp(self):
+        self.dirPath = tempfile.mkdtemp()
+        self.path = os.path.join(self.dirPath, "chain.db")
+        self.sampler = es.EnsembleSampler(LINEAR_PATHWAY_FIT_MODEL,
+              LINEAR_PATHWAY_DF, VALUE_DCT, seed=0)
+
+    def tearDown(self):
+        shutil.rmtree(self.dirPath)
+
+    def testConstructor(self):
+        if IGNORE_TEST:
+            return
+        self.assertEqual(self.sampler.numWalker, 8)
+        self.assertEqual(self.sampler.numIteration, 0)
+        self.assertTrue(np.allclose(self.sampler.space.bounds[0], [0.01, 100]))
+        with self.assertRaises(ValueError):
+            _ = es.EnsembleSampler(LINEAR_PATHWAY_FIT_MODEL, LINEAR_PATHWAY_DF,
+                  VALUE_DCT, numWalker=3)
+
+    def testRun(self):
+        if IGNORE_TEST:
+            return
+        self.sampler.run(NUM_ITERATION)
+        self.assertEqual(self.sampler.numIteration, NUM_ITERATION)
+        chainArr = self.sampler.getChain()
+        self.assertEqual(chainArr.shape, (NUM_ITERATION + 1, 8, 2))
+        self.assertTrue(0 < self.sampler.acceptanceFraction < 1)
+        self.assertTrue(np.all(np.isfinite(self.sampler.logProbabilityArrs[-1])))
+        # Walkers stay near the optimum
+        self.assertTrue(np.allclose(np.mean(chainArr[-1], axis=0),
+              list(VALUE_DCT.values()), rtol=0.1))
+        df = self.sampler.getSampleDF(discard=10, thin=2)
+        self.assertEqual(list(df.columns), ["k1", "k2", es.LOG_PROBABILITY])
+        self.assertEqual(len(df), 6*8)
+        #
+        df = self.sampler.getDiagnosticDF(discard=10)
+        self.assertEqual(list(df.index), ["k1", "k2"])
+        self.assertEqual(list(df.columns), [es.MEAN, es.STD,
+              es.AUTOCORRELATION_TIME, es.EFFECTIVE_SAMPLE_SIZE, es.RHAT,
+              es.IS_CONVERGED])
+        # The chain is too short
+        self.assertFalse(np.any(df[es.IS_CONVERGED]))
+
+    def testResume(self):
+        if IGNORE_TEST:
+            return
+        self.sampler.run(NUM_ITERATION)
+        sampler = es.EnsembleSampler(LINEAR_PATHWAY_FIT_MODEL,
+              LINEAR_PATHWAY_DF, VALUE_DCT, path=self.path, seed=0)
+        sampler.run(NUM_ITERATION//2)
+        # The chain is read from the store and continued
+        sampler = es.EnsembleSampler(LINEAR_PATHWAY_FIT_MODEL,
+              LINEAR_PATHWAY_DF, VALUE_DCT, path=self.path, seed=0)
+        self.assertEqual(sampler.numIteration, NUM_ITERATION//2)
+        sampler.run(NUM_ITERATION//2)
+        # Seed and iterations
+        self.assertEqual(len(sampler.store), NUM_ITERATION + 2)
+        self.assertTrue(np.allclose(sampler.getChain(), self.sampler.getChain()))
+        self.assertEqual(sampler.numAccepted, self.sampler.numAccepted)
+        with self.assertRaises(ValueError):
+            _ = es.EnsembleSampler(LINEAR_PATHWAY_FIT_MODEL, LINEAR_PATHWAY_DF,
+                  VALUE_DCT, path=self.path, numWalker=10)
+        with self.assertRaises(ValueError):
+            _ = es.EnsembleSampler(LINEAR_PATHWAY_FIT_MODEL, LINEAR_PATHWAY_DF,
+                  VALUE_DCT, path=self.path, seed=1)
+
+    def testResumeDifferentSetting(self):
+        if IGNORE_TEST:
+            return
+        sampler = es.EnsembleSampler(LINEAR_PATHWAY_FIT_MODEL,
+              LINEAR_PATHWAY_DF, VALUE_DCT, path=self.path, seed=0)
+        sampler.run(2)
+        otherDF = LINEAR_PATHWAY_DF.copy()
+        otherDF.iloc[1, 1] += 1
+        argss = [
+              (LINEAR_PATHWAY_FIT_MODEL.replace("k3 = 3", "k3 = 2"),
+              LINEAR_PATHWAY_DF, VALUE_DCT, {}),
+              (LINEAR_PATHWAY_FIT_MODEL, otherDF, VALUE_DCT, {}),
+              (LINEAR_PATHWAY_FIT_MODEL, LINEAR_PATHWAY_DF,
+              {"k1": 1, "k2": 2}, {}),
+              (LINEAR_PATHWAY_FIT_MODEL, LINEAR_PATHWAY_DF, VALUE_DCT,
+              {"boundsDct": {"k1": (0.1, 10)}}),
+              (LINEAR_PATHWAY_FIT_MODEL, LINEAR_PATHWAY_DF, VALUE_DCT,
+              {"sigma": 0.1}),
+              (LINEAR_PATHWAY_FIT_MODEL, LINEAR_PATHWAY_DF, VALUE_DCT,
+              {"columns": ["S1"]}),
+              ]
+        for model, df, valueDct, kwargs in argss:
+            with self.assertRaises(ValueError):
+                _ = es.EnsembleSampler(model, df, valueDct, path=self.path,
+                      **kwargs)
+        # The same setting resumes
+        sampler = es.EnsembleSampler(LINEAR_PATHWAY_FIT_MODEL,
+              LINEAR_PATHWAY_DF, VALUE_DCT, path=self.path)
+        self.assertEqual(sampler.numIteration, 2)
+
+    def testResumeRandomSeed(self):
+        if IGNORE_TEST:
+            return
+        sampler = es.EnsembleSampler(LINEAR_PATHWAY_FIT_MODEL,
+              LINEAR_PATHWAY_DF, VALUE_DCT, path=self.path)
+        sampler.run(NUM_ITERATION//2)
+        seed = sampler.seed
+        # The generated seed is read from the store
+        sampler = es.EnsembleSampler(LINEAR_PATHWAY_FIT_MODEL,
+              LINEAR_PATHWAY_DF, VALUE_DCT, path=self.path)
+        self.assertEqual(sampler.seed, seed)
+        sampler.run(NUM_ITERATION//2)
+        expectedSampler = es.EnsembleSampler(LINEAR_PATHWAY_FIT_MODEL,
+              LINEAR_PATHWAY_DF, VALUE_DCT, seed=seed)
+        expectedSampler.run(NUM_ITERATION)
+        self.assertTrue(np.allclose(sampler.getChain(),
+              expectedSampler.getChain()))
+
+    def testParallel(self):
+        if IGNORE_TEST:
+            return
+        self.sampler.run(NUM_ITERATION//2)
+        with es.EnsembleSampler(LINEAR_PATHWAY_FIT_MODEL, LINEAR_PATHWAY_DF,
+              VALUE_DCT, numProcess=2, seed=0) as sampler:
+            sampler.run(NUM_ITERATION//2)
+        self.assertTrue(np.allclose(sampler.getChain(), self.sampler.getChain()))
+
+
+if __name__ == '__main__':
+    unittest.main()
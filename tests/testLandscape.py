@@ -0,0 +1,132 @@
+from src import landscape as ls
+from tests.modelFixtures import LINEAR_PATHWAY_DF, LINEAR_PATHWAY_FIT_MODEL
+import numpy as np
+import os
+import unittest
+
+IGNORE_TEST = False
+IS_PLOT = False
+DIR = os.path.dirname(os.path.abspath(__file__))
+GRID_DCT = {"k1": np.linspace(0.2, 2, 10), "k2": np.linspace(1, 4, 7)}
+
+
+class TestLandscape(unittest.TestCase):
+
+    def setUp(self):
+        xArr, yArr = np.meshgrid([0, 1, 2, 3], [0, 1, 2], indexing="ij")
+        ssrArr = 1 + (xArr - 1)**2 + 4*(yArr - 2)**2
+        self.landscape = ls.Landscape(["x", "y"], [[0, 1, 2, 3], [0, 1, 2]],
+              ssrArr)
+
+    def testConstructor(self):
+        if IGNORE_TEST:
+            return
+        with self.assertRaises(ValueError):
+            _ = ls.Landscape(["x"], [[0, 1, 2]], np.ones(4))
+
+    def testToDataframe(self):
+        if IGNORE_TEST:
+            return
+        df = self.landscape.toDataframe()
+        self.assertEqual(list(df.columns), ["x", "y", ls.SSR])
+        self.assertEqual(len(df), 12)
+        row = df[(df["x"] == 3) & (df["y"] == 0)].iloc[0]
+        self.assertEqual(row[ls.SSR], 1 + 4 + 16)
+        #
+        df = self.landscape.toHeatmapDF(rowName="y")
+        self.assertEqual(df.shape, (3, 4))
+        self.assertEqual(df.loc[2, 1], 1)
+        # Other dimensions are minimized
+        landscape = ls.Landscape(["x", "y", "z"], [[0, 1], [0, 1], [0, 1, 2]],
+              np.arange(12).reshape(2, 2, 3))
+        df = landscape.toHeatmapDF()
+        self.assertEqual(list(df.values.flatten()), [0, 3, 6, 9])
+
+    def testGetMinimumAndBounds(self):
+        if IGNORE_TEST:
+            return
+        valueDct, ssr = self.landscape.getMinimum()
+        self.assertEqual(valueDct, {"x": 1, "y": 2})
+        self.assertEqual(ssr, 1)
+        boundsDct = self.landscape.getBounds(ssrFactor=2)
+        self.assertEqual(boundsDct, {"x": (0, 3), "y": (1, 2)})
+
+
+class TestLandscapeScanner(unittest.TestCase):
+
+    def testScanGrid(self):
+        if IGNORE_TEST:
+            return
+        with ls.LandscapeScanner(LINEAR_PATHWAY_FIT_MODEL, LINEAR_PATHWAY_DF)  \
+              as scanner:
+            landscape = scanner.scanGrid(GRID_DCT)
+            self.assertEqual(landscape.ssrArr.shape, (10, 7))
+            valueDct, _ = landscape.getMinimum()
+            # The SSR is smallest at k1 = 1.0, k2 = 2.2
+            self.assertEqual(valueDct["k1"], 1)
+            self.assertTrue(valueDct["k2"] in [2, 2.5])
+            lowers, uppers = zip(*landscape.getBounds().values())
+            self.assertTrue(np.all(np.array(lowers) < [1, 2]))
+            self.assertTrue(np.all(np.array(uppers) > [1, 2]))
+            # Values of other parameters
+            landscape = scanner.scanGrid({"k1": [1]}, fixedDct={"k2": 2})
+            self.assertEqual(landscape.fixedDct, {"k2": 2})
+            self.assertEqual(landscape.ssrArr.shape, (1,))
+            #
+            with self.assertRaises(ValueError):
+                _ = scanner.scanGrid({n: [1] for n in ["k1", "k2", "k3", "k4"]})
+
+    def testParallel(self):
+        if IGNORE_TEST:
+            return
+        gridDct = {"k1": np.linspace(0.2, 2, 4), "k2": np.linspace(1, 4, 3),
+              "k3": [2, 3]}
+        with ls.LandscapeScanner(LINEAR_PATHWAY_FIT_MODEL, LINEAR_PATHWAY_DF)  \
+              as scanner:
+            expectedArr = scanner.scanGrid(gridDct).ssrArr
+        with ls.LandscapeScanner(LINEAR_PATHWAY_FIT_MODEL, LINEAR_PATHWAY_DF,
+              numProcess=2) as scanner:
+            landscape = scanner.scanGrid(gridDct)
+            # Workers keep their models between scans
+            landscape2 = scanner.scanGrid(gridDct)
+        self.assertTrue(np.allclose(landscape.ssrArr, expectedArr))
+        self.assertTrue(np.allclose(landscape2.ssrArr, expectedArr))
+
+    def testObservedData(self):
+        if IGNORE_TEST:
+            return
+        # Scanners of the same model with different data
+        scanner = ls.LandscapeScanner(LINEAR_PATHWAY_FIT_MODEL,
+              LINEAR_PATHWAY_DF)
+        ssr = scanner.calculateSSRs(["k1"], [[1]])[0]
+        scanner = ls.LandscapeScanner(LINEAR_PATHWAY_FIT_MODEL,
+              LINEAR_PATHWAY_DF.iloc[:50])
+        ssr2 = scanner.calculateSSRs(["k1"], [[1]])[0]
+        self.assertLess(ssr2, ssr)
+
+    def testScanSlices(self):
+        if IGNORE_TEST:
+            return
+        centerDct = {"k1": 1, "k2": 2, "k3": 3, "k4": 4}
+        boundsDct = {n: (v/2, 3*v/2) for n, v in centerDct.items()}
+        scanner = ls.LandscapeScanner(LINEAR_PATHWAY_FIT_MODEL,
+              LINEAR_PATHWAY_DF)
+        landscapes = scanner.scanSlices(centerDct, boundsDct, numSlice=3,
+              numPoint=5, seed=0)
+        self.assertEqual(len(landscapes), 3)
+        pairs = [tuple(l.names) for l in landscapes]
+        self.assertEqual(len(set(pairs)), 3)
+        for landscape in landscapes:
+            self.assertEqual(landscape.ssrArr.shape, (5, 5))
+            self.assertEqual(len(landscape.fixedDct), 2)
+            # The center is on each slice
+            centerSSR = landscape.ssrArr[2, 2]
+            expectedSSR = scanner.calculateSSRs(list(centerDct.keys()),
+                  [list(centerDct.values())])[0]
+            self.assertTrue(np.isclose(centerSSR, expectedSSR))
+        with self.assertRaises(ValueError):
+            _ = scanner.scanSlices({"k1": 1}, boundsDct)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+from src import linearSolver as ls
+from tests.modelFixtures import LINEAR_PATHWAY_MODEL
+import numpy as np
+import os
+import tellurium as te
+import unittest
+
+IGNORE_TEST = False
+IS_PLOT = False
+DIR = os.path.dirname(os.path.abspath(__file__))
+with open(os.path.join(DIR, "..", "models", "wolf.ant"), "r") as fd:
+    WOLF_MODEL = fd.read()
+PARAMETER_NAMES = ["k1", "k2", "k3", "k4"]
+VALUE_ARR = np.array([[1, 2, 3, 4], [1, 1, 1, 1], [0.5, 0.1, 2, 3]])
+REVERSIBLE_MODEL = """
+compartment C = 2
+species A in C, B in C
+R1: A -> B; C*(kf*A - kr*B)
+R2: B -> ; C*kd*B/2
+A = 3; kf = 1; kr = 0.5; kd = 0.2
+"""
+NONLINEAR_MODEL = "R1: A -> B; k*A*A; A = 1; k = 1"
+AFFINE_MODEL = "R1: $X -> A; k*X; R2: A -> ; k*A; X = 1; k = 1"
+
+
+class TestLinearSolver(unittest.TestCase):
+
+    def setUp(self):
+        self.network = ls.LinearNetwork(LINEAR_PATHWAY_MODEL)
+
+    def simulateRoadrunner(self, model, names, values, endTime, numPoint):
+        rr = te.loada(model)
+        for name, value in zip(names, values):
+            rr[name] = value
+        return np.array(rr.simulate(0, endTime, numPoint))[:, 1:]
+
+    def testConstructor(self):
+        if IGNORE_TEST:
+            return
+        self.assertEqual(self.network.speciesIds, ["S1", "S2", "S3", "S4", "S5"])
+        self.assertTrue(np.allclose(self.network.initialArr, [10, 0, 0, 0, 0]))
+        for model in [NONLINEAR_MODEL, AFFINE_MODEL, WOLF_MODEL]:
+            with self.assertRaises(ls.NonlinearModelError):
+                ls.LinearNetwork(model)
+
+    def testGetRateMatrices(self):
+        if IGNORE_TEST:
+            return
+        rateArr = self.network.getRateMatrices(PARAMETER_NAMES, VALUE_ARR)
+        self.assertEqual(rateArr.shape, (3, 5, 5))
+        expected = np.array([
+              [-1, 0, 0, 0, 0],
+              [1, -2, 0, 0, 0],
+              [0, 2, -3, 0, 0],
+              [0, 0, 3, -4, 0],
+              [0, 0, 0, 4, 0],
+              ])
+        self.assertTrue(np.allclose(rateArr[0], expected))
+        # Mass is conserved
+        self.assertTrue(np.allclose(rateArr.sum(axis=1), 0))
+
+    def testSimulate(self):
+        if IGNORE_TEST:
+            return
+        arr = self.network.simulate(PARAMETER_NAMES, VALUE_ARR, endTime=5,
+              numPoint=50)
+        self.assertEqual(arr.shape, (3, 50, 5))
+        for values, runArr in zip(VALUE_ARR, arr):
+            expectedArr = self.simulateRoadrunner(LINEAR_PATHWAY_MODEL,
+                  PARAMETER_NAMES, values, 5, 50)
+            self.assertTrue(np.allclose(runArr, expectedArr, atol=1e-4))
+        # Initial values
+        arr = self.network.simulate(["S1", "k1"], [[5, 1]], endTime=5,
+              numPoint=50)
+        self.assertAlmostEqual(arr[0, 0, 0], 5)
+        self.assertTrue(np.allclose(arr[0, :, 0], 5*np.exp(-np.linspace(0, 5, 50))))
+        with self.assertRaises(ValueError):
+            self.network.simulate(["k9"], [[1]])
+
+    def testReversibleWithCompartment(self):
+        if IGNORE_TEST:
+            return
+        network = ls.LinearNetwork(REVERSIBLE_MODEL)
+        arr = network.simulate(["kf"], [[1.0], [2.0]], endTime=10, numPoint=40)
+        for values, runArr in zip([[1.0], [2.0]], arr):
+            expectedArr = self.simulateRoadrunner(REVERSIBLE_MODEL, ["kf"],
+                  values, 10, 40)
+            self.assertTrue(np.allclose(runArr, expectedArr, atol=1e-4))
+
+    def testSimulateNamedArray(self):
+        if IGNORE_TEST:
+            return
+        data = self.network.simulateNamedArray(startTime=1, endTime=5,
+              numPoint=5, parameterDct={"k1": 1, "S1": 3})
+        self.assertEqual(data.colnames[:2], ["time", "[S1]"])
+        self.assertTrue(np.allclose(data[:, 0], [1, 2, 3, 4, 5]))
+        self.assertTrue(np.allclose(data["[S1]"], 3*np.exp(-data[:, 0])))
+
+    def testGetLinearNetwork(self):
+        if IGNORE_TEST:
+            return
+        self.assertTrue(ls.isLinearNetwork(LINEAR_PATHWAY_MODEL))
+        self.assertFalse(ls.isLinearNetwork(WOLF_MODEL))
+        self.assertTrue(ls.getLinearNetwork(LINEAR_PATHWAY_MODEL)
+              is ls.getLinearNetwork(LINEAR_PATHWAY_MODEL))
+
+
+if __name__ == '__main__':
+    unittest.main()
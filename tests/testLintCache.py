@@ -0,0 +1,97 @@
+from src import lintCache as lc
+from src.resultStore import ResultStore
+import os
+import unittest
+
+IGNORE_TEST = False
+IS_PLOT = False
+DIR = os.path.dirname(os.path.abspath(__file__))
+STORE_PATH = os.path.join(DIR, "testLintCache.db")
+with open(os.path.join(DIR, "..", "models", "wolf.ant"), "r") as fd:
+    WOLF_MODEL = fd.read()
+# Two pathways that do not share species. R3 is not mass balanced.
+MODEL = """
+R1: A -> B; k*A
+R2: B -> C; k*B
+R3: C -> A + D; k*C
+R4: E -> F; k*E
+R5: F -> E; k*F
+A = 1; E = 1; k = 1
+"""
+BALANCED_MODEL = MODEL.replace("C -> A + D", "C -> A")
+REVISED_MODEL = MODEL.replace("F -> E", "F -> E + G")
+
+
+class TestLintCache(unittest.TestCase):
+
+    def setUp(self):
+        self.remove()
+        self.cache = lc.LintCache()
+
+    def tearDown(self):
+        self.remove()
+
+    def remove(self):
+        if os.path.isfile(STORE_PATH):
+            os.remove(STORE_PATH)
+
+    def testGetComponents(self):
+        if IGNORE_TEST:
+            return
+        components = lc.getComponents(lc.getSBML(MODEL))
+        self.assertEqual([c.reactionIds for c in components],
+              [["R1", "R2", "R3"], ["R4", "R5"]])
+        self.assertEqual(components[1].speciesIds, ["E", "F"])
+        # Keys depend only on the stoichiometry
+        newComponents = lc.getComponents(lc.getSBML(MODEL.replace("k*E", "2*k*E")))
+        self.assertEqual([c.key for c in components], [c.key for c in newComponents])
+        newComponents = lc.getComponents(lc.getSBML(REVISED_MODEL))
+        self.assertEqual(components[0].key, newComponents[0].key)
+        self.assertNotEqual(components[1].key, newComponents[1].key)
+        # Cofactors connect all reactions of the Wolf model
+        self.assertEqual(len(lc.getComponents(lc.getSBML(WOLF_MODEL))), 1)
+
+    def testLint(self):
+        if IGNORE_TEST:
+            return
+        result = self.cache.lint(MODEL)
+        self.assertTrue(result.isError)
+        self.assertIn("R3", result.report)
+        self.assertNotIn("R4", result.report)
+        self.assertEqual(result.numComponent, 2)
+        self.assertEqual(result.numChecked, 2)
+        # Same model
+        result = self.cache.lint(MODEL)
+        self.assertTrue(result.isError)
+        self.assertEqual(result.numChecked, 0)
+        # Only the changed component is checked
+        result = self.cache.lint(REVISED_MODEL)
+        self.assertEqual(result.numChecked, 1)
+        self.assertIn("R5", result.report)
+        result = self.cache.lint(BALANCED_MODEL)
+        self.assertFalse(result.isError)
+        self.assertEqual(result.numChecked, 1)
+
+    def testMoietyAnalysis(self):
+        if IGNORE_TEST:
+            return
+        cache = lc.LintCache(massBalanceCheck=lc.MOIETY_ANALYSIS)
+        result = cache.lint(MODEL)
+        self.assertTrue(result.isError)
+        self.assertIn("imbalances", result.report)
+
+    def testStore(self):
+        if IGNORE_TEST:
+            return
+        cache = lc.LintCache(store=STORE_PATH)
+        result = cache.lint(MODEL)
+        self.assertEqual(len(ResultStore(STORE_PATH)), 2)
+        # A new session uses the stored components
+        cache = lc.LintCache(store=STORE_PATH)
+        newResult = cache.lint(MODEL)
+        self.assertEqual(newResult.numChecked, 0)
+        self.assertEqual(newResult.report, result.report)
+
+
+if __name__ == '__main__':
+    unittest.main()
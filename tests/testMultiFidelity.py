@@ -0,0 +1,79 @@
+from src import multiFidelity as mf
+from tests.modelFixtures import LINEAR_PATHWAY_DF, LINEAR_PATHWAY_FIT_MODEL
+import numpy as np
+import os
+import unittest
+
+IGNORE_TEST = False
+IS_PLOT = False
+DIR = os.path.dirname(os.path.abspath(__file__))
+PARAMETER_NAMES = ["k1", "k2"]
+BOUNDS = [(0.1, 10), (0.1, 10)]
+SCHEDULE = [
+      mf.Fidelity(tolerance=1e-3, stride=10, convergenceTolerance=0.1,
+            maxGeneration=20),
+      mf.Fidelity(tolerance=1e-6, stride=1, convergenceTolerance=0.01,
+            maxGeneration=50),
+      ]
+
+
+class TestSSRObjective(unittest.TestCase):
+
+    def setUp(self):
+        self.objective = mf.SSRObjective(LINEAR_PATHWAY_FIT_MODEL,
+              LINEAR_PATHWAY_DF, PARAMETER_NAMES)
+
+    def testConstructor(self):
+        if IGNORE_TEST:
+            return
+        self.assertEqual(self.objective.columns, ["S1", "S2", "S3", "S4", "S5"])
+        self.assertEqual(self.objective.observedArr.shape, (100, 5))
+        self.assertEqual(self.objective.fidelity, mf.FULL)
+
+    def testCall(self):
+        if IGNORE_TEST:
+            return
+        ssr = self.objective([1, 2])
+        self.assertLess(ssr, self.objective([2, 1]))
+        self.assertEqual(self.objective.numSimulation, 2)
+        self.assertGreater(self.objective.integrationSeconds, 0)
+        # A subset of times has an SSR of the same scale
+        self.objective.setFidelity(SCHEDULE[0])
+        arr = self.objective.simulate([1, 2])
+        self.assertEqual(len(arr), 10)
+        self.assertLess(np.abs(self.objective([1, 2]) - ssr)/ssr, 0.5)
+
+
+class TestMultiFidelity(unittest.TestCase):
+
+    def testFitMultiFidelity(self):
+        if IGNORE_TEST:
+            return
+        result = mf.fitMultiFidelity(LINEAR_PATHWAY_FIT_MODEL,
+              LINEAR_PATHWAY_DF, PARAMETER_NAMES, BOUNDS, schedule=SCHEDULE,
+              numCandidate=3, popsize=10, seed=0)
+        self.assertTrue(np.isclose(result.valueDct["k1"], 1, rtol=0.2))
+        self.assertTrue(np.isclose(result.valueDct["k2"], 2, rtol=0.2))
+        objective = mf.SSRObjective(LINEAR_PATHWAY_FIT_MODEL, LINEAR_PATHWAY_DF,
+              PARAMETER_NAMES)
+        self.assertLessEqual(result.ssr, objective([1, 2]))
+        self.assertEqual(list(result.stageDF.index), [0, 1, mf.FINAL])
+        self.assertEqual(result.stageDF.loc[mf.FINAL, mf.NUM_SIMULATION], 3)
+        self.assertEqual(len(result.candidateDF), 3)
+        self.assertEqual(result.ssr, result.candidateDF[mf.SSR].min())
+
+    def testCompareFidelity(self):
+        if IGNORE_TEST:
+            return
+        df = mf.compareFidelity(LINEAR_PATHWAY_FIT_MODEL, LINEAR_PATHWAY_DF,
+              PARAMETER_NAMES, BOUNDS, schedule=SCHEDULE, seed=0, popsize=10,
+              numCandidate=3)
+        self.assertEqual(list(df.index), [mf.MULTI_FIDELITY, mf.FULL_FIDELITY])
+        for column in [mf.INTEGRATION_SECONDS, mf.NUM_SIMULATION, mf.SSR]:
+            self.assertTrue(column in df.columns)
+        ssrs = df[mf.SSR].to_numpy()
+        self.assertLess(np.abs(ssrs[0] - ssrs[1])/ssrs[1], 0.01)
+
+
+if __name__ == '__main__':
+    unittest.main()
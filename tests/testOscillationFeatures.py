@@ -0,0 +1,85 @@
+from src import oscillationFeatures as of
+import numpy as np
+import os
+import tellurium as te
+import unittest
+
+IGNORE_TEST = False
+IS_PLOT = False
+DIR = os.path.dirname(os.path.abspath(__file__))
+with open(os.path.join(DIR, "..", "models", "wolf.ant"), "r") as fd:
+    WOLF_MODEL = fd.read()
+TIMES = np.linspace(0, 10, 2001)
+
+
+def makeSeries(period, amplitude=1, phase=0, decay=0):
+    return 3 + amplitude*np.exp(-decay*TIMES)*np.sin(2*np.pi*TIMES/period + phase)
+
+
+class TestOscillationFeatures(unittest.TestCase):
+
+    def setUp(self):
+        # runs: 2, species: 3
+        self.arr = np.zeros((2, len(TIMES), 3))
+        self.arr[0, :, 0] = makeSeries(0.5)
+        self.arr[0, :, 1] = makeSeries(1.0, amplitude=2)
+        self.arr[0, :, 2] = 1.0  # Constant
+        self.arr[1, :, 0] = makeSeries(0.5, phase=-np.pi/2)
+        self.arr[1, :, 1] = makeSeries(0.7, decay=0.05)
+        self.arr[1, :, 2] = np.exp(-TIMES)  # Decay without oscillations
+
+    def testFindExtrema(self):
+        if IGNORE_TEST:
+            return
+        isPeak, isTrough = of.findExtrema(self.arr)
+        self.assertEqual(isPeak.shape, self.arr.shape)
+        self.assertEqual(np.sum(isPeak[0, :, 0]), 20)
+        self.assertEqual(np.sum(isTrough[0, :, 1]), 10)
+        self.assertEqual(np.sum(isPeak[1, :, 2]), 0)
+
+    def testCalculateOscillationFeatures(self):
+        if IGNORE_TEST:
+            return
+        features = of.calculateOscillationFeatures(self.arr, TIMES)
+        periodArr = features.period
+        self.assertEqual(periodArr.shape, (2, 3))
+        self.assertTrue(np.allclose(periodArr[:, :2], [[0.5, 1.0], [0.5, 0.7]],
+              rtol=1e-3))
+        self.assertTrue(np.all(np.isnan(periodArr[:, 2])))
+        self.assertTrue(np.allclose(features.amplitude[0, :2], [1, 2], rtol=1e-3))
+        # Phases are compared on the circle
+        def isClose(phase, expected):
+            return np.abs(np.exp(1j*phase) - np.exp(1j*expected)) < 0.01
+        self.assertTrue(isClose(features.phase[0, 0], 0))
+        # Phase shifted by a quarter period
+        self.assertTrue(isClose(features.phase[1, 0], np.pi/2))
+        self.assertTrue(np.allclose(features.damping[0, :2], 0, atol=1e-3))
+        # Decay of 0.05 per unit time with a period of 0.7
+        decrement = 0.05*0.7
+        expected = decrement/np.sqrt(4*np.pi**2 + decrement**2)
+        self.assertAlmostEqual(features.damping[1, 1], expected, places=3)
+
+    def testCalculateFeatureDF(self):
+        if IGNORE_TEST:
+            return
+        rr = te.loada(WOLF_MODEL)
+        data = rr.simulate(0, 5, 300)
+        df = of.calculateFeatureDF([data], molecules=["Glucose", "NADH"],
+              offset=100)
+        self.assertEqual(len(df), 2)
+        self.assertTrue(np.allclose(df[of.PERIOD], 0.2, atol=0.01))
+
+    def testBenchmarkDoeSweep(self):
+        if IGNORE_TEST:
+            return
+        df, fftFrequencies, peakFrequencies = of.benchmarkDoeSweep(WOLF_MODEL,
+              factors=["J1_Ki", "J2_k"], percents=[-5, 0, 5],
+              molecule=["Glucose"], numRepeat=1)
+        self.assertEqual(list(df.index), [of.FFT, of.PEAK])
+        self.assertEqual(fftFrequencies.shape, (6, 1))
+        # Frequencies agree within the resolution of the FFT
+        self.assertTrue(np.allclose(fftFrequencies, peakFrequencies, atol=0.3))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+from src import periodDetection as pdt
+import numpy as np
+import os
+import tellurium as te
+import unittest
+
+IGNORE_TEST = False
+IS_PLOT = False
+DIR = os.path.dirname(os.path.abspath(__file__))
+with open(os.path.join(DIR, "..", "models", "wolf.ant"), "r") as fd:
+    WOLF_MODEL = fd.read()
+DECAY_MODEL = """
+S1 -> S2; k*S1
+k = 1; S1 = 10
+"""
+
+
+class TestPeriodDetection(unittest.TestCase):
+
+    def testFindPeaks(self):
+        if IGNORE_TEST:
+            return
+        values = [0, 1, 0, 2, 2, 1, 3, 3]
+        self.assertEqual(list(pdt.findPeaks(values)), [1, 3])
+        self.assertEqual(list(pdt.findPeaks(values, isMinimum=True)), [2, 5])
+        self.assertEqual(len(pdt.findPeaks([1, 2, 3])), 0)
+
+    def testCalculateDampingRatio(self):
+        if IGNORE_TEST:
+            return
+        self.assertAlmostEqual(pdt.calculateDampingRatio([1, 1, 1]), 0)
+        self.assertGreater(pdt.calculateDampingRatio([4, 2, 1]), 0)
+        self.assertLess(pdt.calculateDampingRatio([1, 2, 4]), 0)
+        self.assertTrue(np.isnan(pdt.calculateDampingRatio([1])))
+
+    def testPeriodDetectorChunks(self):
+        if IGNORE_TEST:
+            return
+        times = np.linspace(0, 10, 1001)
+        values = np.exp(-0.1*times)*np.sin(2*np.pi*times/0.5)
+        detector = pdt.PeriodDetector(tolerance=0.01)
+        for idx in range(0, 1000, 37):
+            detector.update(times[idx:idx + 38], values[idx:idx + 38])
+        self.assertTrue(np.allclose(detector.getPeriods(), 0.5, rtol=0.01))
+        self.assertTrue(detector.isStable())
+        result = detector.getResult(10)
+        self.assertGreater(result.damping, 0)
+        self.assertEqual(result.numPeak, 20)
+
+    def testSimulateUntilPeriodic(self):
+        if IGNORE_TEST:
+            return
+        maxTime = 20
+        result = pdt.simulateUntilPeriodic(WOLF_MODEL, "Glucose",
+              transientTime=1, maxTime=maxTime)
+        self.assertTrue(result.isConverged)
+        self.assertLess(result.endTime, maxTime)
+        # Compare with the FFT of a long simulation
+        rr = te.loada(WOLF_MODEL)
+        data = rr.simulate(0, 40, 40001, selections=["time", "[Glucose]"])
+        values = np.array(data[10000:, 1])
+        amplitudes = np.abs(np.fft.rfft(values - np.mean(values)))
+        freqs = np.fft.rfftfreq(len(values), 0.001)
+        fftPeriod = 1/freqs[np.argmax(amplitudes)]
+        self.assertTrue(np.abs(result.period - fftPeriod) < 0.01)
+        self.assertLess(np.abs(result.damping), 0.01)
+        self.assertGreater(result.amplitude, 1)
+        # Parameters change the period
+        result2 = pdt.simulateUntilPeriodic(rr, "Glucose", transientTime=1,
+              parameterDct={"J1_Ki": 1.1})
+        self.assertNotAlmostEqual(result.period, result2.period, places=3)
+
+    def testNoOscillation(self):
+        if IGNORE_TEST:
+            return
+        result = pdt.simulateUntilPeriodic(DECAY_MODEL, "S1", maxTime=5)
+        self.assertFalse(result.isConverged)
+        self.assertTrue(np.isnan(result.period))
+        self.assertEqual(result.endTime, 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+from src import profileLikelihood as pl
+from tests.modelFixtures import LINEAR_PATHWAY_DF, LINEAR_PATHWAY_MODEL
+import numpy as np
+import os
+import pandas as pd
+import tellurium as te
+import unittest
+
+IGNORE_TEST = False
+IS_PLOT = False
+DIR = os.path.dirname(os.path.abspath(__file__))
+VALUE_DCT = {"k1": 1, "k2": 2, "k3": 3, "k4": 4}
+# Only the product of ka and kb is determined by the data
+PRODUCT_MODEL = """
+S1 -> S2; ka*kb*S1
+S1 = 10; ka = 1; kb = 2
+"""
+
+
+def makeProductDF():
+    rr = te.loada(PRODUCT_MODEL)
+    data = rr.simulate(0, 5, 50, ["time", "[S1]", "[S2]"])
+    df = pd.DataFrame(np.array(data), columns=["time", "S1", "S2"])
+    rng = np.random.default_rng(0)
+    df[["S1", "S2"]] += rng.normal(0, 0.1, (50, 2))
+    return df
+
+
+class TestProfileLikelihood(unittest.TestCase):
+
+    def setUp(self):
+        self.profile = pl.ProfileLikelihood(LINEAR_PATHWAY_MODEL,
+              LINEAR_PATHWAY_DF, VALUE_DCT)
+
+    def testConstructor(self):
+        if IGNORE_TEST:
+            return
+        self.assertEqual(self.profile.space.names, list(VALUE_DCT.keys()))
+        self.assertTrue(np.allclose(self.profile.space.bounds[0], [0.01, 100]))
+        self.assertTrue(np.isclose(self.profile.threshold, 3.841, atol=1e-3))
+
+    def testFitOptimum(self):
+        if IGNORE_TEST:
+            return
+        valueDct = self.profile.fitOptimum()
+        self.assertLess(abs(valueDct["k1"] - 1), 0.05)
+        ssr = self.profile.objective(list(VALUE_DCT.values()))
+        self.assertLess(self.profile.ssr, ssr)
+
+    def testCalculateProfiles(self):
+        if IGNORE_TEST:
+            return
+        df = self.profile.calculateProfiles(names=["k1", "k3"])
+        self.assertEqual(list(df.index), ["k1", "k3"])
+        self.assertEqual(list(df.columns), [pl.VALUE, pl.LOWER, pl.UPPER,
+              pl.FLAG, pl.SECONDS, pl.NUM_SIMULATION])
+        self.assertTrue(np.all(df[pl.FLAG] == pl.IDENTIFIABLE))
+        self.assertTrue(np.all(df[pl.LOWER] < df[pl.VALUE]))
+        self.assertTrue(np.all(df[pl.UPPER] > df[pl.VALUE]))
+        # The statistic at the ends of the interval is the threshold
+        profileDF = self.profile.profileDct["k1"].profileDF
+        statistics = np.interp([df.loc["k1", pl.LOWER], df.loc["k1", pl.UPPER]],
+              profileDF["k1"], profileDF[pl.STATISTIC])
+        self.assertTrue(np.allclose(statistics, self.profile.threshold, rtol=0.2))
+        self.assertEqual(profileDF[pl.STATISTIC].min(), 0)
+
+    def testStructurallyNonIdentifiable(self):
+        if IGNORE_TEST:
+            return
+        profile = pl.ProfileLikelihood(PRODUCT_MODEL, makeProductDF(),
+              {"ka": 1, "kb": 2}, boundsDct={"ka": (0.1, 10)})
+        df = profile.calculateProfiles()
+        self.assertEqual(df.loc["ka", pl.FLAG], pl.STRUCTURALLY_NON_IDENTIFIABLE)
+        self.assertTrue(np.isclose(df.loc["ka", pl.LOWER], 0.1))
+        self.assertTrue(np.isclose(df.loc["ka", pl.UPPER], 10))
+        # The product is constant along the profile
+        profileDF = profile.profileDct["ka"].profileDF
+        products = profileDF["ka"]*profileDF["kb"]
+        self.assertLess(np.std(products)/np.mean(products), 1e-3)
+
+    def testParallel(self):
+        if IGNORE_TEST:
+            return
+        expectedDF = self.profile.calculateProfiles(names=["k1", "k2"])
+        with pl.ProfileLikelihood(LINEAR_PATHWAY_MODEL, LINEAR_PATHWAY_DF,
+              VALUE_DCT, numProcess=2) as profile:
+            df = profile.calculateProfiles(names=["k1", "k2"])
+            # The pool is reused
+            _ = profile.calculateProfiles(names=["k3"])
+        self.assertIsNone(profile._pool)
+        for column in [pl.LOWER, pl.UPPER]:
+            self.assertTrue(np.allclose(df[column], expectedDF[column],
+                  rtol=1e-4))
+        self.assertEqual(len(profile.profileDct), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+from src import reparameterization as rp
+from tests.modelFixtures import LINEAR_PATHWAY_DF, LINEAR_PATHWAY_FIT_MODEL
+import numpy as np
+import os
+import SBstoat
+import unittest
+
+IGNORE_TEST = False
+IS_PLOT = False
+DIR = os.path.dirname(os.path.abspath(__file__))
+PARAMETERS = [SBstoat.Parameter("k1", lower=0, value=1, upper=1e3),
+      SBstoat.Parameter("k2", lower=0, value=1, upper=1e3)]
+
+
+class TestParameterSpace(unittest.TestCase):
+
+    def testFromParameters(self):
+        if IGNORE_TEST:
+            return
+        parameters = [SBstoat.Parameter("a", lower=0, value=1, upper=1e5),
+              SBstoat.Parameter("b", lower=-1, value=0, upper=1), "c"]
+        space = rp.ParameterSpace.fromParameters(parameters,
+              parameterUpperBound=100)
+        self.assertEqual(space.names, ["a", "b", "c"])
+        self.assertEqual(list(space.isLogs), [True, False, True])
+        self.assertTrue(np.allclose(space.searchBounds,
+              [[-1, 5], [-1, 1], [-4, 2]]))
+        space = rp.ParameterSpace.fromParameters(parameters, isLogScale=False)
+        self.assertFalse(np.any(space.isLogs))
+        self.assertTrue(np.allclose(space.searchBounds, space.bounds))
+        #
+        with self.assertRaises(ValueError):
+            _ = rp.ParameterSpace(["a"], [(0, 1)], [True])
+
+    def testFromValues(self):
+        if IGNORE_TEST:
+            return
+        space = rp.ParameterSpace.fromValues({"a": 2, "b": 1, "c": -1},
+              boundsDct={"b": (0, 10)})
+        self.assertEqual(space.names, ["a", "b", "c"])
+        self.assertEqual(list(space.isLogs), [True, True, False])
+        self.assertTrue(np.allclose(space.bounds,
+              [[0.02, 200], [1e-5, 10], [-100, -0.01]]))
+        space = rp.ParameterSpace.fromValues({"a": 2}, boundFactor=10)
+        self.assertTrue(np.allclose(space.bounds, [[0.2, 20]]))
+
+    def testConversion(self):
+        if IGNORE_TEST:
+            return
+        space = rp.ParameterSpace(["a", "b"], [(1, 1000), (-1, 1)], [True, False])
+        valueArr = np.array([[10, 0.5], [1000, -1]])
+        searchArr = space.toSearch(valueArr)
+        self.assertTrue(np.allclose(searchArr, [[1, 0.5], [3, -1]]))
+        self.assertTrue(np.allclose(space.toValues(searchArr), valueArr))
+        self.assertTrue(np.allclose(space.toValues(np.array([2, 0])), [100, 0]))
+
+
+class TestTightenBounds(unittest.TestCase):
+
+    def testTightenBounds(self):
+        if IGNORE_TEST:
+            return
+        bounds = np.array([[0, 10], [0, 10]])
+        population = np.array([[1, 1], [2, 2], [9, 9], [8, 1]])
+        energies = np.array([1, 2, 3, 4])
+        newBounds = rp.tightenBounds(bounds, population, energies,
+              eliteFraction=0.5, margin=0.5)
+        self.assertTrue(np.allclose(newBounds, [[0.5, 2.5], [0.5, 2.5]]))
+        # Tightened bounds have a minimum width and are within the bounds
+        population = np.array([[0, 5], [0, 5]])
+        newBounds = rp.tightenBounds(bounds, population, energies[:2],
+              margin=1)
+        self.assertTrue(np.allclose(newBounds, [[0, 0.1], [4.9, 5.1]]))
+
+
+class TestAdaptiveFitter(unittest.TestCase):
+
+    def testFitModel(self):
+        if IGNORE_TEST:
+            return
+        fitter = rp.AdaptiveFitter(LINEAR_PATHWAY_FIT_MODEL, LINEAR_PATHWAY_DF,
+              PARAMETERS, numExplorationGeneration=5, popsize=10, seed=0)
+        with self.assertRaises(ValueError):
+            _ = fitter.reportFit()
+        fitter.fitModel()
+        self.assertLess(abs(fitter.valueDct["k1"] - 1), 0.1)
+        self.assertEqual(len(fitter.stageDF), 3)
+        # Bounds are tightened
+        widths = fitter.stageDF[rp.WIDTH].values
+        self.assertEqual(widths[0], 1)
+        self.assertTrue(np.all(np.diff(widths) < 0))
+        self.assertLess(fitter.bounds[0, 0], fitter.valueDct["k1"])
+        self.assertGreater(fitter.bounds[0, 1], fitter.valueDct["k1"])
+        self.assertEqual(fitter.numSimulation,
+              fitter.stageDF[rp.NUM_SIMULATION].sum())
+        self.assertTrue("k1" in fitter.reportFit())
+
+    def testCompareReparameterization(self):
+        if IGNORE_TEST:
+            return
+        df = rp.compareReparameterization(LINEAR_PATHWAY_FIT_MODEL,
+              LINEAR_PATHWAY_DF, PARAMETERS, numExplorationGeneration=5,
+              popsize=10, seed=1)
+        self.assertEqual(list(df.index), [rp.LINEAR, rp.LOG_SCALE, rp.ADAPTIVE])
+        self.assertLess(df.loc[rp.ADAPTIVE, rp.NUM_GENERATION],
+              df.loc[rp.LINEAR, rp.NUM_GENERATION])
+
+
+if __name__ == '__main__':
+    unittest.main()
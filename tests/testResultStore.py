@@ -0,0 +1,61 @@
+from src.resultStore import ResultStore
+import numpy as np
+import os
+import pandas as pd
+import unittest
+
+IGNORE_TEST = False
+IS_PLOT = False
+DIR = os.path.dirname(os.path.abspath(__file__))
+STORE_PATH = os.path.join(DIR, "testResultStore.db")
+
+
+class TestResultStore(unittest.TestCase):
+
+    def setUp(self):
+        self.remove()
+        self.store = ResultStore(STORE_PATH)
+
+    def tearDown(self):
+        self.remove()
+
+    def remove(self):
+        if os.path.isfile(STORE_PATH):
+            os.remove(STORE_PATH)
+
+    def testAppend(self):
+        if IGNORE_TEST:
+            return
+        self.store.append("a", {"rsq": np.float64(0.5), "arr": np.array([1, 2])})
+        self.assertTrue(self.store.has("a"))
+        self.assertFalse(self.store.has("b"))
+        dct = self.store.get("a")
+        self.assertEqual(dct["rsq"], 0.5)
+        self.assertEqual(dct["arr"], [1, 2])
+        with self.assertRaises(ValueError):
+            self.store.append("a", {"rsq": 1})
+
+    def testPersistence(self):
+        if IGNORE_TEST:
+            return
+        self.store.append("b", {"rsq": 1})
+        self.store.append("a", {"rsq": 2})
+        store = ResultStore(STORE_PATH)
+        self.assertEqual(store.getKeys(), ["b", "a"])
+        self.assertEqual(len(store), 2)
+
+    def testToDataframe(self):
+        if IGNORE_TEST:
+            return
+        df = self.store.toDataframe()
+        self.assertEqual(len(df), 0)
+        self.store.append("a", {"rsq": 1, "k1": 2})
+        self.store.append("b", {"rsq": 3, "k1": 4})
+        df = self.store.toDataframe()
+        self.assertTrue(isinstance(df, pd.DataFrame))
+        self.assertEqual(list(df.index), ["a", "b"])
+        self.assertEqual(list(df["k1"]), [2, 4])
+
+
+if __name__ == '__main__':
+    unittest.main()
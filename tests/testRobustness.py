@@ -0,0 +1,85 @@
+from src import robustness
+from src.resultStore import ResultStore
+import numpy as np
+import os
+import unittest
+
+IGNORE_TEST = False
+IS_PLOT = False
+DIR = os.path.dirname(os.path.abspath(__file__))
+STORE_PATH = os.path.join(DIR, "testRobustness.db")
+with open(os.path.join(DIR, "..", "models", "wolf.ant"), "r") as fd:
+    WOLF_MODEL = fd.read()
+LINEAR_MODEL = """
+R1: S1 -> S2; k1*S1
+R2: S2 -> S3; k2*S2
+S1 = 10
+k1 = 1; k2 = 1
+"""
+FACTORS = ["J1_Ki", "J2_k", "J9_k"]
+PROPERTIES = [
+      robustness.makeLargerProperty("pyruvate", "Glucose", startIdx=100),
+      robustness.makeLargerProperty("Glucose", "pyruvate", startIdx=100),
+      robustness.makeOscillationProperty("Glucose", minPeak=10, startIdx=100),
+      ]
+
+
+class TestRobustness(unittest.TestCase):
+
+    def setUp(self):
+        self.remove()
+
+    def tearDown(self):
+        self.remove()
+
+    def remove(self):
+        if os.path.isfile(STORE_PATH):
+            os.remove(STORE_PATH)
+
+    def testLinearProperties(self):
+        if IGNORE_TEST:
+            return
+        properties = [
+              robustness.makeMonotoneProperty("S1", direction=-1),
+              robustness.makeConcaveProperty("S2"),
+              robustness.makeMonotoneProperty("S3", direction=1),
+              robustness.makeBoundedProperty("S3", lower=0, upper=10),
+              robustness.makeBoundedProperty("S3", upper=5),
+              ]
+        df = robustness.calculateRobustness(LINEAR_MODEL, ["k1", "k2"],
+              properties, numSample=20, maxPercent=50, seed=0, batchSize=8,
+              endTime=10, numPoint=100)
+        self.assertEqual(list(df.index), [p.name for p in properties])
+        self.assertTrue(np.all(df[robustness.NUM_RUN] == 20))
+        self.assertTrue(np.allclose(df[robustness.PASS_FRACTION][:4], 1))
+        self.assertEqual(df.loc["S3_bounded", robustness.NUM_PASS].iloc[1], 0)
+        self.assertAlmostEqual(df[robustness.STD_ERROR].iloc[0], 0)
+
+    def testWolf(self):
+        if IGNORE_TEST:
+            return
+        df = robustness.calculateRobustness(WOLF_MODEL, FACTORS, PROPERTIES,
+              numSample=12, maxPercent=10, seed=0, batchSize=5, numProcess=2,
+              store=STORE_PATH)
+        fractions = df[robustness.PASS_FRACTION]
+        self.assertGreater(fractions["pyruvate>Glucose"], 0.9)
+        self.assertAlmostEqual(fractions["Glucose>pyruvate"], 0)
+        self.assertGreater(fractions["Glucose_oscillates"], 0.5)
+        # Batches are checkpointed
+        self.assertEqual(len(ResultStore(STORE_PATH)), 3)
+        newDF = robustness.calculateRobustness(WOLF_MODEL, FACTORS, PROPERTIES,
+              numSample=12, maxPercent=10, seed=0, batchSize=5, store=STORE_PATH)
+        self.assertTrue(newDF.equals(df))
+        self.assertEqual(len(ResultStore(STORE_PATH)), 3)
+        # Verdicts of other properties are not taken from the store
+        properties = [robustness.makeOscillationProperty("Glucose",
+              minPeak=1000, startIdx=100)]
+        newDF = robustness.calculateRobustness(WOLF_MODEL, FACTORS, properties,
+              numSample=12, maxPercent=10, seed=0, batchSize=5, store=STORE_PATH)
+        self.assertEqual(newDF.loc["Glucose_oscillates",
+              robustness.PASS_FRACTION], 0)
+        self.assertEqual(len(ResultStore(STORE_PATH)), 6)
+
+
+if __name__ == '__main__':
+    unittest.main()
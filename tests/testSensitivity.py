@@ -0,0 +1,97 @@
+from src import sensitivity
+from src.resultStore import ResultStore
+import numpy as np
+import os
+import unittest
+
+IGNORE_TEST = False
+IS_PLOT = False
+DIR = os.path.dirname(os.path.abspath(__file__))
+STORE_PATH = os.path.join(DIR, "testSensitivity.db")
+with open(os.path.join(DIR, "..", "models", "wolf.ant"), "r") as fd:
+    WOLF_MODEL = fd.read()
+FACTORS = ["J1_Ki", "J2_k", "J9_k"]
+OUTPUTS = [sensitivity.makePeakFrequencyOutput("Glucose"),
+      sensitivity.makeFinalConcentrationOutput("NADH")]
+
+
+class TestSensitivity(unittest.TestCase):
+
+    def setUp(self):
+        self.remove()
+
+    def tearDown(self):
+        self.remove()
+
+    def remove(self):
+        if os.path.isfile(STORE_PATH):
+            os.remove(STORE_PATH)
+
+    def testMakeMorrisTrajectories(self):
+        if IGNORE_TEST:
+            return
+        trajectoryArr, orderArr, stepArr, delta = sensitivity.makeMorrisTrajectories(
+              5, 20, numLevel=4, seed=0)
+        self.assertEqual(trajectoryArr.shape, (20, 6, 5))
+        self.assertTrue(np.all(trajectoryArr >= 0))
+        self.assertTrue(np.all(trajectoryArr <= 1 + 1e-12))
+        diffArr = np.diff(trajectoryArr, axis=1)
+        # Exactly one factor changes by delta at each step
+        self.assertTrue(np.all(np.sum(np.abs(diffArr) > 0, axis=2) == 1))
+        self.assertTrue(np.allclose(np.abs(diffArr).sum(axis=2), delta))
+        changedArr = np.argmax(np.abs(diffArr), axis=2)
+        self.assertTrue(np.all(changedArr == orderArr))
+
+    def testCalculateSobolIndices(self):
+        if IGNORE_TEST:
+            return
+        sampleArr = sensitivity.makeSaltelliSample(3, 1024, seed=0)
+        self.assertEqual(sampleArr.shape, (5, 1024, 3))
+        self.assertTrue(np.allclose(sampleArr[2][:, 1:], sampleArr[0][:, 1:]))
+        self.assertTrue(np.allclose(sampleArr[2][:, 0], sampleArr[1][:, 0]))
+        # y = x1 + 2*x2 has S1 = ST = (0.2, 0.8, 0)
+        yArr = sampleArr[:, :, 0] + 2*sampleArr[:, :, 1]
+        s1Arr, stArr = sensitivity.calculateSobolIndices(yArr[:, :, np.newaxis])
+        self.assertTrue(np.allclose(s1Arr[:, 0], [0.2, 0.8, 0], atol=0.05))
+        self.assertTrue(np.allclose(stArr[:, 0], [0.2, 0.8, 0], atol=0.05))
+
+    def testCalculateMorris(self):
+        if IGNORE_TEST:
+            return
+        df = sensitivity.calculateMorris(WOLF_MODEL, FACTORS, OUTPUTS,
+              numTrajectory=3, seed=1, numProcess=2, batchSize=4)
+        self.assertEqual(list(df.index), FACTORS)
+        self.assertEqual(df.shape, (3, 6))
+        self.assertTrue(np.all(df.xs(sensitivity.MU_STAR, axis=1,
+              level=sensitivity.STATISTIC) >= 0))
+
+    def testCalculateSobolCheckpoint(self):
+        if IGNORE_TEST:
+            return
+        df = sensitivity.calculateSobol(WOLF_MODEL, FACTORS, OUTPUTS,
+              numSample=8, seed=1, batchSize=10, store=STORE_PATH)
+        self.assertEqual(df.shape, (3, 4))
+        store = ResultStore(STORE_PATH)
+        self.assertEqual(len(store), 4)  # 40 simulations
+        # Resuming uses the stored outputs
+        df2 = sensitivity.calculateSobol(WOLF_MODEL, FACTORS, OUTPUTS,
+              numSample=8, seed=1, batchSize=10, store=store)
+        self.assertTrue(np.allclose(df.to_numpy(), df2.to_numpy(), equal_nan=True))
+        self.assertEqual(len(store), 4)
+        # Other outputs are not taken from the store
+        outputs = [sensitivity.makeFinalConcentrationOutput("Glucose")]
+        df3 = sensitivity.calculateSobol(WOLF_MODEL, FACTORS, outputs,
+              numSample=8, seed=1, batchSize=10, store=store)
+        self.assertEqual(len(store), 8)
+        expectedDF = sensitivity.calculateSobol(WOLF_MODEL, FACTORS, outputs,
+              numSample=8, seed=1, batchSize=10)
+        self.assertTrue(np.allclose(df3.to_numpy(), expectedDF.to_numpy(),
+              equal_nan=True))
+        # Outputs with the same name and different arguments
+        outputs = [sensitivity.makePeakFrequencyOutput("Glucose", offset=50)]
+        self.assertNotEqual(sensitivity.getOutputKey(outputs),
+              sensitivity.getOutputKey(OUTPUTS[:1]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,178 @@
+from src import shapeChecks as sc
+import numpy as np
+import os
+import pandas as pd
+import tellurium as te
+import unittest
+
+IGNORE_TEST = False
+IS_PLOT = False
+DIR = os.path.dirname(os.path.abspath(__file__))
+with open(os.path.join(DIR, "..", "models", "wolf.ant"), "r") as fd:
+    WOLF_MODEL = fd.read()
+WOLF_DF = pd.read_csv(os.path.join(DIR, "..", "data", "wolf.csv"))
+LINEAR_MODEL = """
+R1: S1 -> S2; k1*S1
+R2: S2 -> S3; k2*S2
+S1 = 10
+k1 = 1; k2 = 1
+"""
+
+
+# Implementations in the dynamic testing notebook
+def isMonotoneLoop(values, direction=1):
+    arr = np.array(values)
+    diff = direction*(arr[1:] - arr[:-1])
+    return all([v > 0 for v in diff])
+
+def isConcaveLoop(values):
+    arr = np.array(values)
+    result = False
+    for idx in range(1, len(values)-2):
+        isIncreasing = isMonotoneLoop(arr[:idx], direction=1)
+        isDecreasing = isMonotoneLoop(arr[idx:], direction=-1)
+        if isIncreasing and isDecreasing:
+            result = True
+            break
+    return result
+
+# Implementation in the Verification and Validation exercises
+def isLargerLoop(ser1, ser2, fractionTrue=1.0, startIdx=0):
+    numTrue = sum(ser1.loc[startIdx:] > ser2.loc[startIdx:])
+    result = 1.0*numTrue / (len(ser1) - startIdx)
+    return result >= fractionTrue
+
+
+class TestShapeChecks(unittest.TestCase):
+
+    def setUp(self):
+        self.seriess = [[1, 2, 3, 4], [4, 3, 2, 1], [1, 4, 3, 2],
+              [1, 2, 4, 3], [1, 2, 3, 2, 1], [2, 1, 2, 1], [1, 1, 2, 1]]
+
+    def testIsMonotone(self):
+        if IGNORE_TEST:
+            return
+        for values in self.seriess:
+            for direction in [1, -1]:
+                self.assertEqual(bool(sc.isMonotone(values, direction=direction)),
+                      isMonotoneLoop(values, direction=direction))
+        arr = np.array([[1, 2, 3], [3, 2, 1], [1, 1, 2]])
+        self.assertEqual(list(sc.isMonotone(arr)), [True, False, False])
+        self.assertEqual(list(sc.isMonotone(arr.T, direction=-1, axis=0)),
+              [False, True, False])
+
+    def testIsConcave(self):
+        if IGNORE_TEST:
+            return
+        for values in self.seriess:
+            self.assertEqual(bool(sc.isConcave(values)), isConcaveLoop(values),
+                  values)
+        self.assertTrue(sc.isConcave([3, 2, 1, 2, 3], direction=-1))
+        self.assertFalse(sc.isConcave([1, 2, 3]))
+
+    def testIsConcaveRandom(self):
+        if IGNORE_TEST:
+            return
+        rng = np.random.default_rng(0)
+        # Short series so that all outcomes occur
+        arr = rng.integers(0, 4, size=(2000, 6))
+        expecteds = [isConcaveLoop(v) for v in arr]
+        self.assertGreater(sum(expecteds), 0)
+        self.assertEqual(list(sc.isConcave(arr)), expecteds)
+
+    def testCountSignChanges(self):
+        if IGNORE_TEST:
+            return
+        self.assertEqual(sc.countSignChanges([1, -1, 0, -2, 3]), 2)
+        self.assertEqual(sc.countSignChanges([0, 0, 1, 0, 1]), 0)
+        self.assertEqual(sc.countSignChanges([0.1, -0.1, 1], tolerance=0.5), 0)
+        times = np.linspace(0, 1, 1001)
+        arr = np.sin(2*np.pi*np.outer([1, 2, 3], times))
+        # Turning points of sines
+        self.assertEqual(list(sc.countSignChanges(np.diff(arr, axis=1))),
+              [2, 4, 6])
+
+    def testIsEventuallyLarger(self):
+        if IGNORE_TEST:
+            return
+        values1 = np.array([[0, 0, 2, 2], [3, 3, 0, 3]])
+        values2 = np.ones(4)
+        self.assertEqual(list(sc.findLargerIndex(values1, values2)), [2, 3])
+        self.assertEqual(list(sc.isEventuallyLarger(values1, values2, idx=2)),
+              [True, False])
+        self.assertEqual(list(sc.isEventuallyLarger(values1, values2)),
+              [True, True])
+        self.assertFalse(sc.isEventuallyLarger(values2, values1[0]))
+        self.assertEqual(sc.findLargerIndex(values2, values1[0]), 4)
+
+    def testIsBounded(self):
+        if IGNORE_TEST:
+            return
+        arr = np.array([[0, 1, 2], [0, 1, 5], [0, np.nan, 1]])
+        self.assertEqual(list(sc.isBounded(arr, lower=0, upper=2)),
+              [True, False, False])
+        self.assertTrue(sc.isBounded([1, 2], lower=0))
+
+    def testLinearPathway(self):
+        if IGNORE_TEST:
+            return
+        rr = te.loada(LINEAR_MODEL)
+        data = rr.simulate(0, 10, 100)
+        self.assertTrue(sc.isMonotone(data["[S1]"], direction=-1))
+        self.assertTrue(sc.isConcave(data["[S2]"]))
+        self.assertTrue(sc.isMonotone(data["[S3]"], direction=1))
+        self.assertTrue(sc.isBounded(data[:, 1:], lower=0, upper=10, axis=0).all())
+
+    def testWolfBatch(self):
+        if IGNORE_TEST:
+            return
+        rr = te.loada(WOLF_MODEL)
+        data = rr.simulate(0, 5, 300, selections=["[Glucose]",
+              "[fructose_1_6_bisphosphate]", "[pyruvate]"])
+        # Order of concentrations after the initial transients
+        arr = np.array(data)[np.newaxis, :, :]
+        self.assertTrue(sc.isEventuallyLarger(arr[:, :, 2], arr[:, :, 1],
+              idx=100)[0])
+        self.assertTrue(sc.isEventuallyLarger(arr[:, :, 1], arr[:, :, 0],
+              idx=100)[0])
+        # Oscillations of glucose
+        self.assertGreater(sc.countSignChanges(np.diff(arr, axis=1), axis=1)[0, 0],
+              20)
+
+    def testCalculateDominanceMatrix(self):
+        if IGNORE_TEST:
+            return
+        arr = np.array([[1, 0, 2], [2, 0, 1], [3, 4, 0], [4, 5, 0]])
+        dominanceArr = sc.calculateDominanceMatrix(arr)
+        self.assertEqual(dominanceArr.shape, (3, 3))
+        self.assertTrue(np.allclose(np.diag(dominanceArr), 0))
+        self.assertAlmostEqual(dominanceArr[0, 1], 0.5)
+        self.assertAlmostEqual(dominanceArr[0, 2], 0.75)
+        self.assertAlmostEqual(sc.calculateDominanceMatrix(arr, startIdx=2)[1, 0],
+              1.0)
+        # Batch of runs
+        batchArr = np.stack([arr, -arr])
+        dominanceArr = sc.calculateDominanceMatrix(batchArr)
+        self.assertEqual(dominanceArr.shape, (2, 3, 3))
+        self.assertAlmostEqual(dominanceArr[1, 2, 0], 0.75)
+        with self.assertRaises(ValueError):
+            sc.calculateDominanceMatrix(arr, startIdx=4)
+
+    def testCalculateDominanceDF(self):
+        if IGNORE_TEST:
+            return
+        molecules = ["Glucose", "fructose_1_6_bisphosphate", "pyruvate"]
+        startIdx = 400
+        df = sc.calculateDominanceDF(WOLF_DF, molecules=molecules,
+              startIdx=startIdx)
+        for molecule1 in molecules:
+            for molecule2 in molecules:
+                for fractionTrue in [0.95, 1.0]:
+                    self.assertEqual(df.loc[molecule1, molecule2] >= fractionTrue,
+                          isLargerLoop(WOLF_DF[molecule1], WOLF_DF[molecule2],
+                          fractionTrue=fractionTrue, startIdx=startIdx))
+        self.assertGreaterEqual(df.loc["pyruvate", "Glucose"], 1.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+from src import sharedData
+from src.sharedData import SharedDataPublisher
+import multiprocessing
+import numpy as np
+import os
+import pandas as pd
+import unittest
+
+IGNORE_TEST = False
+IS_PLOT = False
+DIR = os.path.dirname(os.path.abspath(__file__))
+WOLF_DF = pd.read_csv(os.path.join(DIR, "..", "data", "wolf.csv"))
+
+
+def sumColumn(args):
+    descriptor, idx = args
+    arr = sharedData.attachArray(descriptor)
+    return arr[:, idx].sum()
+
+
+class ColumnSummer(sharedData.SharedDataPool):
+
+    def __init__(self, observedDF, numProcess):
+        self.observedDF = observedDF
+        self.numProcess = numProcess
+
+    def sumColumns(self):
+        pool = self._getPool()
+        numCol = len(self.observedDF.columns)
+        return pool.map(sumColumn, [(self._descriptor, n)
+              for n in range(numCol)])
+
+
+class TestSharedData(unittest.TestCase):
+
+    def setUp(self):
+        self.publisher = SharedDataPublisher()
+
+    def tearDown(self):
+        sharedData.detachAll()
+        self.publisher.close()
+
+    def testPublishArray(self):
+        if IGNORE_TEST:
+            return
+        arr = WOLF_DF.to_numpy()
+        descriptor = self.publisher.publish("wolf", arr)
+        self.assertIsNone(descriptor.columns)
+        sharedArr = sharedData.attachArray(descriptor)
+        self.assertTrue(np.allclose(arr, sharedArr))
+        with self.assertRaises(ValueError):
+            sharedArr[0, 0] = 1
+        with self.assertRaises(ValueError):
+            self.publisher.publish("wolf", arr)
+
+    def testAttachDataframe(self):
+        if IGNORE_TEST:
+            return
+        descriptor = self.publisher.publish("wolf", WOLF_DF)
+        df = sharedData.attachDataframe(descriptor)
+        self.assertEqual(list(df.columns), list(WOLF_DF.columns))
+        self.assertTrue(np.allclose(df.to_numpy(), WOLF_DF.to_numpy()))
+
+    def testPool(self):
+        if IGNORE_TEST:
+            return
+        descriptor = self.publisher.publish("wolf", WOLF_DF)
+        numCol = len(WOLF_DF.columns)
+        with multiprocessing.Pool(2) as pool:
+            sums = pool.map(sumColumn, [(descriptor, n) for n in range(numCol)])
+        self.assertTrue(np.allclose(sums, WOLF_DF.sum().to_numpy()))
+
+
+class TestSharedDataPool(unittest.TestCase):
+
+    def testSumColumns(self):
+        if IGNORE_TEST:
+            return
+        with ColumnSummer(WOLF_DF, 2) as summer:
+            sums = summer.sumColumns()
+            # The pool is reused
+            pool = summer._pool
+            _ = summer.sumColumns()
+            self.assertTrue(summer._pool is pool)
+        self.assertTrue(np.allclose(sums, WOLF_DF.sum().to_numpy()))
+        self.assertIsNone(summer._pool)
+        self.assertIsNone(summer._publisher)
+
+    def testWithoutObservedData(self):
+        if IGNORE_TEST:
+            return
+        with ColumnSummer(None, 2) as summer:
+            pool = summer._getPool()
+            self.assertEqual(pool.map(abs, [-1, 2]), [1, 2])
+            # Nothing is published
+            self.assertIsNone(summer._publisher)
+            self.assertIsNone(summer._descriptor)
+        self.assertIsNone(summer._pool)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+from src import simulationFixtures as sf
+from src import simulator
+from tests import fixtureCases
+import numpy as np
+import os
+import time
+import unittest
+
+IGNORE_TEST = False
+IS_PLOT = False
+DIR = os.path.dirname(os.path.abspath(__file__))
+LINEAR_MODEL = fixtureCases.LINEAR_MODEL
+INCORRECT_MODEL = fixtureCases.INCORRECT_MODEL
+WOLF_MODEL = fixtureCases.WOLF_MODEL
+
+
+class TestSimulationFixtures(unittest.TestCase):
+
+    def setUp(self):
+        sf.clearSimulations()
+
+    def testGetSimulation(self):
+        if IGNORE_TEST:
+            return
+        data1 = sf.getSimulation(LINEAR_MODEL)
+        data2 = sf.getSimulation(LINEAR_MODEL)
+        self.assertTrue(data1 is data2)
+        self.assertEqual(data1.shape, (100, 4))
+        with self.assertRaises(ValueError):
+            data1[0, 1] = 3
+        data3 = sf.getSimulation(LINEAR_MODEL, selections=["time", "[S1]"])
+        self.assertEqual(data3.shape, (100, 2))
+        self.assertTrue(np.allclose(data1["[S1]"], data3["[S1]"]))
+        self.assertEqual(len(sf._SIMULATION_DCT), 2)
+
+    def testGetModelHash(self):
+        if IGNORE_TEST:
+            return
+        self.assertEqual(simulator.getModelHash(LINEAR_MODEL),
+              simulator.getModelHash(LINEAR_MODEL))
+        self.assertNotEqual(simulator.getModelHash(LINEAR_MODEL),
+              simulator.getModelHash(INCORRECT_MODEL))
+
+    def testRunTestCases(self):
+        if IGNORE_TEST:
+            return
+        for numProcess in [1, 2]:
+            df = sf.runTestCases([fixtureCases.LinearPathwayTests,
+                  fixtureCases.IncorrectPathwayTests, fixtureCases.WolfTests,
+                  fixtureCases.MissingModelTests], numProcess=numProcess)
+            self.assertEqual(len(df), 7)
+            outcomeDct = {i.split(".")[-2] + "." + i.split(".")[-1]: o
+                  for i, o in df[sf.OUTCOME].items()}
+            self.assertEqual(outcomeDct["LinearPathwayTests.testS2"], sf.PASSED)
+            self.assertEqual(outcomeDct["IncorrectPathwayTests.testS1"], sf.PASSED)
+            self.assertEqual(outcomeDct["IncorrectPathwayTests.testS2"], sf.FAILURE)
+            self.assertEqual(outcomeDct["WolfTests.testOrder"], sf.PASSED)
+            # Fixtures are read-only
+            self.assertEqual(outcomeDct["WolfTests.testWrite"], sf.ERROR)
+            self.assertEqual(outcomeDct["MissingModelTests.testNothing"], sf.ERROR)
+
+    def testSimulateOnce(self):
+        if IGNORE_TEST:
+            return
+        startTime = time.time()
+        sf.getSimulation(WOLF_MODEL, endTime=5, numPoint=300)
+        firstTime = time.time() - startTime
+        startTime = time.time()
+        for _ in range(10):
+            sf.getSimulation(WOLF_MODEL, endTime=5, numPoint=300)
+        self.assertLess(time.time() - startTime, firstTime)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+from src import simulator
+from src.resultStore import ResultStore
+from src.simulator import BatchSimulator
+import numpy as np
+import os
+import tellurium as te
+import unittest
+
+IGNORE_TEST = False
+IS_PLOT = False
+DIR = os.path.dirname(os.path.abspath(__file__))
+STORE_PATH = os.path.join(DIR, "testSimulator.db")
+with open(os.path.join(DIR, "..", "models", "wolf.ant"), "r") as fd:
+    WOLF_MODEL = fd.read()
+PARAMETER_NAMES = ["J1_Ki", "J2_k"]
+VALUE_ARR = np.array([[1, 9.8], [1.2, 9.8], [1, 12], [0.8, 8]])
+
+
+class TestBatchSimulator(unittest.TestCase):
+
+    def setUp(self):
+        self.simulator = BatchSimulator(WOLF_MODEL, endTime=5, numPoint=300)
+        self.remove()
+
+    def tearDown(self):
+        self.simulator.close()
+        self.remove()
+
+    def remove(self):
+        if os.path.isfile(STORE_PATH):
+            os.remove(STORE_PATH)
+
+    def testLoadModel(self):
+        if IGNORE_TEST:
+            return
+        rr = te.loada(WOLF_MODEL)
+        sbml = simulator.getModelString(rr)
+        self.assertTrue(simulator.isSBML(sbml))
+        self.assertFalse(simulator.isSBML(WOLF_MODEL))
+        rr2 = simulator.loadModel(sbml)
+        self.assertEqual(rr2.getFloatingSpeciesIds(), rr.getFloatingSpeciesIds())
+
+    def testMakeNamedArray(self):
+        if IGNORE_TEST:
+            return
+        data = simulator.makeNamedArray(np.ones((3, 2)), ["time", "[S1]"])
+        rr = te.loada(WOLF_MODEL)
+        self.assertTrue(isinstance(data, type(rr.simulate(0, 1, 2))))
+        self.assertEqual(data.colnames, ["time", "[S1]"])
+        self.assertTrue(np.allclose(data["[S1]"], 1))
+
+    def testSimulate(self):
+        if IGNORE_TEST:
+            return
+        arr = self.simulator.simulate(PARAMETER_NAMES, VALUE_ARR)
+        self.assertEqual(arr.shape, (4, 300, 11))
+        rr = te.loada(WOLF_MODEL)
+        rr["J1_Ki"] = 1.2
+        data = rr.simulate(0, 5, 300)
+        self.assertTrue(np.allclose(arr[1], data[:, 1:]))
+        self.assertEqual(len(self.simulator.times), 300)
+        with self.assertRaises(ValueError):
+            _ = self.simulator.simulate(["J1_Ki"], VALUE_ARR)
+
+    def testSimulateParallel(self):
+        if IGNORE_TEST:
+            return
+        with BatchSimulator(WOLF_MODEL, endTime=5, numPoint=300,
+              molecules=["Glucose", "NADH"], numProcess=2) as parallelSimulator:
+            arr = parallelSimulator.simulate(PARAMETER_NAMES, VALUE_ARR)
+        serialArr = self.simulator.simulate(PARAMETER_NAMES, VALUE_ARR)
+        self.assertEqual(arr.shape, (4, 300, 2))
+        self.assertTrue(np.allclose(arr[:, :, 1], serialArr[:, :, -1]))
+
+    def testEvaluateStore(self):
+        if IGNORE_TEST:
+            return
+        store = ResultStore(STORE_PATH)
+        def finalFunction(arr, _):
+            return arr[:, -1, :]
+        def maxFunction(arr, _):
+            return np.max(arr, axis=1)
+        arr = self.simulator.evaluate(PARAMETER_NAMES, VALUE_ARR,
+              finalFunction, batchSize=2, store=store, outputKey="final")
+        self.assertEqual(len(store), 2)
+        # A store is reused for other outputs
+        maxArr = self.simulator.evaluate(PARAMETER_NAMES, VALUE_ARR,
+              maxFunction, batchSize=2, store=store, outputKey="max")
+        self.assertEqual(len(store), 4)
+        self.assertTrue(np.all(maxArr >= arr))
+        self.assertFalse(np.allclose(maxArr, arr))
+        arr2 = self.simulator.evaluate(PARAMETER_NAMES, VALUE_ARR,
+              finalFunction, batchSize=2, store=store, outputKey="final")
+        self.assertTrue(np.allclose(arr, arr2))
+        self.assertEqual(len(store), 4)
+        with self.assertRaises(ValueError):
+            _ = self.simulator.evaluate(PARAMETER_NAMES, VALUE_ARR,
+                  finalFunction, store=store)
+
+    def testGetParameterValues(self):
+        if IGNORE_TEST:
+            return
+        values = self.simulator.getParameterValues(PARAMETER_NAMES)
+        self.assertTrue(np.allclose(values, [1, 9.8]))
+        with self.assertRaises(ValueError):
+            _ = self.simulator.getParameterValues(["dummy"])
+
+
+if __name__ == '__main__':
+    unittest.main()
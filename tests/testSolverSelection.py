@@ -0,0 +1,190 @@
+from src import ensembleIntegrator
+from src import solverSelection as ss
+from src.resultStore import ResultStore
+from tests.modelFixtures import LINEAR_PATHWAY_FIT_MODEL
+import numpy as np
+import os
+import shutil
+import tellurium as te
+import tempfile
+import unittest
+
+IGNORE_TEST = False
+IS_PLOT = False
+DIR = os.path.dirname(os.path.abspath(__file__))
+# All rate constants have their true values
+LINEAR_PATHWAY_MODEL = LINEAR_PATHWAY_FIT_MODEL.replace("k1 = 0", "k1 = 1")  \
+      .replace("k2 = 0", "k2 = 2")
+with open(os.path.join(DIR, "..", "models", "wolf.ant"), "r") as fd:
+    WOLF_MODEL = fd.read()
+LORENZ_MODEL = """
+x' = sigma*(y - x);
+y' = x*(rho - z) - y;
+z' = x*y - beta*z;
+x = 0.96259;  y = 2.07272;  z = 18.65888;
+sigma = 10;  rho = 28; beta = 2.67;
+"""
+CONFIGURATIONS = [
+      ss.SolverConfiguration(backend=ss.ROADRUNNER, integrator=ss.CVODE,
+            isStiff=True, tolerance=1e-6),
+      ss.SolverConfiguration(backend=ss.ROADRUNNER, integrator=ss.CVODE,
+            isStiff=False, tolerance=1e-6),
+      ss.SolverConfiguration(backend=ss.ROADRUNNER, integrator=ss.RK4,
+            isStiff=False, tolerance=np.nan),
+      ss.SolverConfiguration(backend=ss.ENSEMBLE,
+            integrator=ensembleIntegrator.DOPRI5, isStiff=False, tolerance=1e-6),
+      ]
+
+
+class TestSolverSelection(unittest.TestCase):
+
+    def setUp(self):
+        ss.clearConfigurations()
+        self.tempDir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tempDir)
+        ss.clearConfigurations()
+
+    def testGetConfigurationName(self):
+        if IGNORE_TEST:
+            return
+        names = [ss.getConfigurationName(c) for c in CONFIGURATIONS]
+        self.assertEqual(names, ["roadrunner:cvode-bdf:1e-06",
+              "roadrunner:cvode-adams:1e-06", "roadrunner:rk4",
+              "ensemble:dopri5:1e-06"])
+        configurations = ss.getDefaultConfigurations()
+        self.assertEqual(len(configurations), 12)
+        self.assertEqual(len(set(ss.getConfigurationName(c)
+              for c in configurations)), 12)
+
+    def testConfigureRoadrunner(self):
+        if IGNORE_TEST:
+            return
+        roadrunner = te.loada(WOLF_MODEL)
+        ss.configureRoadrunner(roadrunner, CONFIGURATIONS[1])
+        self.assertEqual(roadrunner.integrator.getName(), ss.CVODE)
+        self.assertFalse(roadrunner.integrator.stiff)
+        self.assertEqual(roadrunner.integrator.relative_tolerance, 1e-6)
+        with self.assertRaises(ValueError):
+            ss.configureRoadrunner(roadrunner, CONFIGURATIONS[3])
+
+    def testProfileSolvers(self):
+        if IGNORE_TEST:
+            return
+        df = ss.profileSolvers(WOLF_MODEL, endTime=1, numPoint=50,
+              configurations=CONFIGURATIONS, numRepeat=1)
+        self.assertEqual(list(df.index),
+              [ss.getConfigurationName(c) for c in CONFIGURATIONS])
+        for column in [ss.SECONDS, ss.NUM_STEP, ss.ERROR, ss.IS_ACCURATE]:
+            self.assertTrue(column in df.columns)
+        # Stiff model
+        self.assertTrue(df.loc["roadrunner:cvode-bdf:1e-06", ss.IS_ACCURATE])
+        self.assertLess(df.loc["roadrunner:cvode-bdf:1e-06", ss.NUM_STEP],
+              df.loc["roadrunner:cvode-adams:1e-06", ss.NUM_STEP])
+        self.assertFalse(df.loc["roadrunner:rk4", ss.IS_ACCURATE])
+        # Rejected steps are counted by the ensemble integrator
+        self.assertGreaterEqual(df.loc["ensemble:dopri5:1e-06", ss.NUM_REJECTED], 0)
+        self.assertTrue(np.isnan(df.loc["roadrunner:cvode-bdf:1e-06",
+              ss.NUM_REJECTED]))
+        # Models with rate rules are not supported by the ensemble integrator
+        df = ss.profileSolvers(LORENZ_MODEL, endTime=1, numPoint=50,
+              configurations=CONFIGURATIONS, numRepeat=1)
+        self.assertFalse(df.loc["ensemble:dopri5:1e-06", ss.IS_ACCURATE])
+        self.assertTrue(len(df.loc["ensemble:dopri5:1e-06", ss.MESSAGE]) > 0)
+        self.assertTrue(df.loc["roadrunner:cvode-adams:1e-06", ss.IS_ACCURATE])
+
+    def testSelectConfiguration(self):
+        if IGNORE_TEST:
+            return
+        df = ss.profileSolvers(LINEAR_PATHWAY_MODEL, endTime=1, numPoint=20,
+              configurations=CONFIGURATIONS, numRepeat=1)
+        configuration = ss.selectConfiguration(df)
+        name = ss.getConfigurationName(configuration)
+        self.assertTrue(df.loc[name, ss.IS_ACCURATE])
+        self.assertEqual(df.loc[name, ss.SECONDS],
+              df[df[ss.IS_ACCURATE]][ss.SECONDS].min())
+        # No accurate configuration
+        df[ss.IS_ACCURATE] = False
+        configuration = ss.selectConfiguration(df)
+        self.assertEqual(ss.getConfigurationName(configuration),
+              df[ss.ERROR].idxmin())
+
+    def testGetSolverConfiguration(self):
+        if IGNORE_TEST:
+            return
+        path = os.path.join(self.tempDir, "solvers.db")
+        kwargs = dict(endTime=1, numPoint=20, configurations=CONFIGURATIONS[:2],
+              numRepeat=1)
+        configuration = ss.getSolverConfiguration(WOLF_MODEL, store=path, **kwargs)
+        self.assertEqual(configuration.backend, ss.ROADRUNNER)
+        self.assertTrue(configuration.isStiff)
+        # The profile is cached in the process and in the store
+        profileDF = ss.getProfile(WOLF_MODEL, **kwargs)
+        self.assertTrue(ss.getProfile(WOLF_MODEL, store=path, **kwargs)
+              is profileDF)
+        ss.clearConfigurations()
+        self.assertEqual(len(ResultStore(path)), 1)
+        storedDF = ss.getProfile(WOLF_MODEL, store=path, **kwargs)
+        self.assertEqual(list(storedDF.index), list(profileDF.index))
+        self.assertTrue(np.allclose(storedDF[ss.SECONDS], profileDF[ss.SECONDS]))
+        self.assertEqual(ss.getSolverConfiguration(WOLF_MODEL, store=path,
+              **kwargs), configuration)
+        self.assertEqual(len(ResultStore(path)), 1)
+
+    def testGetSolverConfigurationFixedStep(self):
+        if IGNORE_TEST:
+            return
+        kwargs = dict(endTime=1, numPoint=51, configurations=CONFIGURATIONS[:3],
+              numRepeat=1)
+        profileDF = ss.getProfile(LINEAR_PATHWAY_MODEL, **kwargs)
+        profileDF.loc[:, ss.IS_ACCURATE] = True
+        profileDF.loc["roadrunner:rk4", ss.SECONDS] = 0
+        configuration = ss.getSolverConfiguration(LINEAR_PATHWAY_MODEL,
+              **kwargs)
+        self.assertEqual(configuration.integrator, ss.RK4)
+        # Output intervals up to that of the trials (0.02)
+        configuration = ss.getSolverConfiguration(LINEAR_PATHWAY_MODEL,
+              stepSize=0.01, **kwargs)
+        self.assertEqual(configuration.integrator, ss.RK4)
+        # rk4 is not accurate for longer steps than in the trials
+        configuration = ss.getSolverConfiguration(LINEAR_PATHWAY_MODEL,
+              stepSize=0.1, **kwargs)
+        self.assertEqual(configuration.integrator, ss.CVODE)
+
+    def testMakeConfigurationKey(self):
+        if IGNORE_TEST:
+            return
+        key = ss.makeConfigurationKey(WOLF_MODEL)
+        self.assertEqual(key, ss.makeConfigurationKey(WOLF_MODEL, endTime=2))
+        otherKeys = [ss.makeConfigurationKey(LINEAR_PATHWAY_MODEL),
+              ss.makeConfigurationKey(WOLF_MODEL, endTime=10),
+              ss.makeConfigurationKey(WOLF_MODEL, numPoint=1000),
+              ss.makeConfigurationKey(WOLF_MODEL, maxError=1e-6),
+              ss.makeConfigurationKey(WOLF_MODEL,
+                    configurations=ss.getDefaultConfigurations([1e-3])),
+              ]
+        self.assertEqual(len(set(otherKeys + [key])), 6)
+
+    def testSimulate(self):
+        if IGNORE_TEST:
+            return
+        kwargs = dict(configurations=CONFIGURATIONS[3:], numRepeat=1)
+        data = ss.simulate(LINEAR_PATHWAY_MODEL, endTime=2, numPoint=20,
+              **kwargs)
+        configuration = ss.getSolverConfiguration(LINEAR_PATHWAY_MODEL,
+              **kwargs)
+        self.assertEqual(configuration.backend, ss.ENSEMBLE)
+        roadrunner = te.loada(LINEAR_PATHWAY_MODEL)
+        expected = roadrunner.simulate(0, 2, 20)
+        self.assertEqual(list(data.colnames), list(expected.colnames))
+        self.assertTrue(np.allclose(data, expected, rtol=1e-4, atol=1e-6))
+        # Other horizons and grids use the same profile
+        data = ss.simulate(LINEAR_PATHWAY_MODEL, endTime=5, numPoint=11,
+              **kwargs)
+        self.assertEqual(data.shape, (11, 6))
+        self.assertEqual(len(ss._PROFILE_DCT), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
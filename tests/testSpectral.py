@@ -0,0 +1,121 @@
+from src import spectral
+import numpy as np
+import os
+import pandas as pd
+import tellurium as te
+import unittest
+from scipy import fftpack
+
+IGNORE_TEST = False
+IS_PLOT = False
+DIR = os.path.dirname(os.path.abspath(__file__))
+with open(os.path.join(DIR, "..", "models", "wolf.ant"), "r") as fd:
+    WOLF_MODEL = fd.read()
+OFFSET = 100
+
+
+def calculateFft(values, endTime, offset=OFFSET):
+    # Calculation in the Design-of-Experiments notebook
+    numPoint = len(values)
+    count = numPoint - offset
+    freqs = fftpack.fftfreq(count, endTime/numPoint)
+    fftValues = np.abs(fftpack.fft(values[offset:]))
+    return freqs[1:], fftValues[1:]
+
+
+class TestSpectral(unittest.TestCase):
+
+    def setUp(self):
+        rr = te.loada(WOLF_MODEL)
+        self.datas = []
+        for value in [1, 1.2]:
+            rr.resetAll()
+            rr["J1_Ki"] = value
+            self.datas.append(rr.simulate(0, 5, 300))
+        self.arr, self.times, self.molecules = spectral.stackSimulations(
+              self.datas)
+
+    def testStackSimulations(self):
+        if IGNORE_TEST:
+            return
+        self.assertEqual(self.arr.shape, (2, 300, 11))
+        self.assertEqual(self.molecules[0], "Glucose")
+        self.assertEqual(self.times[-1], 5)
+        df = pd.DataFrame(self.datas[0], columns=["time"] + self.molecules)
+        arr, _, molecules = spectral.stackSimulations([df],
+              molecules=["NADH", "ATP"])
+        self.assertEqual(molecules, ["NADH", "ATP"])
+        self.assertTrue(np.allclose(arr[0, :, 0], df["NADH"]))
+        with self.assertRaises(ValueError):
+            _ = spectral.stackSimulations([df], molecules=["dummy"])
+
+    def testCalculateFfts(self):
+        if IGNORE_TEST:
+            return
+        freqs, amplitudes = spectral.calculateFfts(self.arr, 5)
+        self.assertEqual(amplitudes.shape, (2, len(freqs), 11))
+        expectedFreqs, expectedValues = calculateFft(self.arr[1, :, 3], 5)
+        numFreq = len(freqs) - 1  # fftpack reports the Nyquist frequency as negative
+        self.assertTrue(np.allclose(freqs[:numFreq], expectedFreqs[:numFreq]))
+        self.assertTrue(np.allclose(amplitudes[1, :numFreq, 3],
+              expectedValues[:numFreq]))
+
+    def testCalculateTopPeaks(self):
+        if IGNORE_TEST:
+            return
+        freqs, amplitudes = spectral.calculateFfts(self.arr, 5)
+        topFreqs, topAmplitudes = spectral.calculateTopPeaks(self.arr, 5,
+              numPeak=3)
+        self.assertEqual(topFreqs.shape, (2, 3, 11))
+        for run in range(2):
+            for species in range(11):
+                orderedIdxs = np.argsort(-amplitudes[run, :, species],
+                      kind="stable")[:3]
+                self.assertTrue(np.allclose(topAmplitudes[run, :, species],
+                      amplitudes[run, orderedIdxs, species]))
+                self.assertTrue(np.allclose(topFreqs[run, :, species],
+                      freqs[orderedIdxs]))
+
+    def testCalculatePeakFrequencies(self):
+        if IGNORE_TEST:
+            return
+        frequencyArr = spectral.calculatePeakFrequencies(self.arr, 5)
+        self.assertEqual(frequencyArr.shape, (2, 11))
+        for run in range(2):
+            expectedFreqs, expectedValues = calculateFft(self.arr[run, :, 0], 5)
+            idx = list(expectedValues).index(max(expectedValues))
+            self.assertAlmostEqual(frequencyArr[run, 0], expectedFreqs[idx])
+        self.assertTrue(np.abs(frequencyArr[0, 0] - 5.1) < 0.1)
+        secondArr = spectral.calculatePeakFrequencies(self.arr, 5, numDelete=1)
+        self.assertFalse(np.allclose(frequencyArr, secondArr))
+
+    def testNonFiniteValues(self):
+        if IGNORE_TEST:
+            return
+        arr = np.array(self.arr)
+        arr[1, 200, 3] = np.nan
+        frequencyArr = spectral.calculatePeakFrequencies(arr, 5)
+        self.assertTrue(np.isnan(frequencyArr[1, 3]))
+        self.assertEqual(np.sum(np.isnan(frequencyArr)), 1)
+        expectedArr = spectral.calculatePeakFrequencies(self.arr, 5)
+        self.assertTrue(np.allclose(frequencyArr[0], expectedArr[0]))
+        topFreqs, topAmplitudes = spectral.calculateTopPeaks(arr, 5,
+              numPeak=2)
+        self.assertTrue(np.all(np.isnan(topFreqs[1, :, 3])))
+        self.assertTrue(np.all(np.isnan(topAmplitudes[1, :, 3])))
+        # A failed run
+        frequencyArr = spectral.calculatePeakFrequencies(
+              np.full((1, 300, 1), np.nan), 5)
+        self.assertTrue(np.isnan(frequencyArr[0, 0]))
+
+    def testCalculatePeakFrequencyDF(self):
+        if IGNORE_TEST:
+            return
+        df = spectral.calculatePeakFrequencyDF(self.datas,
+              molecules=["Glucose", "NADH"])
+        self.assertEqual(list(df.columns), ["Glucose", "NADH"])
+        self.assertEqual(len(df), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
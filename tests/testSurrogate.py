@@ -0,0 +1,77 @@
+from src import surrogate as sg
+from src.multiFidelity import TIME
+from tests.modelFixtures import LINEAR_PATHWAY_DF, LINEAR_PATHWAY_FIT_MODEL,  \
+      LINEAR_PATHWAY_PATH
+import numpy as np
+import os
+import SBstoat
+import unittest
+
+IGNORE_TEST = False
+IS_PLOT = False
+DIR = os.path.dirname(os.path.abspath(__file__))
+PARAMETERS = [SBstoat.Parameter("k1", 0.1, 1, 5),
+      SBstoat.Parameter("k2", 0.1, 1, 5)]
+
+
+class TestRBFSurrogate(unittest.TestCase):
+
+    def testPredict(self):
+        if IGNORE_TEST:
+            return
+        bounds = [(0, 10), (-1, 1)]
+        surrogate = sg.RBFSurrogate(bounds)
+        rng = np.random.default_rng(0)
+        arr = np.column_stack([rng.uniform(0, 10, 50), rng.uniform(-1, 1, 50)])
+        def energy(arr):
+            return np.exp((arr[:, 0] - 5)**2/25 + arr[:, 1]**2)
+        energies = energy(arr)
+        energies[0] = np.inf  # Not used
+        surrogate.add(arr, energies)
+        surrogate.add(arr[:5], energies[:5])  # Duplicates
+        self.assertEqual(surrogate.numPoint, 53)
+        testArr = np.array([[5, 0], [2, 0.5], [8, -0.5]])
+        predictions = surrogate.predict(testArr)
+        self.assertTrue(np.allclose(predictions, energy(testArr), rtol=0.05))
+
+
+class TestSurrogateFitter(unittest.TestCase):
+
+    def testFitModel(self):
+        if IGNORE_TEST:
+            return
+        fitter = sg.SurrogateFitter(LINEAR_PATHWAY_FIT_MODEL, LINEAR_PATHWAY_DF,
+              PARAMETERS, popsize=10, seed=0)
+        with self.assertRaises(ValueError):
+            _ = fitter.reportFit()
+        fitter.fitModel()
+        self.assertLess(abs(fitter.valueDct["k1"] - 1), 0.1)
+        self.assertGreater(fitter.numScreened, 0)
+        numSimulation = fitter.statisticDF[sg.NUM_SIMULATION].sum()
+        self.assertEqual(fitter.numSimulation, numSimulation)
+        self.assertTrue("simulations saved" in fitter.reportFit())
+
+    def testObservedData(self):
+        if IGNORE_TEST:
+            return
+        timeseries = SBstoat.NamedTimeseries(csvPath=LINEAR_PATHWAY_PATH)
+        for observedData in [LINEAR_PATHWAY_PATH, timeseries]:
+            fitter = sg.SurrogateFitter(LINEAR_PATHWAY_FIT_MODEL, observedData,
+                  ["k1", "k2"], parameterUpperBound=5)
+            self.assertEqual(fitter.bounds, [(0, 5), (0, 5)])
+            self.assertTrue(np.allclose(fitter.objective.times,
+                  LINEAR_PATHWAY_DF[TIME]))
+
+    def testCompareSurrogate(self):
+        if IGNORE_TEST:
+            return
+        df = sg.compareSurrogate(LINEAR_PATHWAY_FIT_MODEL, LINEAR_PATHWAY_DF,
+              PARAMETERS, popsize=10, seed=1)
+        self.assertEqual(list(df.index), [sg.SURROGATE, sg.DIFFERENTIAL_EVOLUTION])
+        self.assertEqual(df.loc[sg.DIFFERENTIAL_EVOLUTION, sg.NUM_SCREENED], 0)
+        self.assertLess(df.loc[sg.SURROGATE, sg.NUM_SIMULATION],
+              df.loc[sg.DIFFERENTIAL_EVOLUTION, sg.NUM_SIMULATION])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,127 @@
+from src import ensembleIntegrator as ei
+from src import symbolicJacobian as sj
+from tests.modelFixtures import LINEAR_PATHWAY_MODEL
+import libsbml
+import numpy as np
+import os
+import unittest
+
+IGNORE_TEST = False
+IS_PLOT = False
+DIR = os.path.dirname(os.path.abspath(__file__))
+with open(os.path.join(DIR, "..", "models", "wolf.ant"), "r") as fd:
+    WOLF_MODEL = fd.read()
+FUNCTION_MODEL = """
+function hill(v, s, k, n)
+  v*s^n/(k^n + s^n)
+end
+compartment C = 2
+species A in C, B in C
+R1: A -> B; C*hill(vm, A, km, 2) + C*exp(-B)*sqrt(A)
+R2: B -> A; C*piecewise(k1*A*B, time < 1, k2*B^1.5)
+R3: B -> ; C*kd*B/(1 + A)
+v := A*B
+R4: -> B; log(1 + v)
+vm = 2; km = 0.5; k1 = 1; k2 = 0.1; kd = 0.3; A = 1; B = 2
+"""
+
+
+class TestSymbolicJacobian(unittest.TestCase):
+
+    def setUp(self):
+        self.symbolicJacobian = sj.SymbolicJacobian(LINEAR_PATHWAY_MODEL)
+
+    def testDifferentiate(self):
+        if IGNORE_TEST:
+            return
+        nameDct = {"x": "x", "k": "k"}
+        derivativeDct = {"x": "1.0"}
+        def evaluate(formula, x, k):
+            node = libsbml.parseL3Formula(formula)
+            derivative = sj.differentiate(node, nameDct, derivativeDct)
+            if derivative is None:
+                return 0.0
+            return eval(derivative, {"np": np, "x": x, "k": k})
+        for formula, function in [
+              ("k*x^2", lambda x, k: 2*k*x),
+              ("k/(1 + x)", lambda x, k: -k/(1 + x)**2),
+              ("exp(-k*x)", lambda x, k: -k*np.exp(-k*x)),
+              ("x^x", lambda x, k: x**x*(np.log(x) + 1)),
+              ("ln(x) - sin(k)", lambda x, k: 1/x),
+              ("root(3, x)", lambda x, k: x**(-2/3)/3),
+              ("piecewise(x, x < k, k)", lambda x, k: float(x < k)),
+              ("k", lambda x, k: 0.0),
+              ]:
+            for x in [0.5, 2.0]:
+                self.assertTrue(np.isclose(evaluate(formula, x, 1.5),
+                      function(x, 1.5)), formula)
+
+    def testConstructor(self):
+        if IGNORE_TEST:
+            return
+        self.assertTrue("def jacobian(t, x, p):" in self.symbolicJacobian.source)
+        # Diagonal and subdiagonal
+        self.assertEqual(self.symbolicJacobian.numNonzero, 8)
+        ensembleModel = ei.EnsembleModel(LINEAR_PATHWAY_MODEL)
+        symbolicJacobian = sj.SymbolicJacobian(ensembleModel)
+        self.assertTrue(symbolicJacobian.ensembleModel is ensembleModel)
+
+    def testJacobian(self):
+        if IGNORE_TEST:
+            return
+        for model in [WOLF_MODEL, FUNCTION_MODEL]:
+            symbolicJacobian = sj.SymbolicJacobian(model)
+            ensembleModel = symbolicJacobian.ensembleModel
+            x = ensembleModel.initialArr[np.newaxis, :]*np.array([[1], [1.3]])
+            p = np.repeat(ensembleModel.constantArr[np.newaxis, :], 2, axis=0)
+            for t in [0.5, 2.0]:
+                tArr = np.repeat(t, 2)
+                jacobianArr = symbolicJacobian.jacobian(tArr, x, p)
+                expectedArr = ei.calculateJacobians(ensembleModel.rhs, tArr, x, p)
+                self.assertEqual(jacobianArr.shape, expectedArr.shape)
+                self.assertTrue(np.allclose(jacobianArr, expectedArr,
+                      rtol=1e-5, atol=1e-5))
+
+    def testGetScipyFunctions(self):
+        if IGNORE_TEST:
+            return
+        fun, jac, initialArr = self.symbolicJacobian.getScipyFunctions(
+              ["k1", "k2", "k3", "k4"], [1, 2, 3, 4])
+        self.assertEqual(initialArr[0], 10)
+        self.assertTrue(np.allclose(fun(0, initialArr), [-10, 10, 0, 0, 0]))
+        expectedArr = np.zeros((5, 5))
+        for idx, value in enumerate([1, 2, 3, 4]):
+            expectedArr[idx, idx] = -value
+            expectedArr[idx + 1, idx] = value
+        self.assertTrue(np.allclose(jac(0, initialArr), expectedArr))
+
+    def testSimulate(self):
+        if IGNORE_TEST:
+            return
+        symbolicJacobian = sj.SymbolicJacobian(WOLF_MODEL)
+        ensembleModel = symbolicJacobian.ensembleModel
+        arr1 = ensembleModel.simulate(endTime=0.5, numPoint=11,
+              method=ei.ROSENBROCK, jacobianFunction=symbolicJacobian.jacobian)
+        arr2 = ensembleModel.simulate(endTime=0.5, numPoint=11)
+        self.assertLess(np.max(np.abs(arr1 - arr2)), 1e-2)
+
+    def testBenchmark(self):
+        if IGNORE_TEST:
+            return
+        df = sj.benchmark(LINEAR_PATHWAY_MODEL, ["k1", "k2", "k3", "k4"],
+              [1, 2, 3, 4], endTime=2, numPoint=20, numMember=3)
+        self.assertEqual(len(df), 4)
+        self.assertEqual(list(df.columns), [sj.SECONDS, sj.NUM_STEP, sj.NUM_RHS,
+              sj.NUM_JACOBIAN, sj.MAX_DIFFERENCE])
+        self.assertLess(df[sj.MAX_DIFFERENCE].max(), 1e-3)
+        # Finite differences evaluate the right hand side for every species
+        rosenbrockDF = df.loc[ei.ROSENBROCK]
+        self.assertGreater(rosenbrockDF.loc[sj.FINITE_DIFFERENCE, sj.NUM_RHS],
+              rosenbrockDF.loc[sj.SYMBOLIC, sj.NUM_RHS])
+        # Jacobians are also evaluated for rejected steps
+        self.assertTrue(np.all(rosenbrockDF[sj.NUM_STEP]
+              <= rosenbrockDF[sj.NUM_JACOBIAN]))
+
+
+if __name__ == '__main__':
+    unittest.main()